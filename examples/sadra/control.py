@@ -12,10 +12,7 @@ import time
 from itertools import combinations, chain
 from typing import Tuple, List
 
-import ipdb
-import networkx as nx
 import numpy as np
-import typer as typer
 import yaml
 from matplotlib import pyplot as plt
 from yaml import Loader
@@ -29,6 +26,9 @@ from kltl.systems.ats.pts_to_ats import pts2ats
 from kltl.systems.pts import ParametricTransitionSystem
 
 from kltl.systems.pts.sadra import get_sadra_system
+from kltl.systems.graph_utils import breadth_first_parents, names_to_indices, path_from_parents
+from kltl.synthesis import automaton_state_mask, solve_reachability_game
+from kltl.artifact_cache import ArtifactCache
 from kltl.systems.pts.trajectory import create_random_trajectory_with_N_actions, FiniteTrajectory
 from kltl.types import Action
 
@@ -106,140 +106,131 @@ def create_automaton_for_negation_of_task(sadra_system: ParametricTransitionSyst
 
     return dra
 
-def conversion_step(sadra_system: ParametricTransitionSystem, data_dir: str, force: bool = False) -> DeterministicRabinAutomaton:
+def conversion_step(sadra_system: ParametricTransitionSystem, cache: ArtifactCache, force: bool = False) -> Tuple[AdaptiveTransitionSystem, float]:
     """
-    ats, timing = conversion_step(sadra_system, data_dir)
+    ats, timing = conversion_step(sadra_system, cache)
     :param sadra_system:
+    :param cache: The cache of previous results. The ATS is only recomputed if the system changed.
     :param force: If True, then the conversion will be forced.
     :return:
     """
-    # Constants
-    sadra_ats_data_file = data_dir + 'sadra_ats.yml'
-
     # Algorithm
-    conversion_time = -1.0
-    do_conversion = not os.path.exists(sadra_ats_data_file)  # If the data file does not exist, then create a system.
-    do_conversion = do_conversion or force  # Flag can be used to force conversion online.
-    if do_conversion:
-        conversion_start = time.time()
-        sadra_ats = pts2ats(sadra_system)
-        conversion_end = time.time()
-
-        print(f"- Converted Sadra PTS to an ATS with:")
-        print(f"  + {len(sadra_ats.S)} states")
-        print(f"  + {len(sadra_ats.I)} initial states")
-        print(f"  + {len(sadra_ats.transitions)} transitions")
-        print(f"- Conversion took {conversion_end - conversion_start} seconds.")
-
-        conversion_time = conversion_end - conversion_start
-
-        # Save the data
-        data_struct = {
-            'S': sadra_ats.S,
-            'AP': sadra_ats.AP,
-            'Act': sadra_ats.Act,
-            'I': sadra_ats.I,
-            'transitions': sadra_ats.transitions,
-            'labels': sadra_ats.labels,
-            'conversion_time': conversion_time,
-        }
-
-        with open(sadra_ats_data_file, 'w') as f:
-            yaml.dump(data_struct, f)
-    else:
-        with open(sadra_ats_data_file, 'r') as f:
-            load_start = time.time()
-            ats_data = yaml.load(f, Loader=Loader)
-
-            sadra_ats = AdaptiveTransitionSystem(
-                ats_data['S'],
-                ats_data['Act'],
-                ats_data['AP'],
-                I=ats_data['I'],
-                transitions=ats_data['transitions'],
-                labels=ats_data['labels']
-            )
-
-            conversion_time = ats_data['conversion_time']
-            load_end = time.time()
-
-            print(f"- Loaded Sadra ATS from a previous computation.")
-            print(f"  + The previous ATS contained:")
-            print(f"    ~ {len(sadra_ats.S)} states")
-            print(f"    ~ {len(sadra_ats.I)} initial states")
-            print(f"    ~ {len(sadra_ats.transitions)} transitions")
-            print(f"  + Conversion previously took {conversion_time} seconds.")
-            print(f"  + The ATS was loaded via YAML in {load_end - load_start} seconds.")
+    was_cached = cache.contains(cache.key(pts2ats, sadra_system)) and not force
 
+    conversion_start = time.time()
+    sadra_ats = cache.call(pts2ats, sadra_system, force=force)
+    conversion_end = time.time()
+    conversion_time = conversion_end - conversion_start
 
+    if was_cached:
+        print(f"- Loaded Sadra ATS from a previous computation in {conversion_time} seconds.")
+    else:
+        print(f"- Converted Sadra PTS to an ATS in {conversion_time} seconds.")
+    print(f"  + The ATS contains:")
+    print(f"    ~ {len(sadra_ats.S)} states")
+    print(f"    ~ {len(sadra_ats.I)} initial states")
+    print(f"    ~ {len(sadra_ats.transitions)} transitions")
 
     return sadra_ats, conversion_time
 
 def product_step(
     sadra_ats: AdaptiveTransitionSystem,
     dra: DeterministicRabinAutomaton,
-    data_dir: str,
+    cache: ArtifactCache,
     force: bool = False,
 ) -> Tuple[TransitionSystem, float]:
+    # Algorithm
+    was_cached = cache.contains(cache.key(AdaptiveTransitionSystem.product, sadra_ats, dra)) and not force
+
+    product_start = time.time()
+    sadra_ats_product = cache.call(AdaptiveTransitionSystem.product, sadra_ats, dra, force=force)
+    product_end = time.time()
+    product_time = product_end - product_start
+
+    if was_cached:
+        print(f"- Loaded the product from a previous computation in {product_time} seconds.")
+    else:
+        print(f"- Product took {product_time} seconds to compute.")
+    print(f"- Product of the ATS and the automaton for the negation of the task contains")
+    print(f"  + {len(sadra_ats_product.S)} states,")
+    print(f"  + {len(sadra_ats_product.I)} initial states,")
+    print(f"  + {len(sadra_ats_product.transitions)} transitions.")
+
+    return sadra_ats_product, product_time
+
+def find_paths_to_full_satisfaction(product_system: TransitionSystem) -> List[List[int]]:
+    """
+    paths = find_paths_to_full_satisfaction(product_system)
+    Description:
+        Finds a shortest path from the initial states to every reachable state where the task is fully satisfied
+        (i.e., every state labeled with q4). A single breadth first search tree gives all of the paths.
+    :param product_system:
+    :return: List of paths (each path is a list of state indices).
+    """
     # Constants
-    sadra_product_data_file = data_dir + 'sadra_product.yml'
+    full_sat_states = np.flatnonzero(automaton_state_mask(product_system, ['q4'])) # Q4 is reached only if all tasks are satisfied
+    initial_indices = names_to_indices(product_system, "S", product_system.I)
 
     # Algorithm
-    product_time = -1.0
-    compute_product = not os.path.exists(sadra_product_data_file)  # If the data file does not exist, then create a system.
-    compute_product = compute_product or force  # Flag can be used to force conversion online.
-    if compute_product:  # If the data file does not exist, then create a system.
-        product_start = time.time()
-        sadra_ats_product = sadra_ats.product(dra)
-        product_end = time.time()
-        print(f"- Product of the ATS and the automaton for the negation of the task contains")
-        print(f"  + {len(sadra_ats_product.S)} states,")
-        print(f"  + {len(sadra_ats_product.I)} initial states,")
-        print(f"  + {len(sadra_ats_product.transitions)} transitions.")
-        print(f"- Product took {product_end - product_start} seconds to compute.")
-
-        product_time = product_end - product_start
-
-        # Save the data
-        data_struct = {
-            'S': sadra_ats_product.S,
-            'AP': sadra_ats_product.AP,
-            'Act': sadra_ats_product.Act,
-            'I': sadra_ats_product.I,
-            'transitions': sadra_ats_product.transitions,
-            'labels': sadra_ats_product.labels,
-            'conversion_time': product_time,
-        }
+    parents = breadth_first_parents(len(product_system.S), product_system.transitions, initial_indices)
+    reached = parents >= 0
+    reached[initial_indices] = True
 
-        with open(sadra_product_data_file, 'w') as f:
-            yaml.dump(data_struct, f)
+    return [path_from_parents(parents, s) for s in full_sat_states if reached[s]]
 
-    else:
-        with open(sadra_product_data_file, 'r') as f:
-            load_start = time.time()
-            product_ts_data = yaml.load(f, Loader=Loader)
-
-            sadra_ats_product = TransitionSystem(
-                product_ts_data['S'],
-                product_ts_data['Act'],
-                product_ts_data['AP'],
-                I=product_ts_data['I'],
-                transitions=product_ts_data['transitions'],
-                labels=product_ts_data['labels']
-            )
+def synthesis_step(product_system: TransitionSystem) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    winning, strategy, synthesis_time = synthesis_step(product_system)
+    Description:
+        Solves the game in which the controller must reach a state where the task is fully satisfied (q4) without
+        ever visiting a dangerous state (q5), whatever the value of the unknown parameter is.
+    :param product_system:
+    :return: The winning states of the product, a memoryless strategy (one action index per state) and the time taken.
+    """
+    # Algorithm
+    synthesis_start = time.time()
+    winning, strategy = solve_reachability_game(
+        product_system,
+        automaton_state_mask(product_system, ['q4']),
+        safe=~automaton_state_mask(product_system, ['q5']),
+    )
+    synthesis_time = time.time() - synthesis_start
 
-            conversion_time = product_ts_data['conversion_time']
-            load_end = time.time()
+    initial_indices = names_to_indices(product_system, "S", product_system.I)
+    print(f"- Solved the reach-while-avoid game in {synthesis_time} seconds.")
+    print(f"  + {np.sum(winning)} states of the product are winning,")
+    print(f"  + {np.sum(winning[initial_indices])} of the {len(initial_indices)} initial states are winning.")
 
-            print(f"- Loaded Sadra Product TS from a previous computation.")
-            print(f"  + The previous Product TS contained:")
-            print(f"    ~ {len(sadra_ats_product.S)} states")
-            print(f"    ~ {len(sadra_ats_product.I)} initial states")
-            print(f"    ~ {len(sadra_ats_product.transitions)} transitions")
-            print(f"  + Conversion previously took {conversion_time} seconds.")
-            print(f"  + The ATS was loaded via YAML in {load_end - load_start} seconds.")
+    return winning, strategy, synthesis_time
 
-    return sadra_ats_product, product_time
+def characterize_safe_paths(
+        paths: List[List[int]],
+        product_system: TransitionSystem,
+        winning: np.ndarray,
+) -> Tuple[int, int]:
+    """
+    num_safe_paths, num_controllable_paths = characterize_safe_paths(paths, product_system, winning)
+    Description:
+        Counts the paths that never visit a dangerous state (q5) and the paths that only visit states in winning (the
+        controller's attractor of the q4 states that avoids the q5 states, see synthesis_step).
+    :param paths: List of paths (each path is a list of state indices).
+    :param product_system:
+    :param winning: Boolean mask over the states of the product.
+    :return:
+    """
+    # Constants
+    dangerous = automaton_state_mask(product_system, ['q5'])
+    path_offsets = np.cumsum([0] + [len(path) for path in paths])
+    path_states = np.concatenate([np.asarray(path, dtype=int) for path in paths]) if paths else np.zeros((0,), dtype=int)
+
+    # Algorithm
+    def count_paths_within(mask: np.ndarray) -> int:
+        if len(paths) == 0:
+            return 0
+        n_outside = np.add.reduceat((~mask[path_states]).astype(int), path_offsets[:-1])
+        return int(np.sum(n_outside == 0))
+
+    return count_paths_within(~dangerous), count_paths_within(winning)
 
 def conversion_to_action_sequence_step(
         paths: List[List[int]],
@@ -305,7 +296,12 @@ def conversion_to_action_sequence_step(
 
     return action_sequences, action_index_sequences, np.array(conversion_times).sum()
 
-def main(force_pts_to_ats_conversion: bool = False, force_product_ts_creation: bool = False, force_action_sequence_conversion: bool = False):
+def main(
+    force_pts_to_ats_conversion: bool = False,
+    force_product_ts_creation: bool = False,
+    force_path_finding: bool = False,
+    force_action_sequence_conversion: bool = False,
+):
     # Get System
     sadra = get_sadra_system()
     print("Created Sadra Paramteric Transition System with {} columns and {} rows.".format(sadra.n_cols, sadra.n_rows))
@@ -314,6 +310,7 @@ def main(force_pts_to_ats_conversion: bool = False, force_product_ts_creation: b
     data_dir, fig_dir = './data/', './figures/'
     os.makedirs(data_dir, exist_ok=True)
     os.makedirs(fig_dir, exist_ok=True)
+    cache = ArtifactCache(data_dir + 'cache/')
 
     # Attempt to Sample Trajectories of the system
     n_trajs = 10
@@ -323,7 +320,7 @@ def main(force_pts_to_ats_conversion: bool = False, force_product_ts_creation: b
 
     # Convert Sadra PTS to an ATS
     print("Converting Sadra PTS to an ATS...")
-    sadra_ats, ats_conversion_time = conversion_step(sadra, data_dir, force=force_pts_to_ats_conversion)
+    sadra_ats, ats_conversion_time = conversion_step(sadra, cache, force=force_pts_to_ats_conversion)
 
     # Create task for avoiding the unsafe states and eventually reaching the goal
     phi = And(
@@ -337,66 +334,32 @@ def main(force_pts_to_ats_conversion: bool = False, force_product_ts_creation: b
 
     # Compute product of these two
     print("Computing product of the ATS and the automaton for the negation of the task...")
-    sadra_ats_product, product_time = product_step(sadra_ats, dra_out, data_dir, force=force_product_ts_creation)
+    sadra_ats_product, product_time = product_step(sadra_ats, dra_out, cache, force=force_product_ts_creation)
 
-    # Convert product ts to a graph
-    print("Converting product TS to a graph...")
-    networkx_construction_start = time.time()
-    sadra_ats_product_graph = sadra_ats_product.to_networkx_graph()
-    networkx_construction_end = time.time()
-    print(f"- Conversion to a graph took {networkx_construction_end - networkx_construction_start} seconds.")
-    print(f"- Final graph contains:")
-    print(f"  + {len(sadra_ats_product_graph)} nodes")
+    # Synthesize a controller that satisfies the task for every value of the parameter
+    print("Synthesizing a controller for the task...")
+    winning, strategy, synthesis_time = synthesis_step(sadra_ats_product)
 
     # Finding all paths to the target state
     print("Finding all paths to the target state...")
-    label_indices_containing_full_sat = sadra_ats_product.labels[:, 1] == sadra_ats_product.AP.index('q4') # Q4 is reached only if all tasks are satisfied
-    pathfind_times, num_paths_found, paths_found = [], 0, []
-    for s in sadra_ats_product.labels[label_indices_containing_full_sat, 0]:
-        #print("- Considering target state {}...".format(s))
-        if not nx.has_path(sadra_ats_product_graph, 0, s):
-            #print(" + State {} is not reachable from the initial state. Skipping".format(s))
-            continue
-
-        #print("  + Finding path to state {}...".format(s))
-        pathfind_i_start = time.time()
-        path = nx.shortest_path(sadra_ats_product_graph, 0, s)
-        pathfind_i_end = time.time()
+    pathfind_start = time.time()
+    paths_found = cache.call(find_paths_to_full_satisfaction, sadra_ats_product, force=force_path_finding)
+    pathfind_end = time.time()
 
-        # Report
-        #print("    ~ Path to state {} contains {} states".format(s, len(path)))
-        #print(f"    ~ Path to state {s} found in {pathfind_i_end - pathfind_i_start} seconds.")
-
-        # Update list of data
-        pathfind_times.append(pathfind_i_end - pathfind_i_start)
-        paths_found.append(path)
-
-    print(f"- Found {len(paths_found)} paths to states containing the full satisfaction of the task.")
+    print(f"- Found {len(paths_found)} paths to states containing the full satisfaction of the task in {pathfind_end - pathfind_start} seconds.")
 
     # Characterize which paths visit danger states
     print("Characterizing which paths visit danger states...")
-    num_safe_paths_found = 0
-    for path in paths_found:
-        #print(f"- Considering path {path}...")
-        # Find out if there are any labels for these elements of the path that have the danger albel
-        states_labeled_dangerous = sadra_ats_product.labels[
-            sadra_ats_product.labels[:, 1] == sadra_ats_product.AP.index("q5"), 0,
-        ]
-        dangerous_states_in_path = np.intersect1d(path, states_labeled_dangerous)
-
-        if len(dangerous_states_in_path) > 0:
-            # print(f"  + Path {path} contains dangerous states {dangerous_states_in_path}.")
-            pass
-        else:
-            # print(f"  + Path {path} does not contain any dangerous states.")
-            num_safe_paths_found += 1
+    num_safe_paths_found, num_controllable_paths_found = characterize_safe_paths(paths_found, sadra_ats_product, winning)
 
     print(f"- Found {num_safe_paths_found} paths that do not contain any dangerous states.")
+    print(f"- Found {num_controllable_paths_found} paths that only visit states from which the task can be completed safely.")
 
     action_sequences, action_index_sequences, conversion_times = conversion_to_action_sequence_step(
         paths_found, sadra_ats_product, force=force_action_sequence_conversion,
     )
 
+    path = paths_found[0]
     traj_str = []
     for i in range(len(action_sequences[0])):
         traj_str += [sadra_ats_product.S[path[i]][0][0], sadra_ats_product.S[path[i]][0][0], action_sequences[0][i]]
@@ -424,7 +387,7 @@ def main(force_pts_to_ats_conversion: bool = False, force_product_ts_creation: b
             paths_with_this_action_sequence = []
             print(f"  + Checking prefix of length {j}...")
 
-            if len(action_index_sequence) < j-1:
+            if len(action_index_sequence) < j:
                 print(f"    ~ Action sequence is too short. Skipping.")
                 continue
 
@@ -461,5 +424,8 @@ def main(force_pts_to_ats_conversion: bool = False, force_product_ts_creation: b
     # print(cycles)
 
 if __name__ == '__main__':
+    import ipdb
+    import typer
+
     with ipdb.launch_ipdb_on_exception():
         typer.run(main)
@@ -0,0 +1,437 @@
+"""
+artifact_cache.py
+Description:
+    A content-addressed, on-disk cache for the results of expensive computations (e.g., pts2ats, products and path
+    finding). Each result is stored under a key that is computed from a fingerprint of the function (including the
+    code that a call of it can reach, see code_dependencies) and of all of its inputs, so a result is only reused when
+    the inputs and that code are exactly the same. The total size of the cache is bounded; the least recently used
+    results are removed first.
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+import types
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+
+from kltl.serialization import BinarySerializable, IgnoredAttributes, save_object, load_object
+
+# Constants
+FingerprintVersion = 3
+ScalarTypes = (bool, int, float, complex, np.bool_, np.integer, np.floating)
+PackageName = __name__.split(".")[0]
+
+
+def fingerprint(*objects: Any) -> str:
+    """
+    key = fingerprint(system1, system2, ...)
+    Description:
+        A stable hash of the given objects. Numpy arrays are hashed by dtype, shape and contents; systems and automata
+        are hashed by their class and all of their attributes (name tables and integer arrays). Sets are hashed in a
+        canonical order, so the fingerprint does not depend on the order of their elements.
+    :param objects:
+    :return: Hexadecimal sha256 digest.
+    """
+    # Algorithm
+    digest = hashlib.sha256(f"fingerprint v{FingerprintVersion}".encode("utf-8"))
+    for obj in objects:
+        update_digest(digest, obj)
+
+    return digest.hexdigest()
+
+
+def update_digest(digest, value: Any):
+    """
+    update_digest(digest, value)
+    Description:
+        Adds a canonical, type-tagged description of value to the digest.
+    """
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        digest.update(f"a{array.dtype.str}{array.shape}".encode("utf-8"))
+        digest.update(array.tobytes())
+    elif isinstance(value, str):
+        encoded = value.encode("utf-8")
+        digest.update(f"s{len(encoded)}:".encode("utf-8") + encoded)
+    elif isinstance(value, bytes):
+        digest.update(f"b{len(value)}:".encode("utf-8") + value)
+    elif (value is None) or (value is Ellipsis) or isinstance(value, ScalarTypes):
+        digest.update(f"{type(value).__name__}:{value!r};".encode("utf-8"))
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}[".encode("utf-8"))
+        for element in value:
+            update_digest(digest, element)
+        digest.update(b"]")
+    elif isinstance(value, (set, frozenset)):
+        digest.update(f"set{len(value)}[".encode("utf-8"))
+        for element_fingerprint in sorted(fingerprint(element) for element in value):
+            digest.update(element_fingerprint.encode("utf-8"))
+        digest.update(b"]")
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}[".encode("utf-8"))
+        for item_fingerprint in sorted(fingerprint(key, element) for (key, element) in value.items()):
+            digest.update(item_fingerprint.encode("utf-8"))
+        digest.update(b"]")
+    elif inspect.ismethod(value):
+        digest.update(b"method")
+        update_digest(digest, value.__func__)
+        update_digest(digest, value.__self__)
+    elif inspect.isfunction(value) or inspect.isclass(value):
+        kind = "function" if inspect.isfunction(value) else "class"
+        digest.update(f"{kind} {value.__module__}.{value.__qualname__}".encode("utf-8"))
+        for (name, description) in code_dependencies(value):
+            update_digest(digest, name)
+            update_digest(digest, description)
+    elif isinstance(value, types.CodeType):
+        update_code_digest(digest, value)
+    elif hasattr(value, "__dict__"):
+        digest.update(f"object {type(value).__module__}.{type(value).__qualname__}{{".encode("utf-8"))
+        attributes = value.fingerprint_attributes() if hasattr(value, "fingerprint_attributes") else value.__dict__
+        for name in sorted(attributes.keys()):
+            if name in IgnoredAttributes:
+                continue
+            update_digest(digest, name)
+            update_digest(digest, attributes[name])
+        digest.update(b"}")
+    else:
+        raise TypeError(f"Values of type {type(value)} can not be fingerprinted!")
+
+
+def update_code_digest(digest, code: types.CodeType):
+    """
+    update_code_digest(digest, code)
+    Description:
+        Adds the bytecode, the constants and the global and attribute names (co_names) of a code object to the digest.
+        The code objects of nested functions, lambdas and comprehensions are added as well.
+    """
+    digest.update(code.co_code)
+    update_digest(digest, list(code.co_names))
+    update_digest(digest, [constant for constant in code.co_consts if not isinstance(constant, types.CodeType)])
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            update_code_digest(digest, constant)
+
+
+def code_dependencies(value: Any) -> List[Tuple[str, Any]]:
+    """
+    dependencies = code_dependencies(function_or_class)
+    Description:
+        The code that a call of a function (or of the methods of a class) can reach: the functions, classes and
+        constants that its code refers to, followed transitively through their own code. Attributes of modules (e.g.,
+        graph_utils.cached_index) are followed when their names appear in the code. Functions are described by their
+        code objects (and constant default values), classes by their bases (their methods and constant attributes are
+        listed separately) and constants by their values. The code of installed packages and of the standard library is
+        not followed; their modules are described by module_description. Other code of the same modules is not
+        hashed, so editing it does not change the keys of the cache.
+    :param value: A function or a class.
+    :return: List of (qualified name, description) pairs, sorted by name.
+    """
+    # Constants
+    dependencies, stack, visited = {}, [value], set()
+
+    def qualified_name(obj: Any) -> str:
+        return f"{obj.__module__}.{obj.__qualname__}"
+
+    # Algorithm
+    while len(stack) > 0:
+        obj = stack.pop()
+        if id(obj) in visited:
+            continue
+        visited.add(id(obj))
+
+        module_name = obj.__name__ if inspect.ismodule(obj) else obj.__module__
+        if not followed_module(module_name):
+            dependencies[module_name.split(".")[0]] = module_description(module_name)
+            continue
+
+        if inspect.isclass(obj):
+            dependencies[qualified_name(obj)] = [f"{base.__module__}.{base.__qualname__}" for base in obj.__bases__]
+            stack += [base for base in obj.__bases__ if base is not object]
+            for (name, attribute) in vars(obj).items():
+                if isinstance(attribute, (staticmethod, classmethod)):
+                    attribute = attribute.__func__
+                if isinstance(attribute, property):
+                    stack += [f for f in [attribute.fget, attribute.fset, attribute.fdel] if f is not None]
+                elif inspect.isfunction(attribute) or inspect.isclass(attribute):
+                    stack.append(attribute)
+                elif (not name.startswith("__")) and is_constant(attribute):
+                    dependencies[f"{qualified_name(obj)}.{name}"] = attribute
+            continue
+
+        if not inspect.isfunction(obj):
+            continue
+
+        defaults = [default for default in (obj.__defaults__ or ()) if is_constant(default)]
+        dependencies[qualified_name(obj)] = [obj.__code__, defaults]
+        stack += [cell.cell_contents for cell in (obj.__closure__ or ()) if is_code_object(cell)]
+
+        names, codes = set(), [obj.__code__]
+        while len(codes) > 0:
+            code = codes.pop()
+            names.update(code.co_names)
+            codes += [constant for constant in code.co_consts if isinstance(constant, types.CodeType)]
+
+        for name in names:
+            if name not in obj.__globals__:
+                continue
+            global_value = obj.__globals__[name]
+            if inspect.ismodule(global_value):
+                if not followed_module(global_value.__name__):
+                    stack.append(global_value)
+                    continue
+                stack += [
+                    getattr(global_value, attribute) for attribute in names
+                    if is_code_object(getattr(global_value, attribute, None))
+                ]
+            elif is_code_object(global_value):
+                stack.append(global_value)
+            elif is_constant(global_value):
+                dependencies[f"{obj.__module__}.{name}"] = global_value
+
+    return sorted(dependencies.items(), key=lambda item: item[0])
+
+
+def is_code_object(value: Any) -> bool:
+    """
+    tf = is_code_object(value)
+    Description:
+        True if value is a function, a class or a module (i.e., something that code_dependencies follows).
+    """
+    try:
+        return inspect.isfunction(value) or inspect.isclass(value) or inspect.ismodule(value)
+    except Exception:
+        return False
+
+
+def is_constant(value: Any) -> bool:
+    """
+    tf = is_constant(value)
+    Description:
+        True if value is a number, a string, bytes, None or a (list, tuple, set or dict) container of such values. Other
+        globals (e.g., systems that are stored in a module) are not part of the code, so they are not hashed.
+    """
+    if (value is None) or isinstance(value, (bool, int, float, str, bytes, np.bool_, np.integer, np.floating)):
+        return True
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(is_constant(element) for element in value)
+    if isinstance(value, dict):
+        return all(is_constant(key) and is_constant(element) for (key, element) in value.items())
+    return False
+
+
+def followed_module(module_name: str) -> bool:
+    """
+    tf = followed_module(module_name)
+    Description:
+        True if code_dependencies follows the code of the module: the modules of this package (kltl) and other source
+        modules (e.g., the examples), but not installed packages that have a version or the standard library.
+    """
+    # Constants
+    if module_name is None:
+        return False
+    package_name = module_name.split(".")[0]
+    package = sys.modules.get(package_name)
+
+    # Algorithm
+    if package_name == PackageName:
+        return True
+    if (package_name in sys.builtin_module_names) or (package_name in getattr(sys, "stdlib_module_names", [])):
+        return False
+    return getattr(package, "__version__", None) is None
+
+
+def module_description(module_name: str) -> str:
+    """
+    description = module_description(module_name)
+    Description:
+        Describes a module whose code code_dependencies does not follow: an installed package by its version (e.g.,
+        "numpy 1.26.4") and the standard library by the version of python.
+    :param module_name:
+    :return:
+    """
+    # Constants
+    package_name = module_name.split(".")[0]
+    package = sys.modules.get(package_name)
+
+    # Algorithm
+    if getattr(package, "__version__", None) is not None:
+        return f"{package_name} {package.__version__}"
+
+    return f"{package_name} (python {sys.version_info.major}.{sys.version_info.minor})"
+
+
+class ArtifactCache:
+    """
+    ArtifactCache
+    Description:
+        A directory of cached results. Systems and automata are stored with save_object (so they are memory mapped when
+        loaded); all other results are pickled. Whenever a result is used its modification time is updated, and
+        whenever a result is stored the least recently used results are removed until the cache is at most max_bytes.
+        Example:
+            cache = ArtifactCache("./data/cache")
+            sadra_ats = cache.call(pts2ats, sadra)
+            product = cache.call(AdaptiveTransitionSystem.product, sadra_ats, dra)
+    """
+    def __init__(self, directory: str, max_bytes: int = 2 ** 32):
+        # Input Processing
+        assert max_bytes > 0, f"Expected a positive cache size, but received {max_bytes}!"
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, function: Callable, *args: Any, version: Any = None, **kwargs: Any) -> str:
+        """
+        key = cache.key(function, *args, version=None, **kwargs)
+        Description:
+            The key of a function call. It depends on the code that the function can reach (see code_dependencies), the
+            arguments (and the code of their classes, whose methods the function may call) and version.
+        :return:
+        """
+        # Constants
+        argument_classes = {
+            type(argument) for argument in list(args) + list(kwargs.values())
+            if hasattr(argument, "__dict__") and not is_code_object(argument)
+        }
+
+        # Algorithm
+        return fingerprint(
+            function, sorted(argument_classes, key=lambda cls: f"{cls.__module__}.{cls.__qualname__}"),
+            list(args), kwargs, version,
+        )
+
+    def call(self, function: Callable, *args: Any, version: Any = None, force: bool = False, **kwargs: Any) -> Any:
+        """
+        result = cache.call(function, *args, version=None, force=False, **kwargs)
+        Description:
+            Returns function(*args, **kwargs), reusing a cached result if the same call was made before.
+        :param function: The function (it must not have side effects that are needed).
+        :param version: Any value that should be part of the key (e.g., the version of data files that the function reads).
+        :param force: If True, then the result is always recomputed (and stored).
+        :return:
+        """
+        # Constants
+        key = self.key(function, *args, version=version, **kwargs)
+
+        # Algorithm
+        if (not force) and self.contains(key):
+            return self.get(key)
+
+        result = function(*args, **kwargs)
+        self.put(key, result)
+        return result
+
+    def contains(self, key: str) -> bool:
+        return self.path(key) is not None
+
+    def path(self, key: str) -> str:
+        """
+        path = cache.path(key)
+        :return: The file that stores the result with this key (or None if there is no such result).
+        """
+        for extension in [".kltl", ".pkl"]:
+            candidate = os.path.join(self.directory, key + extension)
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def get(self, key: str) -> Any:
+        """
+        result = cache.get(key)
+        Description:
+            Loads a cached result and marks it as recently used.
+        :param key:
+        :return:
+        """
+        # Input Processing
+        path = self.path(key)
+        assert path is not None, f"There is no result with key {key} in the cache!"
+
+        # Algorithm
+        os.utime(path)
+        if path.endswith(".kltl"):
+            return load_object(path)
+
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def put(self, key: str, result: Any):
+        """
+        cache.put(key, result)
+        Description:
+            Stores a result and then removes the least recently used results if the cache is too large.
+        :param key:
+        :param result:
+        :return:
+        """
+        # Constants
+        path = os.path.join(self.directory, key + (".kltl" if isinstance(result, BinarySerializable) else ".pkl"))
+
+        # Algorithm
+        self.remove(key)
+
+        # Each writer uses its own temporary file, so concurrent puts of the same key never share a partial file
+        handle, temporary_path = tempfile.mkstemp(dir=self.directory, prefix=key, suffix=".tmp")
+        os.close(handle)
+        try:
+            if isinstance(result, BinarySerializable):
+                save_object(result, temporary_path)
+            else:
+                with open(temporary_path, "wb") as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+        self.evict(keep=path)
+
+    def remove(self, key: str):
+        path = self.path(key)
+        while path is not None:
+            os.remove(path)
+            path = self.path(key)
+
+    def entries(self) -> List[str]:
+        """
+        paths = cache.entries()
+        :return: The files in the cache, from the least recently used to the most recently used.
+        """
+        paths = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith(".kltl") or name.endswith(".pkl")
+        ]
+        return sorted(paths, key=lambda path: os.stat(path).st_mtime_ns)
+
+    def size(self) -> int:
+        return sum(os.path.getsize(path) for path in self.entries())
+
+    def evict(self, keep: str = None):
+        """
+        cache.evict(keep=None)
+        Description:
+            Removes the least recently used results until the total size is at most max_bytes.
+            The file keep (e.g., the result that was just stored) is never removed.
+        :return:
+        """
+        # Constants
+        entries = self.entries()
+        total_size = sum(os.path.getsize(path) for path in entries)
+
+        # Algorithm
+        for path in entries:
+            if total_size <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total_size -= os.path.getsize(path)
+            os.remove(path)
+
+    def clear(self):
+        for path in self.entries():
+            os.remove(path)
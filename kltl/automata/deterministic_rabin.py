@@ -9,8 +9,9 @@ from typing import List, Set, Tuple
 import numpy as np
 
 from kltl.types import State, Action, AtomicProposition, Transition, TransitionMatrix
+from kltl.serialization import BinarySerializable
 
-class DeterministicRabinAutomaton(object):
+class DeterministicRabinAutomaton(BinarySerializable):
     def __init__(
         self,
         Q: List[State],
@@ -2,13 +2,23 @@
 kltl.py
 Description:
     A module for KLTL formulae.
+    Formulae without K are evaluated on traces of labels (one list of atomic propositions per position). Formulae with K
+    are evaluated on the outputs y_0, ..., y_n that were observed (see ObservedTrace). K phi holds at position i when
+    phi holds at position i of every run of the system that is consistent with the outputs y_0, ..., y_i (and not the
+    later ones): the runs start from the (state, parameter) pairs of the belief after outputs[:i+1] and continue (with
+    the same parameter and any actions) until the end of the trace. Observations that the system can not produce
+    (i.e., an empty belief) give no knowledge, so K phi is False there.
 """
 
 from typing import List, Tuple, Union
 
-from kltl.types import AtomicProposition
+import numpy as np
+
+from kltl.types import AtomicProposition, Output
 
 from kltl.systems.pts.parametric_transition_system import ParametricTransitionSystem
+from kltl.systems.graph_utils import label_letters
+from kltl.systems.pts.belief import BeliefTracker, observation_consistent_beliefs, pair_outputs, pair_successors
 
 # Define Operators
 NextSymbol = 'X'
@@ -31,6 +41,65 @@ class KLTLFormula:
 
 
 
+class ObservedTrace:
+    """
+    ObservedTrace
+    Description:
+        A sequence of observed outputs y_0, ..., y_n of a parametric transition system (and, optionally, the labels of
+        its states), on which formulae with K are evaluated. Slicing it (trace[i:]) keeps the whole history, so the K
+        operators in the suffix still use the belief after outputs[:i+1]. The beliefs are computed once and shared by
+        all of the suffixes. trace[k] is the list of labels at position k of the suffix.
+    """
+    def __init__(
+            self,
+            system: ParametricTransitionSystem,
+            outputs: List[Output],
+            labels: List[List[AtomicProposition]] = None,
+            start: int = 0,
+            beliefs: List[Tuple[np.ndarray, np.ndarray]] = None,
+    ):
+        # Input Processing
+        if labels is not None:
+            assert len(labels) == len(outputs), f"Expected {len(outputs)} lists of labels, but received {len(labels)}!"
+        if beliefs is None:
+            beliefs = [np.nonzero(belief) for belief in observation_consistent_beliefs(system, outputs)]
+
+        self.system = system
+        self.outputs, self.labels, self.start = list(outputs), labels, start
+        self.beliefs = beliefs
+
+    def __len__(self):
+        return len(self.outputs) - self.start
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            assert (key.stop is None) and (key.step is None), f"Only suffixes (trace[i:]) of an observed trace are supported!"
+            start = self.start + (0 if key.start is None else key.start)
+            return ObservedTrace(self.system, self.outputs, self.labels, min(start, len(self.outputs)), self.beliefs)
+
+        position = self.start + key
+        assert (self.labels is not None) and (self.labels[position] is not None), \
+            f"The labels at position {position} of the observed trace are not known (atomic propositions outside of K need them)!"
+        return self.labels[position]
+
+    def belief(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        state_indices, parameter_indices = trace.belief()
+        Description:
+            The (state, parameter) pairs that are consistent with the outputs up to (and including) the first position
+            of the trace.
+        :return:
+        """
+        # Algorithm
+        while len(self.beliefs) <= self.start:
+            tracker = BeliefTracker(self.system)
+            tracker.set_belief(*self.beliefs[-1])
+            tracker.update(y=self.outputs[len(self.beliefs)])
+            self.beliefs.append((tracker.state_indices, tracker.parameter_indices))
+
+        return self.beliefs[self.start]
+
+
 """ Functions """
 def Next(phi: Union[AtomicProposition, KLTLFormula]) -> KLTLFormula:
     return KLTLFormula(NextSymbol, [phi])
@@ -67,28 +136,29 @@ def satisfies_next(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:P
     phis = formula_in.subformulae
             
     for phi in phis:
-        if not eval(phi, trace_in[1:]): return False
+        if not eval(phi, trace_in[1:], system_in): return False
     return True
         
 def satisfies_until(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:ParametricTransitionSystem):
-    assert len(trace_in) >= 2
+    # phi1 U phi2 holds if phi2 holds at some position i >= 0 and phi1 holds at every position before i (the same
+    # non-strict Until as lasso_until in ltl_semantics).
     assert formula_in.ap_or_operator == UntilSymbol, 'KLTL formula must begin with "Until" operator to check for satisfaction thereof'
     
     ap1, ap2 = formula_in.subformulae
 
     for i in range(len(trace_in)):
-        if eval(ap1, trace_in[i:]) and not eval(ap2, trace_in[i:]): continue
-        elif i > 0 and eval(ap2, trace_in[i:]): return True
-        else: return False
+        if eval(ap2, trace_in[i:], system_in): return True
+        elif not eval(ap1, trace_in[i:], system_in): return False
+    return False
             
 def satisfies_always(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:ParametricTransitionSystem):
     assert formula_in.ap_or_operator == AlwaysSymbol, 'KLTL formula must begin with "Always" operator to check for satisfaction thereof'
     
     phis = formula_in.subformulae
     
-    for t in trace_in:
+    for i in range(len(trace_in)):
         for p in phis:
-            if not eval(p, trace_in): return False
+            if not eval(p, trace_in[i:], system_in): return False
     return True
     
 def satisfies_eventually(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:ParametricTransitionSystem):
@@ -99,7 +169,7 @@ def satisfies_eventually(formula_in:KLTLFormula, trace_in:List[List[str]], syste
     
     for i in range(len(trace_in)):
         for phi in phis:
-            if eval(phi, trace_in[i:]): satisfied[phi] = True
+            if eval(phi, trace_in[i:], system_in): satisfied[phi] = True
     return all(satisfied.values())
 
 def satisfies_and(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:ParametricTransitionSystem):
@@ -108,7 +178,7 @@ def satisfies_and(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:Pa
     phis = formula_in.subformulae
     
     for phi in phis:
-        if not eval(phi, trace_in): return False
+        if not eval(phi, trace_in, system_in): return False
     return True
 
 def satisfies_or(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:ParametricTransitionSystem):
@@ -117,37 +187,250 @@ def satisfies_or(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:Par
     phis = formula_in.subformulae
     
     for phi in phis:
-        if eval(phi, trace_in): return True
+        if eval(phi, trace_in, system_in): return True
     return False
 
 def satisfies_not(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:ParametricTransitionSystem):
     assert formula_in.ap_or_operator == NotSymbol, 'KLTL formula must begin with "Not" operator to check for satisfaction thereof'
-    return not eval(formula_in, trace_in)
+    return not eval(formula_in.subformulae[0], trace_in, system_in)
 
-def satisfies_knows(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:ParametricTransitionSystem):
+def satisfies_knows(formula_in:KLTLFormula, trace_in:Union[ObservedTrace, List[Output]], system_in:ParametricTransitionSystem):
+    """
+    satisfies_knows
+    Description:
+        Checks the knowledge operator at the first position i of an observed trace (see the description of this module).
+        The subformulae must hold on every run of the system that starts from the belief after outputs[:i+1]. The runs
+        are not listed (their number grows exponentially with the length of the trace). Instead, the subformulae are
+        labeled backwards over the positions n, ..., i of the graph from knowledge_graph: a node at position j gets the
+        set of truth masks (one bit per subformula, see truth_mask) that the runs through it give at j, which only
+        depends on its own labels and on the sets of its successors. Next is False at the last position of a run.
+    :param formula_in: KLTL formula whose operator is K.
+    :param trace_in: The observed trace (or the list of observed outputs y_0, ..., y_n).
+    :param system_in: The parametric transition system that produced the outputs.
+    :return: True if the subformulae are known to hold at the first position of trace_in.
+    """
     assert formula_in.ap_or_operator == KnowsSymbol, 'KLTL formula must begin with "Knowledge" operator to check for satisfaction thereof'
-    
-    potential_traces = []
-    output_map = {}
-    
-    # Create set of all potential traces
-    for pair in system_in.output_map:
-        y = pair[-1]
-        s = pair[0]
-        if y in output_map: output_map[y].append(s)
-        else: output_map[y] = [s]
-        
-    for y in trace_in:
-        temp = []
-        for s in output_map[y]:
-            for trace in potential_traces:
-                temp.append(trace + [s])
-        potential_traces = temp
-        
-    for trace in potential_traces:
-        if not eval(formula_in.subformulae, trace): return False
+
+    # Input Processing
+    if not isinstance(trace_in, ObservedTrace):
+        trace_in = ObservedTrace(system_in, trace_in)
+
+    if len(trace_in.belief()[0]) == 0:
+        return False
+
+    # Constants
+    closure = subformula_closure(formula_in)
+    root = len(closure) - 1
+    knows_entries = [k for k in range(root) if closure[k][0] == KnowsSymbol]
+    letters, letter_index = label_letters(system_in)
+
+    # Subformulae without temporal operators only depend on the first position of the runs
+    last = trace_in.start
+    if not all(is_state_formula(phi) for phi in formula_in.subformulae):
+        last = len(trace_in.outputs) - 1
+
+    # Algorithm
+    layers = knowledge_graph(trace_in, last, with_outputs=len(knows_entries) > 0)
+
+    next_values = {}
+    for layer in reversed(layers):
+        values = {}
+        for (key, group) in layer.items():
+            successor_masks = {
+                pair: [None] if children is None else set().union(*[next_values[child] for child in children])
+                for (pair, children) in group.items()
+            }
+            knows_bits = {}
+            for k in knows_entries:
+                knows_bits[k] = knows_bit(closure, k, successor_masks, letters, letter_index, knows_bits)
+
+            for ((s_index, theta_index), masks) in successor_masks.items():
+                labels = letters[letter_index[s_index]]
+                values[(key, s_index, theta_index)] = {
+                    truth_mask(closure, labels, next_mask, knows_bits, root) for next_mask in masks
+                }
+        next_values = values
+
+    # The last layer that was labeled (the first position) only contains the belief of the trace
+    return knows_bit(closure, root, successor_masks, letters, letter_index, knows_bits)
+
+def knowledge_graph(trace_in: ObservedTrace, last: int, with_outputs: bool = False) -> List[dict]:
+    """
+    layers = knowledge_graph(trace_in, last, with_outputs)
+    Description:
+        The runs that satisfies_knows quantifies over, as a graph over the positions start, ..., last of the trace
+        (layers[j - start] is position j). layers[j - start][key][(s_index, theta_index)] lists the nodes
+        (key', s_index', theta_index) at position j+1 that follow the pair, or is None if the run ends at position j
+        (because j == last or the state has no successors). If with_outputs is True, then the runs also choose an
+        output of each of their later states, and key identifies the belief after the outputs of the run so far.
+        Every pair of that belief is part of the layer, so that K can be evaluated there. Otherwise, key is None.
+        The first layer contains the pairs of trace_in.belief().
+    :param trace_in: The observed trace.
+    :param last: The last position of the runs.
+    :param with_outputs: If True, then the nodes are also distinguished by the belief of the run.
+    :return: List of dictionaries (one per position).
+    """
+    # Constants
+    system = trace_in.system
+    n_theta = len(system.Theta)
+
+    def pairs(state_indices: np.ndarray, parameter_indices: np.ndarray) -> dict:
+        return {(int(s_index), int(theta_index)): None for (s_index, theta_index) in zip(state_indices, parameter_indices)}
+
+    def belief_key(state_indices: np.ndarray, parameter_indices: np.ndarray) -> Union[bytes, None]:
+        return np.unique(state_indices * n_theta + parameter_indices).tobytes() if with_outputs else None
+
+    # Algorithm
+    first_belief = trace_in.belief()
+    beliefs = {belief_key(*first_belief): first_belief}
+    layers = [{belief_key(*first_belief): pairs(*first_belief)}]
+    updated_keys = {}
+    for _ in range(trace_in.start, last):
+        next_layer = {}
+        for (key, group) in layers[-1].items():
+            for (s_index, theta_index) in group:
+                successor_indices = pair_successors(system, s_index, theta_index)
+                if len(successor_indices) == 0:
+                    continue
+
+                children = []
+                for s_next in successor_indices:
+                    if not with_outputs:
+                        next_layer.setdefault(None, {})[(int(s_next), theta_index)] = None
+                        children.append((None, int(s_next), theta_index))
+                        continue
+
+                    for y_index in pair_outputs(system, s_next, theta_index):
+                        if (key, y_index) not in updated_keys:
+                            tracker = BeliefTracker(system)
+                            tracker.set_belief(*beliefs[key])
+                            tracker.update(y=system.Y[y_index])
+                            next_key = belief_key(tracker.state_indices, tracker.parameter_indices)
+                            beliefs[next_key] = (tracker.state_indices, tracker.parameter_indices)
+                            updated_keys[(key, y_index)] = next_key
+
+                        next_key = updated_keys[(key, y_index)]
+                        if next_key not in next_layer:
+                            next_layer[next_key] = pairs(*beliefs[next_key])
+                        children.append((next_key, int(s_next), theta_index))
+
+                group[(s_index, theta_index)] = children
+
+        layers.append(next_layer)
+
+    return layers
+
+def knows_bit(
+        closure: List[Tuple[str, List[int]]],
+        k: int,
+        successor_masks: dict,
+        letters: List[frozenset],
+        letter_index: np.ndarray,
+        knows_bits: dict,
+) -> bool:
+    """
+    value = knows_bit(closure, k, successor_masks, letters, letter_index, knows_bits)
+    Description:
+        The value of the K operator closure[k] on a belief, given the truth masks of the successors of each of its
+        (state, parameter) pairs (None if the run ends there). The subformulae of K must hold for all of the runs.
+        An empty belief gives no knowledge.
+    """
+    # Constants
+    children = closure[k][1]
+
+    # Algorithm
+    if len(successor_masks) == 0:
+        return False
+
+    for ((s_index, _), masks) in successor_masks.items():
+        labels = letters[letter_index[s_index]]
+        for next_mask in masks:
+            mask = truth_mask(closure, labels, next_mask, knows_bits, k)
+            if not all((mask >> c) & 1 for c in children): return False
     return True
 
+def truth_mask(
+        closure: List[Tuple[str, List[int]]],
+        labels: frozenset,
+        next_mask: Union[int, None],
+        knows_bits: dict,
+        n_entries: int,
+) -> int:
+    """
+    mask = truth_mask(closure, labels, next_mask, knows_bits, n_entries)
+    Description:
+        The truth values of closure[0], ..., closure[n_entries - 1] at a position of a run, as the bits of an integer.
+        They only depend on the labels of the state at that position, on the truth mask of the next position (None if
+        the run ends there) and on the values of the K operators (knows_bits) at that position.
+    """
+    # Algorithm
+    mask = 0
+    for m in range(n_entries):
+        op, children = closure[m]
+        bits = [(mask >> c) & 1 for c in children]
+        next_bit = (next_mask is not None) and (next_mask >> m) & 1
+
+        if op == NotSymbol: value = not bits[0]
+        elif op == AndSymbol: value = all(bits)
+        elif op == OrSymbol: value = any(bits)
+        elif op == NextSymbol: value = (next_mask is not None) and all((next_mask >> c) & 1 for c in children)
+        elif op == UntilSymbol: value = bits[1] or (bits[0] and next_bit)
+        elif op == EventuallySymbol: value = bits[0] or next_bit
+        elif op == AlwaysSymbol: value = all(bits) and ((next_mask is None) or next_bit)
+        elif op == KnowsSymbol: value = knows_bits[m]
+        else: value = op in labels
+
+        mask |= int(bool(value)) << m
+    return mask
+
+def subformula_closure(phi: Union[AtomicProposition, KLTLFormula]) -> List[Tuple[str, List[int]]]:
+    """
+    closure = subformula_closure(phi)
+    Description:
+        The distinct subformulae of phi (with phi last), as (operator or atomic proposition, indices of the subformulae)
+        pairs. Every subformula comes after its own subformulae. Eventually with several subformulae (each of which
+        must eventually hold) becomes an And of Eventually operators, so that each Eventually has one subformula.
+    """
+    # Algorithm
+    closure, indices = [], {}
+
+    def append(entry: Tuple[str, List[int]]) -> int:
+        closure.append(entry)
+        return len(closure) - 1
+
+    def visit(psi: Union[AtomicProposition, KLTLFormula]) -> int:
+        key = psi if type(psi) == str else id(psi)
+        if key not in indices:
+            if type(psi) == str or psi.ap_or_operator not in Symbols:
+                entry = (psi if type(psi) == str else psi.ap_or_operator, [])
+            else:
+                children = [visit(sub) for sub in psi.subformulae]
+                entry = (psi.ap_or_operator, children)
+                if (psi.ap_or_operator == EventuallySymbol) and (len(children) > 1):
+                    entry = (AndSymbol, [append((EventuallySymbol, [c])) for c in children])
+            indices[key] = append(entry)
+        return indices[key]
+
+    visit(phi)
+    return closure
+
+def is_state_formula(phi: Union[AtomicProposition, KLTLFormula]) -> bool:
+    """
+    is_state_formula(phi)
+    Description:
+        True if phi has no temporal operators (so its value at a position only depends on the state and the belief there).
+    """
+    if type(phi) == str:
+        return True
+    if phi.ap_or_operator in [NextSymbol, UntilSymbol, AlwaysSymbol, EventuallySymbol]:
+        return False
+    return all(is_state_formula(sub) for sub in phi.subformulae)
+
+def contains_knows(phi: Union[AtomicProposition, KLTLFormula]) -> bool:
+    if type(phi) == str:
+        return False
+    return (phi.ap_or_operator == KnowsSymbol) or any(contains_knows(sub) for sub in phi.subformulae)
+
 function_map = {
     
     # NextSymbol:satisfies_next,
@@ -170,6 +453,9 @@ def eval(phi, trace_in, system_in:ParametricTransitionSystem):
 
 def kltl_evaluate(formula_in:KLTLFormula, trace_in:List[List[str]], system_in:ParametricTransitionSystem):
     
+    if contains_knows(formula_in) and not isinstance(trace_in, ObservedTrace):
+        trace_in = ObservedTrace(system_in, trace_in)
+    
     ap_or_op = formula_in.ap_or_operator
     sub = formula_in.subformulae
     
@@ -5,6 +5,7 @@ Description:
 """
 
 from typing import List, Tuple, Union
+import numpy as np
 
 from kltl.types import AtomicProposition
 
@@ -17,7 +18,7 @@ AndSymbol = 'A'
 OrSymbol = 'O'
 NotSymbol = 'N'
 
-Symbols = [NextSymbol, UntilSymbol, AlwaysSymbol, EventuallySymbol, AndSymbol, OrSymbol] # Could make this/symbol declarations a dictionary
+Symbols = [NextSymbol, UntilSymbol, AlwaysSymbol, EventuallySymbol, AndSymbol, OrSymbol, NotSymbol] # Could make this/symbol declarations a dictionary
 
 class LTLFormula:
     def __init__(self, ap_or_operator: Union[AtomicProposition, 'LTLFormula'], subformulae: List['LTLFormula'] = []):
@@ -51,6 +52,9 @@ def Or(phi1: Union[AtomicProposition, LTLFormula], phi2: Union[AtomicProposition
     phis.extend(args)
     return LTLFormula(OrSymbol, phis)
 
+def Not(phi: Union[AtomicProposition, LTLFormula]) -> LTLFormula:
+    return LTLFormula(NotSymbol, [phi])
+
 # If we pass a TransitionSystem object to the functions, could check absolute/in-depth satisfaction
 
 def satisfies_next(formula_in:LTLFormula, trace_in:List[List[str]]):
@@ -64,24 +68,25 @@ def satisfies_next(formula_in:LTLFormula, trace_in:List[List[str]]):
     return True
         
 def satisfies_until(formula_in:LTLFormula, trace_in:List[List[str]]):
-    assert len(trace_in) >= 2
+    # phi1 U phi2 holds if phi2 holds at some position i >= 0 and phi1 holds at every position before i (the same
+    # non-strict Until as lasso_until in ltl_semantics).
     assert formula_in.ap_or_operator == UntilSymbol, 'LTL formula must begin with "Until" operator to check for satisfaction thereof'
     
     ap1, ap2 = formula_in.subformulae
 
     for i in range(len(trace_in)):
-        if eval(ap1, trace_in[i:]) and not eval(ap2, trace_in[i:]): continue
-        elif i > 0 and eval(ap2, trace_in[i:]): return True
-        else: return False
+        if eval(ap2, trace_in[i:]): return True
+        elif not eval(ap1, trace_in[i:]): return False
+    return False
             
 def satisfies_always(formula_in:LTLFormula, trace_in:List[List[str]]):
     assert formula_in.ap_or_operator == AlwaysSymbol, 'LTL formula must begin with "Always" operator to check for satisfaction thereof'
     
     phis = formula_in.subformulae
     
-    for t in trace_in:
+    for i in range(len(trace_in)):
         for p in phis:
-            if not eval(p, trace_in): return False
+            if not eval(p, trace_in[i:]): return False
     return True
     
 def satisfies_eventually(formula_in:LTLFormula, trace_in:List[List[str]]):
@@ -115,7 +120,7 @@ def satisfies_or(formula_in:LTLFormula, trace_in:List[List[str]]):
 
 def satisfies_not(formula_in:LTLFormula, trace_in:List[List[str]]):
     assert formula_in.ap_or_operator == NotSymbol, 'LTL formula must begin with "Not" operator to check for satisfaction thereof'
-    return not eval(formula_in, trace_in)
+    return not eval(formula_in.subformulae[0], trace_in)
 
 function_map = {
     
@@ -154,4 +159,114 @@ def evaluate(formula_in:LTLFormula, trace_in:List[List[str]]):
         return function_map[ap_or_op](formula_in, trace_in)
     elif ap_or_op in Symbols and sub != []:
         return function_map[ap_or_op](formula_in, trace_in)
-    
+
+
+""" Ultimately Periodic (Lasso) Words """
+def evaluate_lasso(
+        formula_in: Union[AtomicProposition, LTLFormula],
+        prefix: List[List[AtomicProposition]],
+        suffix: List[List[AtomicProposition]],
+) -> bool:
+    """
+    satisfied = evaluate_lasso(formula_in, prefix, suffix)
+    Description:
+        Evaluates an LTL formula on the infinite word prefix (suffix)^omega, without unrolling the suffix.
+    :param formula_in: The formula.
+    :param prefix: The finite part of the word.
+    :param suffix: The part of the word that repeats forever (nonempty).
+    :return: True if the infinite word satisfies the formula.
+    """
+    return bool(lasso_truth_values(formula_in, prefix, suffix)[0])
+
+def lasso_truth_values(
+        formula_in: Union[AtomicProposition, LTLFormula],
+        prefix: List[List[AtomicProposition]],
+        suffix: List[List[AtomicProposition]],
+) -> np.ndarray:
+    """
+    values = lasso_truth_values(formula_in, prefix, suffix)
+    Description:
+        Computes whether the formula holds at each position of the word prefix (suffix)^omega.
+        Only the positions 0, 1, ..., len(prefix) + len(suffix) - 1 are distinct: the successor of the last position
+        is position len(prefix). Each subformula is evaluated once on all of the positions (backwards, with a
+        fixpoint over the loop for Until), so the cost is O(|formula| * (len(prefix) + len(suffix))).
+    :param formula_in: The formula.
+    :param prefix: The finite part of the word.
+    :param suffix: The part of the word that repeats forever (nonempty).
+    :return: Boolean array with len(prefix) + len(suffix) entries.
+    """
+    # Input Processing
+    assert len(suffix) > 0, f"The repeating suffix of a lasso must be nonempty!"
+
+    if isinstance(formula_in, str):
+        formula_in = LTLFormula(formula_in, [])
+
+    # Constants
+    word = list(prefix) + list(suffix)
+    loop_start, n = len(prefix), len(prefix) + len(suffix)
+    successor = np.append(np.arange(1, n), loop_start)
+
+    ap_or_op = formula_in.ap_or_operator
+    subvalues = [lasso_truth_values(phi, prefix, suffix) for phi in formula_in.subformulae]
+
+    # Algorithm
+    if ap_or_op == NotSymbol:
+        return ~subvalues[0]
+    elif ap_or_op not in Symbols:
+        assert formula_in.subformulae == [], 'LTL formula cannot contain more than one AP without an operator'
+        return np.array([ap_or_op in letter for letter in word], dtype=bool)
+    elif ap_or_op == AndSymbol:
+        return np.all(subvalues, axis=0)
+    elif ap_or_op == OrSymbol:
+        return np.any(subvalues, axis=0)
+    elif ap_or_op == NextSymbol:
+        return np.all(subvalues, axis=0)[successor]
+    elif ap_or_op == AlwaysSymbol:
+        return lasso_always(np.all(subvalues, axis=0), loop_start)
+    elif ap_or_op == EventuallySymbol:
+        # Like satisfies_eventually, every subformula must eventually hold
+        return np.all([~lasso_always(~values, loop_start) for values in subvalues], axis=0)
+    elif ap_or_op == UntilSymbol:
+        return lasso_until(subvalues[0], subvalues[1], loop_start)
+
+    raise ValueError(f"Unrecognized operator {ap_or_op}!")
+
+def lasso_always(values: np.ndarray, loop_start: int) -> np.ndarray:
+    """
+    always_values = lasso_always(values, loop_start)
+    Description:
+        "Always" on a lasso: inside the loop, every position of the loop is visited again, so the formula holds there
+        if and only if it holds on the entire loop. On the prefix, it must also hold at every later prefix position.
+    """
+    # Algorithm
+    always_values = np.zeros(values.shape, dtype=bool)
+    always_values[loop_start:] = np.all(values[loop_start:])
+    always_values[:loop_start] = np.flip(np.logical_and.accumulate(np.flip(values[:loop_start])))
+    always_values[:loop_start] &= always_values[loop_start]
+
+    return always_values
+
+def lasso_until(values1: np.ndarray, values2: np.ndarray, loop_start: int) -> np.ndarray:
+    """
+    until_values = lasso_until(values1, values2, loop_start)
+    Description:
+        "Until" on a lasso, i.e., the least fixpoint of U(i) = values2(i) or (values1(i) and U(successor(i))).
+        Starting from U = values2 on the loop, two backward passes over the loop reach the fixpoint (the first pass
+        fixes U at loop_start, the second pass uses it at the end of the loop). One backward pass over the prefix
+        then finishes the computation.
+    """
+    # Constants
+    n = len(values1)
+
+    # Algorithm
+    until_values = values2.copy()
+    for _ in range(2):
+        for i in range(n - 1, loop_start - 1, -1):
+            next_value = until_values[i + 1] if i + 1 < n else until_values[loop_start]
+            until_values[i] = values2[i] or (values1[i] and next_value)
+
+    for i in range(loop_start - 1, -1, -1):
+        until_values[i] = values2[i] or (values1[i] and until_values[i + 1])
+
+    return until_values
+
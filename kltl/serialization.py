@@ -0,0 +1,263 @@
+"""
+serialization.py
+Description:
+    A compact binary file format for the systems and automata in this package.
+    A file contains:
+        - an 8 byte magic string and the length of the header (uint64),
+        - a JSON header with the class of the object, its (non-array) attributes and a table of array descriptions,
+        - the integer arrays of the object, stored as raw (optionally zlib compressed) buffers aligned to 64 bytes.
+    Every string in the attributes (state names, actions, parameters, ...) is stored once in an interned string table and
+    referenced by its index, which keeps the header small when names are repeated (e.g., in the states of an ATS).
+    Tuples, sets and other non-JSON values are stored with a one-letter tag, so they are restored with the same type.
+    Uncompressed arrays can be memory mapped when the file is loaded.
+"""
+
+import importlib
+import json
+import zlib
+from typing import Any, Dict, List, Type
+import numpy as np
+
+# Constants
+MagicString = b"KLTLSYS1"
+FormatVersion = 1
+BufferAlignment = 64
+
+IgnoredAttributes = ["_index_cache", "_frozen"]
+
+
+class BinarySerializable(object):
+    """
+    BinarySerializable
+    Description:
+        Adds save() and load() to a class whose attributes are lists of names, numpy arrays and simple python values.
+    """
+    def save(self, path: str, compress: bool = False, metadata: Dict[str, Any] = None):
+        """
+        system.save(path, compress=False, metadata=None)
+        Description:
+            Writes the object to path. See save_object.
+        """
+        save_object(self, path, compress=compress, metadata=metadata)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """
+        system = ClassName.load(path, mmap=True)
+        Description:
+            Reads an object of this class from path. See load_object.
+        """
+        return load_object(path, cls=cls, mmap=mmap)
+
+
+def save_object(obj: Any, path: str, compress: bool = False, metadata: Dict[str, Any] = None):
+    """
+    save_object(obj, path, compress=False, metadata=None)
+    Description:
+        Writes every attribute of obj to a binary file. Numpy arrays are written as raw buffers and all other attributes
+        are encoded in the header.
+    :param obj: The object (e.g., a TransitionSystem).
+    :param path: Name of the file.
+    :param compress: If True, then the arrays are compressed with zlib (and can no longer be memory mapped).
+    :param metadata: Extra (JSON-like) values that can be read back with read_metadata.
+    :return:
+    """
+    # Constants
+    if metadata is None:
+        metadata = {}
+    strings, string_indices = [], {}
+
+    # Algorithm
+    attributes, arrays = {}, []
+    for (name, value) in obj.__dict__.items():
+        if name in IgnoredAttributes:
+            continue
+        if isinstance(value, np.ndarray):
+            arrays.append((name, np.ascontiguousarray(value)))
+        else:
+            attributes[name] = encode_value(value, strings, string_indices)
+
+    buffers, array_table, offset = [], {}, 0
+    for (name, array) in arrays:
+        buffer = array.tobytes()
+        if compress:
+            buffer = zlib.compress(buffer)
+        array_table[name] = {
+            "offset": offset, "nbytes": len(buffer), "shape": list(array.shape), "dtype": array.dtype.str,
+        }
+        buffers.append(buffer)
+        offset += aligned_length(len(buffer))
+
+    header = {
+        "version": FormatVersion,
+        "class": [type(obj).__module__, type(obj).__qualname__],
+        "compressed": compress,
+        "strings": strings,
+        "attributes": attributes,
+        "arrays": array_table,
+        "metadata": encode_value(metadata, strings, string_indices),
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(MagicString)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        f.write(b"\0" * (aligned_length(f.tell()) - f.tell()))
+        for buffer in buffers:
+            f.write(buffer)
+            f.write(b"\0" * (aligned_length(len(buffer)) - len(buffer)))
+
+
+def load_object(path: str, cls: Type = None, mmap: bool = True) -> Any:
+    """
+    obj = load_object(path, cls=None, mmap=True)
+    Description:
+        Reads an object that was written with save_object. The object is created without calling its constructor.
+    :param path: Name of the file.
+    :param cls: The class of the object (or one of its base classes). If None, then the saved class is used.
+    :param mmap: If True (and the arrays are not compressed), then the arrays are copy-on-write memory maps of the file.
+    :return:
+    """
+    # Constants
+    header, data_start = read_header(path)
+
+    saved_cls = getattr(importlib.import_module(header["class"][0]), header["class"][1])
+    if cls is None:
+        cls = saved_cls
+    assert issubclass(saved_cls, cls), \
+        f"The file {path} contains a {saved_cls.__name__}, but a {cls.__name__} was requested!"
+
+    strings = header["strings"]
+
+    # Algorithm
+    obj = saved_cls.__new__(saved_cls)
+    for (name, value) in header["attributes"].items():
+        setattr(obj, name, decode_value(value, strings))
+
+    with open(path, "rb") as f:
+        for (name, spec) in header["arrays"].items():
+            shape, dtype = tuple(spec["shape"]), np.dtype(spec["dtype"])
+            if mmap and (not header["compressed"]) and (spec["nbytes"] > 0):
+                array = np.memmap(path, dtype=dtype, mode="c", offset=data_start + spec["offset"], shape=shape)
+            else:
+                f.seek(data_start + spec["offset"])
+                buffer = f.read(spec["nbytes"])
+                if header["compressed"]:
+                    buffer = zlib.decompress(buffer)
+                array = np.frombuffer(buffer, dtype=dtype).reshape(shape).copy()
+            setattr(obj, name, array)
+
+    return obj
+
+
+def read_metadata(path: str) -> Dict[str, Any]:
+    """
+    metadata = read_metadata(path)
+    Description:
+        Reads the metadata that was given to save_object (without loading the object).
+    :param path:
+    :return:
+    """
+    header, _ = read_header(path)
+    return decode_value(header["metadata"], header["strings"])
+
+
+def read_header(path: str):
+    """
+    header, data_start = read_header(path)
+    Description:
+        Reads the header of a file and the position of its first array buffer.
+    :param path:
+    :return:
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(MagicString))
+        assert magic == MagicString, f"The file {path} was not created with save_object!"
+        header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_length).decode("utf-8"))
+
+    assert header["version"] == FormatVersion, \
+        f"File format version {header['version']} is not supported (expected {FormatVersion})!"
+
+    return header, aligned_length(len(MagicString) + 8 + header_length)
+
+
+def aligned_length(n_bytes: int) -> int:
+    return -(-n_bytes // BufferAlignment) * BufferAlignment
+
+
+def encode_value(value: Any, strings: List[str], string_indices: Dict[str, int]) -> Any:
+    """
+    encoded = encode_value(value, strings, string_indices)
+    Description:
+        Converts a value into a JSON-compatible value. Strings are replaced by their index in strings (and added to it
+        if necessary); every other value except lists and None is wrapped in a dictionary with a one-letter tag.
+    :param value:
+    :param strings: The interned string table.
+    :param string_indices: Maps each string in strings to its index.
+    :return:
+    """
+    if isinstance(value, str):
+        if value not in string_indices:
+            string_indices[value] = len(strings)
+            strings.append(value)
+        return string_indices[value]
+    elif value is None:
+        return None
+    elif isinstance(value, (bool, np.bool_)):
+        return {"b": bool(value)}
+    elif isinstance(value, (int, np.integer)):
+        return {"i": int(value)}
+    elif isinstance(value, (float, np.floating)):
+        return {"f": float(value)}
+    elif isinstance(value, list):
+        return [encode_value(element, strings, string_indices) for element in value]
+    elif isinstance(value, tuple):
+        return {"t": [encode_value(element, strings, string_indices) for element in value]}
+    elif isinstance(value, frozenset):
+        return {"z": [encode_value(element, strings, string_indices) for element in value]}
+    elif isinstance(value, set):
+        return {"s": [encode_value(element, strings, string_indices) for element in value]}
+    elif isinstance(value, dict):
+        return {"d": [
+            [encode_value(key, strings, string_indices), encode_value(element, strings, string_indices)]
+            for (key, element) in value.items()
+        ]}
+    elif isinstance(value, np.ndarray):
+        return {"a": [encode_value(element, strings, string_indices) for element in value.tolist()]}
+
+    raise TypeError(f"Values of type {type(value)} can not be serialized!")
+
+
+def decode_value(encoded: Any, strings: List[str]) -> Any:
+    """
+    value = decode_value(encoded, strings)
+    Description:
+        Inverse of encode_value.
+    :param encoded:
+    :param strings: The interned string table.
+    :return:
+    """
+    if isinstance(encoded, int):
+        return strings[encoded]
+    elif encoded is None:
+        return None
+    elif isinstance(encoded, list):
+        return [decode_value(element, strings) for element in encoded]
+
+    (tag, contents), = encoded.items()
+    if tag in ["b", "i", "f"]:
+        return contents
+    elif tag == "t":
+        return tuple(decode_value(element, strings) for element in contents)
+    elif tag == "z":
+        return frozenset(decode_value(element, strings) for element in contents)
+    elif tag == "s":
+        return set(decode_value(element, strings) for element in contents)
+    elif tag == "d":
+        return {decode_value(key, strings): decode_value(element, strings) for (key, element) in contents}
+    elif tag == "a":
+        return np.array(decode_value(contents, strings))
+
+    raise ValueError(f"Unrecognized tag {tag} in encoded value!")
@@ -0,0 +1,7 @@
+from .bdd import BDD, FALSE, TRUE
+from .symbolic_transition_system import ParameterSets, SymbolicTransitionSystem
+
+__all__ = [
+    "BDD", "FALSE", "TRUE",
+    "ParameterSets", "SymbolicTransitionSystem",
+]
@@ -0,0 +1,328 @@
+"""
+bdd.py
+Description:
+    A small reduced ordered binary decision diagram (BDD) package.
+    Nodes are integers: 0 is the constant False, 1 is the constant True and every other node n is the function
+    "if x_{var[n]} then high[n] else low[n]". Variables are ordered by their index (smaller indices are closer to the
+    root). All operations are memoized, so each pair of nodes is only visited once per operation.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List
+import numpy as np
+
+# Constants
+FALSE, TRUE = 0, 1
+TerminalLevel = 2 ** 31
+
+
+class BDD:
+    """
+    BDD
+    Description:
+        A BDD manager. All nodes of the functions that are built with the same manager are shared.
+    """
+    def __init__(self):
+        self.var = [TerminalLevel, TerminalLevel]
+        self.low = [FALSE, TRUE]
+        self.high = [FALSE, TRUE]
+        self.unique_table: Dict[tuple, int] = {}
+        self.n_vars = 0
+
+        self.ite_cache: Dict[tuple, int] = {}
+        self.quantifier_cache: Dict[tuple, int] = {}
+        self.rename_cache: Dict[tuple, int] = {}
+
+    def __len__(self):
+        return len(self.var)
+
+    def add_variables(self, n: int) -> List[int]:
+        """
+        variables = bdd.add_variables(n)
+        Description:
+            Creates n new variables (below all of the existing ones in the order).
+        :param n:
+        :return: The indices of the new variables.
+        """
+        variables = list(range(self.n_vars, self.n_vars + n))
+        self.n_vars += n
+        return variables
+
+    def mk(self, v: int, low: int, high: int) -> int:
+        """
+        node = bdd.mk(v, low, high)
+        Description:
+            Returns the (unique) node for "if x_v then high else low".
+        """
+        if low == high:
+            return low
+
+        key = (v, low, high)
+        node = self.unique_table.get(key)
+        if node is None:
+            node = len(self.var)
+            self.var.append(v)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique_table[key] = node
+
+        return node
+
+    def variable(self, v: int) -> int:
+        assert (v >= 0) and (v < self.n_vars), f"Variable {v} has not been created!"
+        return self.mk(v, FALSE, TRUE)
+
+    def cofactors(self, u: int, v: int):
+        if self.var[u] == v:
+            return self.low[u], self.high[u]
+        return u, u
+
+    # Boolean Operations
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        """
+        node = bdd.ite(f, g, h)
+        Description:
+            If f then g else h.
+        """
+        # Terminal cases
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if (g == TRUE) and (h == FALSE):
+            return f
+
+        key = (f, g, h)
+        result = self.ite_cache.get(key)
+        if result is not None:
+            return result
+
+        # Algorithm
+        v = min(self.var[f], self.var[g], self.var[h])
+        f0, f1 = self.cofactors(f, v)
+        g0, g1 = self.cofactors(g, v)
+        h0, h1 = self.cofactors(h, v)
+        result = self.mk(v, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+
+        self.ite_cache[key] = result
+        return result
+
+    def negate(self, f: int) -> int:
+        return self.ite(f, FALSE, TRUE)
+
+    def conjunction(self, f: int, g: int) -> int:
+        return self.ite(f, g, FALSE)
+
+    def disjunction(self, f: int, g: int) -> int:
+        return self.ite(f, TRUE, g)
+
+    def difference(self, f: int, g: int) -> int:
+        return self.ite(g, FALSE, f)
+
+    def conjunction_of(self, functions: Iterable[int]) -> int:
+        result = TRUE
+        for f in functions:
+            result = self.conjunction(result, f)
+        return result
+
+    def disjunction_of(self, functions: Iterable[int]) -> int:
+        result = FALSE
+        for f in functions:
+            result = self.disjunction(result, f)
+        return result
+
+    # Quantification and Renaming
+
+    def exists(self, f: int, variables: Iterable[int]) -> int:
+        """
+        node = bdd.exists(f, variables)
+        Description:
+            Existentially quantifies the variables in f.
+        """
+        return self.and_exists(f, TRUE, variables)
+
+    def and_exists(self, f: int, g: int, variables: Iterable[int]) -> int:
+        """
+        node = bdd.and_exists(f, g, variables)
+        Description:
+            Computes exists variables. (f and g) without building the conjunction first (the relational product).
+        """
+        variables = frozenset(variables)
+        return self._and_exists(f, g, variables)
+
+    def _and_exists(self, f: int, g: int, variables: FrozenSet[int]) -> int:
+        # Terminal cases
+        if (f == FALSE) or (g == FALSE):
+            return FALSE
+        if (f == TRUE) and (g == TRUE):
+            return TRUE
+        if f > g:
+            f, g = g, f
+
+        key = ("and_exists", f, g, variables)
+        result = self.quantifier_cache.get(key)
+        if result is not None:
+            return result
+
+        # Algorithm
+        v = min(self.var[f], self.var[g])
+        f0, f1 = self.cofactors(f, v)
+        g0, g1 = self.cofactors(g, v)
+        if v in variables:
+            result = self._and_exists(f0, g0, variables)
+            if result != TRUE:
+                result = self.disjunction(result, self._and_exists(f1, g1, variables))
+        else:
+            result = self.mk(v, self._and_exists(f0, g0, variables), self._and_exists(f1, g1, variables))
+
+        self.quantifier_cache[key] = result
+        return result
+
+    def rename(self, f: int, mapping: Dict[int, int]) -> int:
+        """
+        node = bdd.rename(f, mapping)
+        Description:
+            Replaces each variable v in f by the variable mapping[v] (variables that are not in mapping are kept).
+            The mapping does not have to preserve the order of the variables.
+        """
+        mapping_key = tuple(sorted(mapping.items()))
+        return self._rename(f, mapping, mapping_key)
+
+    def _rename(self, f: int, mapping: Dict[int, int], mapping_key: tuple) -> int:
+        if f in (FALSE, TRUE):
+            return f
+
+        key = (f, mapping_key)
+        result = self.rename_cache.get(key)
+        if result is not None:
+            return result
+
+        # Algorithm
+        v = self.var[f]
+        result = self.ite(
+            self.variable(mapping.get(v, v)),
+            self._rename(self.high[f], mapping, mapping_key),
+            self._rename(self.low[f], mapping, mapping_key),
+        )
+
+        self.rename_cache[key] = result
+        return result
+
+    # Conversion to and from integers
+
+    def from_rows(self, variables: List[List[int]], rows: np.ndarray) -> int:
+        """
+        node = bdd.from_rows(variables, rows)
+        Description:
+            Builds the set of integer tuples in rows. Column c of rows is encoded (in binary, most significant bit first)
+            in the variables variables[c]. Variables that do not appear are unconstrained.
+        :param variables: One list of variables per column.
+        :param rows: Nonnegative integer array with one row per element of the set.
+        :return:
+        """
+        # Input Processing
+        rows = np.asarray(rows, dtype=np.int64).reshape((-1, len(variables)))
+
+        # Constants
+        bit_columns = []
+        for (c, column_variables) in enumerate(variables):
+            n_bits = len(column_variables)
+            assert np.all(rows[:, c] < 2 ** n_bits), f"Column {c} does not fit in {n_bits} bits!"
+            for (b, v) in enumerate(column_variables):
+                bit_columns.append((v, (rows[:, c] >> (n_bits - 1 - b)) & 1))
+
+        bit_columns.sort(key=lambda column: column[0])
+        order = [v for (v, _) in bit_columns]
+        bits = np.column_stack([column for (_, column) in bit_columns]) if bit_columns else np.zeros((len(rows), 0))
+        bits = np.unique(bits.astype(np.int8), axis=0)
+
+        # Algorithm
+        def build(row_indices: np.ndarray, level: int) -> int:
+            if len(row_indices) == 0:
+                return FALSE
+            if level == len(order):
+                return TRUE
+            is_one = bits[row_indices, level] == 1
+            return self.mk(order[level], build(row_indices[~is_one], level + 1), build(row_indices[is_one], level + 1))
+
+        return build(np.arange(len(bits)), 0)
+
+    def to_rows(self, f: int, variables: List[List[int]]) -> np.ndarray:
+        """
+        rows = bdd.to_rows(f, variables)
+        Description:
+            Lists the integer tuples in f (the inverse of from_rows). The support of f must be contained in variables.
+        :param f:
+        :param variables: One list of variables per column.
+        :return: Integer array with one row per element of the set (sorted).
+        """
+        # Constants
+        order = sorted(v for column_variables in variables for v in column_variables)
+        position = {v: k for (k, v) in enumerate(order)}
+
+        # Algorithm
+        assignments = []
+
+        def visit(u: int, level: int, assignment: List[int]):
+            if u == FALSE:
+                return
+            if level == len(order):
+                assignments.append(list(assignment))
+                return
+            v = order[level]
+            assert self.var[u] >= v, f"Variable {self.var[u]} of the function is not in variables!"
+            u0, u1 = self.cofactors(u, v)
+            for (value, child) in [(0, u0), (1, u1)]:
+                assignment[position[v]] = value
+                visit(child, level + 1, assignment)
+
+        visit(f, 0, [0] * len(order))
+
+        bits = np.array(assignments, dtype=np.int64).reshape((-1, len(order)))
+        rows = np.zeros((len(bits), len(variables)), dtype=np.int64)
+        for (c, column_variables) in enumerate(variables):
+            for v in column_variables:
+                rows[:, c] = 2 * rows[:, c] + bits[:, position[v]]
+
+        return rows[np.lexsort(rows.T[::-1])] if len(rows) > 0 else rows
+
+    def count(self, f: int, variables: Iterable[int]) -> int:
+        """
+        n = bdd.count(f, variables)
+        Description:
+            The number of assignments of variables that satisfy f (the support of f must be contained in variables).
+        """
+        # Constants
+        order = sorted(variables)
+        position = {v: k for (k, v) in enumerate(order)}
+        memo = {}
+
+        # Algorithm
+        def level_of(u: int) -> int:
+            return len(order) if u in (FALSE, TRUE) else position[self.var[u]]
+
+        def count_from(u: int) -> int:
+            if u == FALSE:
+                return 0
+            if u == TRUE:
+                return 1
+            if u not in memo:
+                memo[u] = sum(
+                    count_from(child) * 2 ** (level_of(child) - level_of(u) - 1)
+                    for child in (self.low[u], self.high[u])
+                )
+            return memo[u]
+
+        return count_from(f) * 2 ** level_of(f)
+
+    def clear_caches(self):
+        """
+        bdd.clear_caches()
+        Description:
+            Frees the memoization tables (the nodes themselves are kept).
+        """
+        self.ite_cache.clear()
+        self.quantifier_cache.clear()
+        self.rename_cache.clear()
@@ -0,0 +1,389 @@
+"""
+symbolic_transition_system.py
+Description:
+    A symbolic representation of transition systems (and of their products with automata) in which sets of states and
+    the transition relation are BDDs. A state is a tuple of integer components (e.g., the index of a state of the
+    system and the index of a parameter or automaton state), each of which is encoded in binary with one "current"
+    and one "next" variable per bit. The current and next variables of each bit are adjacent in the variable order.
+    The ATS of a parametric transition system (pts2ats) is encoded with a belief component that has one variable per
+    parameter (see from_belief_states), so sets of belief states are BDDs as well.
+"""
+
+from typing import Hashable, List, Tuple
+import numpy as np
+
+from kltl.automata import DeterministicRabinAutomaton
+from kltl.systems.graph_utils import label_letters, names_to_indices
+from kltl.systems.ats.adaptive_transition_system import automaton_transitions_by_letter
+from kltl.systems.pts import ParametricTransitionSystem
+from .bdd import BDD, FALSE, TRUE
+
+
+def number_of_bits(n: int) -> int:
+    return max(int(np.ceil(np.log2(max(n, 1)))), 1)
+
+
+class ParameterSets:
+    """
+    ParameterSets
+    Description:
+        The domain of the belief component of SymbolicTransitionSystem.from_belief_states: the value v stands for the
+        list of the parameters Theta[k] whose bit k is set in v (in the order of Theta). Its 2^len(Theta) values are
+        not stored.
+    """
+    def __init__(self, Theta: List[Hashable]):
+        self.Theta = list(Theta)
+
+    def __len__(self):
+        return 2 ** len(self.Theta)
+
+    def __getitem__(self, value: int) -> List[Hashable]:
+        return [theta for (k, theta) in enumerate(self.Theta) if (int(value) >> k) & 1]
+
+    def index(self, eta: List[Hashable]) -> int:
+        return sum(1 << self.Theta.index(theta) for theta in set(eta))
+
+
+class SymbolicTransitionSystem:
+    """
+    SymbolicTransitionSystem
+    Description:
+        A transition system whose states are tuples of integers (one per component) and whose transition relation
+        and initial states are BDDs.
+            components[c]   name of the c-th component (e.g., "S", "Theta" or "Q"),
+            domains[c]      the names of the values of the c-th component (e.g., system.S),
+            current[c]      variables that encode the current value of the c-th component (most significant bit first),
+            next[c]         variables that encode the next value of the c-th component,
+            transitions     BDD over the current, action and next variables,
+            initial         BDD over the current variables.
+        States are labeled by letters (sets of atomic propositions): letters[letter_index[s]] is the letter of every
+        state whose first component is s.
+    """
+    def __init__(
+            self,
+            bdd: BDD,
+            components: List[str],
+            domains: List[List[Hashable]],
+            Act: List[Hashable],
+            letters: list = None,
+            letter_index: np.ndarray = None,
+    ):
+        self.bdd = bdd
+        self.components = components
+        self.domains = domains
+        self.Act = Act
+        self.letters, self.letter_index = letters, letter_index
+
+        self.action_variables = bdd.add_variables(number_of_bits(len(Act)))
+        self.current, self.next = [], []
+        for domain in domains:
+            self.add_component_variables(number_of_bits(len(domain)))
+
+        self.transitions = FALSE
+        self.initial = FALSE
+
+    def add_component_variables(self, n_bits: int):
+        interleaved = self.bdd.add_variables(2 * n_bits)
+        self.current.append(interleaved[0::2])
+        self.next.append(interleaved[1::2])
+
+    # Constructors
+
+    @classmethod
+    def from_transition_system(cls, system, bdd: BDD = None) -> 'SymbolicTransitionSystem':
+        """
+        symbolic_system = SymbolicTransitionSystem.from_transition_system(system)
+        Description:
+            Encodes a TransitionSystem or AdaptiveTransitionSystem (transitions (s, a, s')).
+        :param system:
+        :param bdd: The BDD manager to use (a new one is created if None).
+        :return:
+        """
+        # Constants
+        letters, letter_index = label_letters(system)
+        symbolic_system = cls(BDD() if bdd is None else bdd, ["S"], [system.S], system.Act, letters, letter_index)
+
+        # Algorithm
+        symbolic_system.transitions = symbolic_system.bdd.from_rows(
+            [symbolic_system.current[0], symbolic_system.action_variables, symbolic_system.next[0]],
+            system.transitions,
+        )
+        symbolic_system.initial = symbolic_system.encode(names_to_indices(system, "S", system.I).reshape((-1, 1)))
+
+        return symbolic_system
+
+    @classmethod
+    def from_parametric_transition_system(
+            cls,
+            system: ParametricTransitionSystem,
+            bdd: BDD = None,
+    ) -> 'SymbolicTransitionSystem':
+        """
+        symbolic_system = SymbolicTransitionSystem.from_parametric_transition_system(system)
+        Description:
+            Encodes a parametric transition system as a system whose states are (s, theta) pairs. The parameter never
+            changes, so the reachable states are the (state, parameter) pairs that are consistent with some run.
+        :param system:
+        :param bdd: The BDD manager to use (a new one is created if None).
+        :return:
+        """
+        # Constants
+        letters, letter_index = label_letters(system)
+        symbolic_system = cls(
+            BDD() if bdd is None else bdd, ["S", "Theta"], [system.S, system.Theta], system.Act, letters, letter_index,
+        )
+        (current_S, current_Theta), (next_S, next_Theta) = symbolic_system.current, symbolic_system.next
+
+        # Algorithm
+        s, a, theta, s_prime = system.transitions.T
+        symbolic_system.transitions = symbolic_system.bdd.from_rows(
+            [current_S, current_Theta, symbolic_system.action_variables, next_S, next_Theta],
+            np.column_stack((s, theta, a, s_prime, theta)),
+        )
+
+        I_indices = names_to_indices(system, "S", system.I)
+        symbolic_system.initial = symbolic_system.encode(np.column_stack((
+            np.repeat(I_indices, len(system.Theta)), np.tile(np.arange(len(system.Theta)), len(I_indices)),
+        )))
+
+        return symbolic_system
+
+    @classmethod
+    def from_belief_states(
+            cls,
+            system: ParametricTransitionSystem,
+            bdd: BDD = None,
+    ) -> 'SymbolicTransitionSystem':
+        """
+        symbolic_ats = SymbolicTransitionSystem.from_belief_states(system)
+        Description:
+            The symbolic version of pts2ats: the states are belief states (s, eta), where eta is a set of parameters
+            with one variable eta_k per parameter (see ParameterSets), and (s, eta) -a-> (s', eta') is a transition when
+            eta' is the nonempty set of the parameters theta_k in eta for which (s, a, theta_k, s') is a transition.
+            The transition relation is
+                (OR_k eta'_k) and AND_k (eta'_k <-> (eta_k and T_k(s, a, s'))),
+            where T_k is the transition relation of the system under theta_k, so the belief states are never
+            enumerated. The initial states are (s0, Theta), and the reachable states (see reachable) are the states
+            of pts2ats(system).
+        :param system:
+        :param bdd: The BDD manager to use (a new one is created if None).
+        :return:
+        """
+        # Constants
+        letters, letter_index = label_letters(system)
+        Eta = ParameterSets(system.Theta)
+        symbolic_system = cls(
+            BDD() if bdd is None else bdd, ["S", "Eta"], [system.S, Eta], system.Act, letters, letter_index,
+        )
+        bdd = symbolic_system.bdd
+        (current_S, current_Eta), (next_S, next_Eta) = symbolic_system.current, symbolic_system.next
+        n_theta = len(system.Theta)
+
+        # Algorithm
+        s, a, theta, s_prime = system.transitions.T
+        transitions, nonempty = TRUE, FALSE
+        for k in range(n_theta):
+            # Bit k of eta is the (n_theta - 1 - k)-th variable, since the most significant bit comes first
+            eta_k, eta_prime_k = bdd.variable(current_Eta[n_theta - 1 - k]), bdd.variable(next_Eta[n_theta - 1 - k])
+            T_k = bdd.from_rows(
+                [current_S, symbolic_system.action_variables, next_S], np.column_stack((s, a, s_prime))[theta == k],
+            )
+            kept = bdd.conjunction(eta_k, T_k)
+            transitions = bdd.conjunction(transitions, bdd.ite(eta_prime_k, kept, bdd.negate(kept)))
+            nonempty = bdd.disjunction(nonempty, eta_prime_k)
+
+        symbolic_system.transitions = bdd.conjunction(transitions, nonempty)
+        symbolic_system.initial = symbolic_system.encode(np.column_stack((
+            names_to_indices(system, "S", system.I), np.full(len(system.I), Eta.index(system.Theta)),
+        )))
+
+        return symbolic_system
+
+    # Encoding and Decoding
+
+    def encode(self, rows: np.ndarray) -> int:
+        """
+        X = symbolic_system.encode(rows)
+        Description:
+            The set of states whose components are the rows of the integer array rows.
+        """
+        return self.bdd.from_rows(self.current, rows)
+
+    def decode(self, X: int) -> np.ndarray:
+        """
+        rows = symbolic_system.decode(X)
+        Description:
+            The states in X as an integer array (one row per state, one column per component).
+        """
+        return self.bdd.to_rows(X, self.current)
+
+    def states(self, X: int) -> List[Tuple[Hashable, ...]]:
+        """
+        names = symbolic_system.states(X)
+        Description:
+            The states in X as tuples of names.
+        """
+        return [
+            tuple(domain[value] for (domain, value) in zip(self.domains, row))
+            for row in self.decode(X)
+        ]
+
+    def count(self, X: int) -> int:
+        return self.bdd.count(X, [v for variables in self.current for v in variables])
+
+    def state_space(self) -> int:
+        """
+        X = symbolic_system.state_space()
+        Description:
+            The set of all valid states (the binary encodings that correspond to a value of every component).
+        """
+        return self.bdd.conjunction_of(
+            self.bdd.from_rows([variables], np.arange(len(domain)).reshape((-1, 1)))
+            for (variables, domain) in zip(self.current, self.domains) if len(domain) < 2 ** len(variables)
+        )
+
+    # Image Computation
+
+    def rename_next_to_current(self, X: int) -> int:
+        return self.bdd.rename(X, {
+            v_next: v for (variables, next_variables) in zip(self.current, self.next)
+            for (v, v_next) in zip(variables, next_variables)
+        })
+
+    def rename_current_to_next(self, X: int) -> int:
+        return self.bdd.rename(X, {
+            v: v_next for (variables, next_variables) in zip(self.current, self.next)
+            for (v, v_next) in zip(variables, next_variables)
+        })
+
+    def image(self, X: int, action: Hashable = None) -> int:
+        """
+        post_X = symbolic_system.image(X, action)
+        Description:
+            The states that can be reached from a state in X with one transition (labeled with action, if given).
+        """
+        # Constants
+        transitions = self.transitions
+        if action is not None:
+            transitions = self.bdd.conjunction(transitions, self.encode_action(action))
+        quantified = [v for variables in self.current for v in variables] + self.action_variables
+
+        # Algorithm
+        return self.rename_next_to_current(self.bdd.and_exists(transitions, X, quantified))
+
+    def preimage(self, X: int, action: Hashable = None) -> int:
+        """
+        pre_X = symbolic_system.preimage(X, action)
+        Description:
+            The states that have a transition (labeled with action, if given) into X.
+        """
+        # Constants
+        transitions = self.transitions
+        if action is not None:
+            transitions = self.bdd.conjunction(transitions, self.encode_action(action))
+        quantified = [v for variables in self.next for v in variables] + self.action_variables
+
+        # Algorithm
+        return self.bdd.and_exists(transitions, self.rename_current_to_next(X), quantified)
+
+    def encode_action(self, action: Hashable) -> int:
+        assert action in self.Act, f"Action {action} is not in action space!"
+        return self.bdd.from_rows([self.action_variables], np.array([[self.Act.index(action)]]))
+
+    def reachable(self, X: int = None) -> int:
+        """
+        R = symbolic_system.reachable(X)
+        Description:
+            The states that can be reached from X (the initial states, if X is None), computed as a least fixpoint of
+            image with frontier sets.
+        """
+        # Input Processing
+        if X is None:
+            X = self.initial
+
+        # Algorithm
+        reachable, frontier = X, X
+        while frontier != FALSE:
+            frontier = self.bdd.difference(self.image(frontier), reachable)
+            reachable = self.bdd.disjunction(reachable, frontier)
+
+        return reachable
+
+    def backward_reachable(self, X: int) -> int:
+        """
+        R = symbolic_system.backward_reachable(X)
+        Description:
+            The states from which X can be reached.
+        """
+        reachable, frontier = X, X
+        while frontier != FALSE:
+            frontier = self.bdd.difference(self.preimage(frontier), reachable)
+            reachable = self.bdd.disjunction(reachable, frontier)
+
+        return reachable
+
+    # Products
+
+    def product(self, automaton: DeterministicRabinAutomaton) -> 'SymbolicTransitionSystem':
+        """
+        product_system = symbolic_system.product(automaton)
+        Description:
+            The symbolic version of AdaptiveTransitionSystem.product: the states are the states of this system extended
+            with a component for the automaton state q, and ((x, q), a, (x', p)) is a transition when (x, a, x') is a
+            transition and the automaton moves from q to p when reading the letter of x'. The product relation is
+            computed as exists l. T(x, a, x') and Letter(x', l) and Delta(q, l, p), so neither S x Q nor the product
+            transitions are enumerated.
+        :param automaton:
+        :return:
+        """
+        # Input Processing
+        assert self.letters is not None, f"The labels of the system are needed to compute a product!"
+
+        # Constants
+        bdd = self.bdd
+        product_system = SymbolicTransitionSystem.__new__(SymbolicTransitionSystem)
+        product_system.bdd = bdd
+        product_system.components = self.components + ["Q"]
+        product_system.domains = self.domains + [automaton.Q]
+        product_system.Act = self.Act
+        product_system.letters, product_system.letter_index = self.letters, self.letter_index
+        product_system.action_variables = self.action_variables
+        product_system.current, product_system.next = list(self.current), list(self.next)
+        product_system.add_component_variables(number_of_bits(len(automaton.Q)))
+
+        letter_variables = bdd.add_variables(number_of_bits(len(self.letters)))
+        (current_Q, next_Q) = product_system.current[-1], product_system.next[-1]
+
+        # Letter(x', l) and Delta(q, l, p)
+        next_letter = bdd.from_rows(
+            [self.next[0], letter_variables],
+            np.column_stack((np.arange(len(self.letter_index)), self.letter_index)),
+        )
+        letter_offsets, automaton_transitions = automaton_transitions_by_letter(automaton, self.letters)
+        transition_letters = np.repeat(np.arange(len(self.letters)), np.diff(letter_offsets))
+        delta = bdd.from_rows(
+            [current_Q, letter_variables, next_Q],
+            np.column_stack((
+                automaton.transitions[automaton_transitions, 0], transition_letters,
+                automaton.transitions[automaton_transitions, 2],
+            )),
+        )
+
+        # Algorithm
+        product_system.transitions = bdd.and_exists(
+            bdd.conjunction(self.transitions, next_letter), delta, letter_variables,
+        )
+
+        # The initial states are (x0, p) where the automaton moves from an initial state to p reading x0's letter
+        initial_automaton_states = bdd.from_rows(
+            [current_Q], names_to_indices(automaton, "Q", automaton.Q0).reshape((-1, 1)),
+        )
+        current_letter = self.rename_next_to_current(next_letter)
+        moves = bdd.and_exists(
+            bdd.conjunction(self.initial, current_letter),
+            bdd.conjunction(delta, initial_automaton_states),
+            letter_variables + current_Q,
+        )
+        product_system.initial = bdd.rename(moves, dict(zip(next_Q, current_Q)))
+
+        return product_system
@@ -0,0 +1,11 @@
+from .games import (
+    NoAction, GameArena, game_arena,
+    solve_safety_game, solve_reachability_game, solve_buchi_game, solve_rabin_game,
+    automaton_state_mask, product_rabin_pairs,
+)
+
+__all__ = [
+    "NoAction", "GameArena", "game_arena",
+    "solve_safety_game", "solve_reachability_game", "solve_buchi_game", "solve_rabin_game",
+    "automaton_state_mask", "product_rabin_pairs",
+]
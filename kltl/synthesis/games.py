@@ -0,0 +1,365 @@
+"""
+games.py
+Description:
+    Two player games on the transition systems of this package (e.g., the product of an ATS and a Rabin automaton).
+    In every state the controller picks one of the actions that label an outgoing transition and the environment then
+    picks one of the transitions with that action (for an ATS, this is how the unknown parameter resolves). States
+    without outgoing transitions are losing for the controller, unless they are already in its target.
+    Sets of states are boolean masks over system.S and strategies are memoryless: strategy[s] is the index of the action
+    to take in state s (or -1 when no action is needed or the state is not winning).
+"""
+
+from typing import List, Tuple, Union
+import numpy as np
+
+from kltl.systems.graph_utils import cached_index, compressed_sparse_rows, csr_gather, label_matrix
+
+# Constants
+NoAction = -1
+
+StateSet = Union[np.ndarray, List[int]]
+Solution = Tuple[np.ndarray, np.ndarray]
+
+
+class GameArena:
+    """
+    GameArena
+    Description:
+        The transitions of a system grouped by (state, action) pair.
+            pairs[k]            = s * n_actions + a for the k-th pair that labels at least one transition (sorted),
+            pair_state[k]       = s,
+            pair_action[k]      = a,
+            transition_pair[t]  = the pair of transition t,
+            targets[t]          = the target state of transition t,
+            pair_size[k]        = the number of transitions of the k-th pair.
+        The transitions into each state are also stored as compressed sparse rows (incoming_offsets and
+        incoming_transitions), so the attractors only visit each transition once.
+    """
+    def __init__(self, n_states: int, n_actions: int, transitions: np.ndarray):
+        # Input Processing
+        transitions = np.asarray(transitions, dtype=int).reshape((-1, 3))
+
+        # Algorithm
+        self.n_states, self.n_actions = n_states, n_actions
+        self.pairs, self.transition_pair = np.unique(
+            transitions[:, 0] * n_actions + transitions[:, 1], return_inverse=True,
+        )
+        self.transition_pair = self.transition_pair.reshape(-1)
+        self.pair_state, self.pair_action = self.pairs // n_actions, self.pairs % n_actions
+        self.targets = transitions[:, 2]
+        self.pair_size = np.bincount(self.transition_pair, minlength=len(self.pairs))
+        self.state_n_pairs = np.bincount(self.pair_state, minlength=n_states)
+
+        self.incoming_offsets, self.incoming_transitions = compressed_sparse_rows(
+            self.targets, np.arange(len(transitions)), n_states,
+        )
+
+    def state_mask(self, states: StateSet) -> np.ndarray:
+        """
+        mask = arena.state_mask(states)
+        Description:
+            Converts a boolean mask or a list of state indices into a boolean mask.
+        """
+        states = np.asarray(states)
+        if states.dtype == bool:
+            assert states.shape == (self.n_states,), \
+                f"Expected a mask of {self.n_states} states, but received one with shape {states.shape}!"
+            return states.copy()
+
+        mask = np.zeros((self.n_states,), dtype=bool)
+        mask[states.astype(int)] = True
+        return mask
+
+    def controllable_predecessor(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        cpre_X, action = arena.controllable_predecessor(X)
+        Description:
+            The states that have an action whose successors are all in X. action[s] is the smallest such action (and
+            NoAction if s is not in cpre_X).
+        :param X: Boolean mask.
+        :return:
+        """
+        # Algorithm
+        n_escapes = np.bincount(self.transition_pair[~X[self.targets]], minlength=len(self.pairs))
+        good_pairs = np.flatnonzero(n_escapes == 0)
+
+        states, first = np.unique(self.pair_state[good_pairs], return_index=True)
+        cpre_X = np.zeros((self.n_states,), dtype=bool)
+        cpre_X[states] = True
+        action = np.full((self.n_states,), NoAction, dtype=int)
+        action[states] = self.pair_action[good_pairs[first]]
+
+        return cpre_X, action
+
+    def attractor(self, target: np.ndarray, domain: np.ndarray = None) -> Solution:
+        """
+        A, strategy = arena.attractor(target, domain)
+        Description:
+            The states from which the controller can force the play into target while staying in domain (the least
+            fixpoint of X = target | (domain & CPre(X))), and a strategy that moves each added state into the states
+            that were added before it (the strategy is NoAction on target).
+            Each (state, action) pair keeps a counter of its transitions that do not lead into the attractor. When a
+            layer of states is added, the counters of the transitions into the layer are decremented in one batch and
+            the pairs whose counter reaches zero give the next layer, so every transition is visited once.
+        :param target: Boolean mask.
+        :param domain: Boolean mask (all states if None).
+        :return:
+        """
+        # Input Processing
+        if domain is None:
+            domain = np.ones((self.n_states,), dtype=bool)
+
+        # Constants
+        A = target.copy()
+        strategy = np.full((self.n_states,), NoAction, dtype=int)
+        remaining = self.pair_size - np.bincount(
+            self.transition_pair[A[self.targets]], minlength=len(self.pairs),
+        )
+
+        # Algorithm
+        ready_pairs = np.flatnonzero(remaining == 0)
+        while len(ready_pairs) > 0:
+            # The pairs are sorted, so the first ready pair of each state has its smallest action
+            states, first = np.unique(self.pair_state[ready_pairs], return_index=True)
+            is_new = domain[states] & ~A[states]
+            layer = states[is_new]
+            if len(layer) == 0:
+                break
+            strategy[layer] = self.pair_action[ready_pairs[first[is_new]]]
+            A[layer] = True
+
+            # Decrement the counters of the transitions into the layer
+            incoming, _ = csr_gather(self.incoming_offsets, self.incoming_transitions, layer)
+            decremented_pairs, decrements = np.unique(self.transition_pair[incoming], return_counts=True)
+            remaining[decremented_pairs] -= decrements
+            ready_pairs = decremented_pairs[remaining[decremented_pairs] == 0]
+
+        return A, strategy
+
+    def environment_attractor(self, target: np.ndarray) -> np.ndarray:
+        """
+        A = arena.environment_attractor(target)
+        Description:
+            The states from which the environment can force the play into target (or into a state without outgoing
+            transitions): a state is added when every one of its actions has a transition into the attractor.
+            Each state keeps a counter of its actions that do not have such a transition yet, and the counters are
+            updated in one batch per layer (like attractor).
+        :param target: Boolean mask.
+        :return: Boolean mask.
+        """
+        # Constants
+        A = target | (self.state_n_pairs == 0)
+        is_blocked = np.zeros((len(self.pairs),), dtype=bool)  # the pair has a transition into A
+        remaining = self.state_n_pairs.copy()
+
+        # Algorithm
+        layer = np.flatnonzero(A)
+        while len(layer) > 0:
+            incoming, _ = csr_gather(self.incoming_offsets, self.incoming_transitions, layer)
+            newly_blocked = np.unique(self.transition_pair[incoming])
+            newly_blocked = newly_blocked[~is_blocked[newly_blocked]]
+            is_blocked[newly_blocked] = True
+
+            states, decrements = np.unique(self.pair_state[newly_blocked], return_counts=True)
+            remaining[states] -= decrements
+            layer = states[(remaining[states] == 0) & ~A[states]]
+            A[layer] = True
+
+        return A
+
+
+def game_arena(system) -> GameArena:
+    """
+    arena = game_arena(system)
+    Description:
+        The GameArena of a system with states S, actions Act and transitions (s, a, s'). It is cached on the system.
+    """
+    return cached_index(
+        system, "game_arena", (system.transitions, system.S, system.Act),
+        lambda: GameArena(len(system.S), len(system.Act), system.transitions),
+    )
+
+
+def solve_safety_game(system, safe: StateSet) -> Solution:
+    """
+    winning, strategy = solve_safety_game(system, safe)
+    Description:
+        Finds the states from which the controller can keep the play in safe forever (the greatest fixpoint of
+        X = safe & CPre(X), i.e., the complement of the environment's attractor of the unsafe states) and a strategy
+        that does so.
+    :param system: A TransitionSystem, AdaptiveTransitionSystem or product.
+    :param safe: Boolean mask or indices of the safe states.
+    :return:
+    """
+    # Constants
+    arena = game_arena(system)
+    safe = arena.state_mask(safe)
+
+    # Algorithm
+    winning = ~arena.environment_attractor(~safe)
+    _, action = arena.controllable_predecessor(winning)
+    strategy = np.where(winning, action, NoAction)
+
+    return winning, strategy
+
+
+def solve_reachability_game(system, target: StateSet, safe: StateSet = None) -> Solution:
+    """
+    winning, strategy = solve_reachability_game(system, target, safe)
+    Description:
+        Finds the states from which the controller can force a visit to target while staying in safe until then
+        (reach-while-avoid), and a strategy that does so.
+    :param system: A TransitionSystem, AdaptiveTransitionSystem or product.
+    :param target: Boolean mask or indices of the target states.
+    :param safe: Boolean mask or indices of the states that may be visited before target (all states if None).
+    :return:
+    """
+    # Constants
+    arena = game_arena(system)
+    domain = None if safe is None else arena.state_mask(safe)
+
+    # Algorithm
+    return arena.attractor(arena.state_mask(target), domain)
+
+
+def solve_buchi_game(system, accepting: StateSet) -> Solution:
+    """
+    winning, strategy = solve_buchi_game(system, accepting)
+    Description:
+        Finds the states from which the controller can force infinitely many visits to accepting (the fixpoint
+        Y = Attr(accepting & CPre(Y))), and a strategy that does so: accepting states move back into the winning region
+        and all other states move towards the accepting states.
+    :param system: A TransitionSystem, AdaptiveTransitionSystem or product.
+    :param accepting: Boolean mask or indices of the accepting states.
+    :return:
+    """
+    # Constants
+    arena = game_arena(system)
+    accepting = arena.state_mask(accepting)
+
+    # Algorithm
+    winning = np.ones((arena.n_states,), dtype=bool)
+    while True:
+        cpre_winning, action = arena.controllable_predecessor(winning)
+        recurrent = accepting & cpre_winning
+        next_winning, strategy = arena.attractor(recurrent)
+        if np.array_equal(next_winning, winning):
+            break
+        winning = next_winning
+
+    strategy[recurrent] = action[recurrent]
+
+    return winning, strategy
+
+
+def solve_rabin_game(system, pairs: List[Tuple[StateSet, StateSet]]) -> Solution:
+    """
+    winning, strategy = solve_rabin_game(system, pairs)
+    Description:
+        Finds the states from which the controller can satisfy the Rabin condition given by pairs: for some pair
+        (finite, infinite), the play visits finite only finitely often and infinite infinitely often. Rabin games have
+        memoryless winning strategies for the controller; one is returned.
+        The winning region is computed with the nested fixpoint of Piterman and Pnueli:
+            Win(P, T, D) = mu Z. T | U_{i in P} nu Y. Win(P - i, T | (D & CPre(Z)) | (D_i & infinite_i & CPre(Y)), D_i)
+        where D_i = D - finite_i and Win({}, T, D) is the attractor of T within D. The time is exponential in the number
+        of pairs only.
+    :param system: A TransitionSystem, AdaptiveTransitionSystem or product.
+    :param pairs: List of (finite, infinite) pairs of boolean masks or indices.
+    :return:
+    """
+    # Constants
+    arena = game_arena(system)
+    pairs = [(arena.state_mask(finite), arena.state_mask(infinite)) for (finite, infinite) in pairs]
+
+    # Algorithm
+    return rabin_fixpoint(
+        arena, pairs,
+        np.zeros((arena.n_states,), dtype=bool),
+        np.full((arena.n_states,), NoAction, dtype=int),
+        np.ones((arena.n_states,), dtype=bool),
+    )
+
+
+def rabin_fixpoint(
+        arena: GameArena,
+        pairs: List[Tuple[np.ndarray, np.ndarray]],
+        target: np.ndarray,
+        target_strategy: np.ndarray,
+        domain: np.ndarray,
+) -> Solution:
+    """
+    winning, strategy = rabin_fixpoint(arena, pairs, target, target_strategy, domain)
+    Description:
+        Win(pairs, target, domain) from solve_rabin_game: the states from which the controller can either force the
+        play into target (staying in domain until then) or satisfy the Rabin condition of pairs while staying in domain.
+        The strategy agrees with target_strategy on target. Every other state keeps the action it was given in the
+        iteration of Z in which it was first added, which makes the strategy a winning one.
+    """
+    # Algorithm
+    if len(pairs) == 0:
+        winning, strategy = arena.attractor(target, domain)
+        strategy[target] = target_strategy[target]
+        return winning, strategy
+
+    Z, strategy = target.copy(), target_strategy.copy()
+    changed = True
+    while changed:
+        changed = False
+        for (i, (finite, infinite)) in enumerate(pairs):
+            other_pairs = pairs[:i] + pairs[i + 1:]
+            domain_i = domain & ~finite
+
+            cpre_Z, action_Z = arena.controllable_predecessor(Z)
+            progress = domain & cpre_Z & ~Z
+
+            Y = np.ones((arena.n_states,), dtype=bool)
+            while True:
+                cpre_Y, action_Y = arena.controllable_predecessor(Y)
+                recurrent = domain_i & infinite & cpre_Y & ~Z & ~progress
+
+                inner_target_strategy = strategy.copy()
+                inner_target_strategy[progress] = action_Z[progress]
+                inner_target_strategy[recurrent] = action_Y[recurrent]
+
+                next_Y, Y_strategy = rabin_fixpoint(
+                    arena, other_pairs, Z | progress | recurrent, inner_target_strategy, domain_i,
+                )
+                if np.array_equal(next_Y, Y):
+                    break
+                Y = next_Y
+
+            added = Y & ~Z
+            if np.any(added):
+                strategy[added] = Y_strategy[added]
+                Z |= added
+                changed = True
+
+    return Z, strategy
+
+
+def automaton_state_mask(product_system, automaton_states: List) -> np.ndarray:
+    """
+    mask = automaton_state_mask(product_system, automaton_states)
+    Description:
+        The states of a product (see AdaptiveTransitionSystem.product) whose automaton state is in automaton_states.
+        The automaton state of a product state is its label.
+    """
+    # Constants
+    L_matrix = label_matrix(product_system)
+    ap_indices = [product_system.AP.index(q) for q in automaton_states]
+
+    # Algorithm
+    return np.any(L_matrix[:, ap_indices], axis=1)
+
+
+def product_rabin_pairs(product_system, automaton) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    pairs = product_rabin_pairs(product_system, automaton)
+    Description:
+        The acceptance pairs (F_i, I_i) of the automaton as pairs of masks over the states of the product (F_i must be
+        visited finitely often and I_i infinitely often), ready to be given to solve_rabin_game.
+    """
+    return [
+        (automaton_state_mask(product_system, finite), automaton_state_mask(product_system, infinite))
+        for (finite, infinite) in automaton.F
+    ]
@@ -4,17 +4,21 @@ Description:
     A transition system for the robot motion planning example.
 """
 
-from typing import List, Set, Tuple
+from typing import FrozenSet, List, Set, Tuple
 
 import numpy as np
 
 from kltl.types import Action, AtomicProposition
+from kltl.serialization import BinarySerializable
+from kltl.systems.frozen import FreezableSystem
 from .ats_types import ATSState, ATSTransition
 from kltl.automata import DeterministicRabinAutomaton
+from kltl.systems.graph_utils import cached_index, label_letters, names_to_indices, reachable_state_mask
+from kltl.systems.products import automaton_transitions_by_letter, product_components
 from .. import TransitionSystem
 
 
-class AdaptiveTransitionSystem(object):
+class AdaptiveTransitionSystem(FreezableSystem, BinarySerializable):
     def __init__(
             self,
             S: List[ATSState], Act: List[Action], AP: List[AtomicProposition],
@@ -104,57 +108,82 @@ class AdaptiveTransitionSystem(object):
         # Return
         return [self.AP[ap1] for (s1, ap1) in self.labels if s1 == self.S.index(s)]
 
-    def product(self, automaton: DeterministicRabinAutomaton):
+    def label_letters(self) -> Tuple[List[FrozenSet[AtomicProposition]], np.ndarray]:
+        """
+        letters, letter_index = ats.label_letters()
+        Description:
+            Groups the states by their set of labels. letters contains each distinct set of atomic propositions (i.e.,
+            each letter that the system can produce) and letters[letter_index[k]] is the set of labels of state k.
+            The result is cached on the system, so it is only computed once for many automata.
+        :return:
+        """
+        return label_letters(self)
+
+    def reachable_skeleton(self) -> np.ndarray:
+        """
+        transition_indices = ats.reachable_skeleton()
+        Description:
+            The indices of the transitions that start at a state that is reachable from the initial states.
+            The result is cached on the system.
+        :return:
+        """
+        def compute():
+            reachable = reachable_state_mask(len(self.S), self.transitions, names_to_indices(self, "S", self.I))
+            return np.flatnonzero(reachable[self.transitions[:, 0]])
+
+        return cached_index(self, "reachable_skeleton", (self.transitions, self.S, self.I), compute)
+
+    def precompute_indexes(self):
+        """
+        ats.precompute_indexes()
+        Description:
+            Computes the name maps, the label tables and reachable_skeleton (see FreezableSystem).
+        """
+        super().precompute_indexes()
+        if self.has_arrays("transitions"):
+            self.reachable_skeleton()
+
+    def product(
+            self,
+            automaton: DeterministicRabinAutomaton,
+            letters: Tuple[List[FrozenSet[AtomicProposition]], np.ndarray] = None,
+            reachable_only: bool = False,
+            n_workers: int = 1,
+            shard_size: int = 1 << 18,
+    ):
         """
         product_ts = ts.product(automaton)
         Description:
             Creates the product of the transition system and a NFA.
+            The product state (s, q) has index S.index(s) * len(automaton.Q) + automaton.Q.index(q). For each transition
+            (s, a, t) of the system, the product contains ((s, q), a, (t, p)) for every transition (q, sigma, p) of the
+            automaton whose letter sigma is the set of labels of t.
+            The product transitions are computed as a join on the letters of the system (see label_letters and
+            product_transitions), so the work is proportional to the size of the automaton plus the number of product
+            transitions.
         :param automaton:
+        :param letters: The result of label_letters() (if None, the cached value is used).
+        :param reachable_only: If True, then only the transitions of the system that start at a state that is reachable
+            from the initial states (see reachable_skeleton) are used. The states of the product do not change.
+        :param n_workers: If not 1, then the transitions of the system are split into shards of shard_size transitions
+            that are processed by n_workers worker processes (see sharded_product_transitions); None uses the number of
+            CPUs. Repeated product transitions are then removed.
+        :param shard_size:
         :return:
         """
 
         # Input Processing
         assert isinstance(automaton, DeterministicRabinAutomaton), f"Input {automaton} is not a DeterministicRabinAutomaton!"
 
-        # Create the product's states
-        S_prime = [(s, q) for s in self.S for q in automaton.Q]
-
-        # Create the product's transition relation
-        transitions_prime = np.zeros((0, 3), dtype=int)
-        for (s, act, t_index) in self.transitions:
-            for (q, sigma_index, p) in automaton.transitions:
-                if automaton.Sigma[sigma_index] == set(self.L(self.S[t_index])):
-                    transitions_prime = np.vstack(
-                        (
-                            transitions_prime,
-                            np.array([
-                                S_prime.index((self.S[s], automaton.Q[q])),
-                                act,
-                                S_prime.index((self.S[t_index], automaton.Q[p]))
-                            ]),
-                        )
-                    )
-
-        #transitions_prime = list(set(transitions_prime))  # Make sure there aren't duplicates
-        # Remove disconnected states from Product TODO: Requires careful thought about how indices change in transitions_prime
-        # S_double_prime = [
-        #     (s, q) for (s, q) in S_prime
-        #     if np.any( np.logical_and(transitions_prime[:, 0] == S_prime.index(s), transitions_prime[:, 2] == S_prime.index(s)))
-        # ]
-
-        # Create the initial states of the product
-        I_prime = []
-        for s0 in self.I:
-            for (q0_index, sigma, q_index) in automaton.transitions:
-                if automaton.Q[q0_index] in automaton.Q0 and automaton.Sigma[sigma] == set(self.L(s0)):
-                    I_prime += [(s0, automaton.Q[q_index])]
+        if letters is None:
+            letters = self.label_letters()
 
-        # Create output system
-        ts_out = TransitionSystem(S_prime, self.Act, automaton.Q, I=I_prime, transitions=transitions_prime)
-
-        # Create the labels of the system.
-        for (s, q) in S_prime:
-            ts_out.add_label((s, q), q)
-
-        return ts_out
+        # Algorithm
+        S_prime, I_prime, transitions_prime, labels_prime = product_components(
+            self, automaton, letters, reachable_only=reachable_only, n_workers=n_workers, shard_size=shard_size,
+        )
 
+        # Create output system
+        return TransitionSystem(
+            S_prime, self.Act, automaton.Q, I=I_prime, transitions=transitions_prime, labels=labels_prime,
+        )
@@ -3,65 +3,393 @@ pts_to_ats.py
 Description:
     Defines Algorithm 1 from Sadra's paper.
 """
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
 
 from kltl.systems.pts import ParametricTransitionSystem
 from kltl.systems.pts.pts_types import State, Action, Parameter
+from kltl.systems.pts.belief import BeliefTracker
+from kltl.systems.graph_utils import (
+    compressed_sparse_rows, csr_gather, hashable_name, name_to_index_map, reachable_state_mask,
+)
+from kltl.systems.transport import attach_system, share_system
 from .adaptive_transition_system import AdaptiveTransitionSystem
 
-def pts2ats(system: ParametricTransitionSystem) -> AdaptiveTransitionSystem:
+# Each worker process of construct_ats_in_parallel keeps its copy of the system (and its shared memory blocks) here.
+_worker_state: Dict[str, Any] = {}
+
+def pts2ats(
+    system: ParametricTransitionSystem,
+    antichain: bool = False,
+    n_workers: int = 1,
+    chunk_size: int = 256,
+    deterministic: bool = True,
+) -> AdaptiveTransitionSystem:
     """
     pts2ats
     Description:
         Converts a PTS to an ATS.
     :param system:
+    :param antichain: If True, then only the belief states with maximal parameter sets are kept (see
+        construct_antichain_ats). The result over-approximates the exact ATS.
+    :param n_workers: Number of worker processes. If 1, the belief states are explored in this process; otherwise
+        see construct_ats_in_parallel (None uses the number of CPUs).
+    :param chunk_size: Number of belief states that are sent to a worker at once.
+    :param deterministic: If True, then the parallel construction numbers the states exactly like the sequential one.
     :return:
     """
+    # Input Processing
+    assert (n_workers == 1) or (not antichain), f"The antichain construction can not be run in parallel!"
+
     # Constants
-    Act = system.Act
+    def successors(s: State, eta: List[Parameter], act: Action) -> List[Tuple[State, List[Parameter]]]:
+        return collect_all_successors_that_can_follow_from(system, s, eta, act)
 
-    # Construct new S
-    S_adp_new = [(s, system.Theta) for s in system.I]
-    S_adp = S_adp_new
-    transitions = []
+    # Algorithm
+    if antichain:
+        return construct_antichain_ats(system, successors)
+    if n_workers != 1:
+        return construct_ats_in_parallel(system, n_workers, chunk_size=chunk_size, deterministic=deterministic)
+
+    return construct_ats(system, successors)
+
+def update_ats(
+    previous_ats: AdaptiveTransitionSystem,
+    system: ParametricTransitionSystem,
+    added_transitions: List[Tuple[State, Action, Parameter, State]] = None,
+    added_parameters: List[Parameter] = None,
+) -> AdaptiveTransitionSystem:
+    """
+    ats = update_ats(previous_ats, system, added_transitions, added_parameters)
+    Description:
+        Recomputes the ATS of a PTS after transitions and/or parameters were added to it. system must already contain
+        the additions and previous_ats must be the ATS of the system before they were made. The result is the same as
+        pts2ats(system) (when previous_ats is numbered like pts2ats).
+        Only the belief states whose successors can change are expanded again: the new ones (e.g., those whose eta
+        contains an added parameter) and the (s, eta) of previous_ats such that one of the added transitions starts at
+        s with a parameter in eta. The rows of every other belief state are taken from previous_ats.transitions, one
+        breadth first layer at a time and without a python loop over them, and the states are then numbered in the
+        order in which construct_ats would discover them.
+    :param previous_ats: The ATS of the system before the additions.
+    :param system: The PTS (after the additions).
+    :param added_transitions: The transitions (s, a, theta, s') that were added.
+    :param added_parameters: The parameters that were added to system.Theta.
+    :return:
+    """
+    # Input Processing
+    if added_transitions is None:
+        added_transitions = []
+    if added_parameters is None:
+        added_parameters = []
+
+    for theta in added_parameters:
+        assert theta in system.Theta, f"Parameter {theta} is not in parameter space!"
+    assert list(previous_ats.Act) == list(system.Act), f"The previous ATS has different actions than the system!"
+
+    # Constants
+    affected_parameters = {}  # affected_parameters[s] contains the parameters of the transitions added at s
+    for (s, _, theta, _) in added_transitions:
+        affected_parameters.setdefault(s, set()).add(theta)
+
+    n_previous = len(previous_ats.S)
+    previous_index = name_to_index_map(previous_ats, "S")
+    reused = np.array(
+        [(s not in affected_parameters) or affected_parameters[s].isdisjoint(eta) for (s, eta) in previous_ats.S],
+        dtype=bool,
+    ).reshape((-1,))
+    previous_transitions = previous_ats.transitions.astype(int)
+    offsets, previous_rows = compressed_sparse_rows(previous_transitions[:, 0], previous_transitions, n_previous)
+
+    # The belief states that are not in previous_ats get the ids n_previous, n_previous + 1, ...
+    new_states, new_index = [], {}
+
+    def state_id(s: State, eta: List[Parameter]) -> int:
+        key = hashable_name((s, eta))
+        if key in previous_index:
+            return previous_index[key]
+        if key not in new_index:
+            new_index[key] = n_previous + len(new_states)
+            new_states.append((s, eta))
+        return new_index[key]
+
+    def state(k: int) -> Tuple[State, List[Parameter]]:
+        return previous_ats.S[k] if k < n_previous else new_states[k - n_previous]
+
+    # Algorithm
+    frontier = np.array(list(dict.fromkeys(state_id(s, list(system.Theta)) for s in system.I)), dtype=int)
+    number, order, edges = np.zeros((0,), dtype=int), [], []
+    while len(frontier) > 0:
+        number = np.concatenate([number, np.full((n_previous + len(new_states) - len(number),), -1, dtype=int)])
+        number[frontier] = np.arange(len(order), len(order) + len(frontier))
+        order.extend(frontier)
+
+        # Copy the rows of the reused belief states and expand the others (rows are (position in frontier, a, id))
+        is_reused = frontier < n_previous
+        is_reused[is_reused] = reused[frontier[is_reused]]
+        positions = np.flatnonzero(is_reused)
+        rows, group = csr_gather(offsets, previous_rows, frontier[positions])
+        layer_edges = [np.column_stack([positions[group], rows[:, 1:]]).reshape((-1, 3))]
+        for position in np.flatnonzero(~is_reused):
+            s, eta = state(frontier[position])
+            layer_edges.append(np.array([
+                (position, a_index, state_id(s_prime, eta_prime))
+                for (a_index, act) in enumerate(system.Act)
+                for (s_prime, eta_prime) in collect_all_successors_that_can_follow_from(system, s, eta, act)
+            ], dtype=int).reshape((-1, 3)))
+        layer_edges = np.concatenate(layer_edges)
+        layer_edges = layer_edges[np.argsort(layer_edges[:, 0], kind="stable")]
+        layer_edges[:, 0] = frontier[layer_edges[:, 0]]
+        edges.append(layer_edges)
 
-    # Loop until S_adp_new is empty
-    while len(S_adp_new) > 0:
-        S_adp_new = []
-        for (s, eta) in S_adp:
-            for act in Act:
-                eta_prime = []
-                succ_tuples = collect_all_successors_that_can_follow_from(system, s, eta, act)
+        # The next layer contains the belief states that were not numbered yet, in the order in which they were found
+        number = np.concatenate([number, np.full((n_previous + len(new_states) - len(number),), -1, dtype=int)])
+        targets = layer_edges[:, 2][number[layer_edges[:, 2]] < 0]
+        frontier = targets[np.sort(np.unique(targets, return_index=True)[1])]
 
+    edges = np.concatenate(edges)
+    transitions = np.column_stack([number[edges[:, 0]], edges[:, 1], number[edges[:, 2]]]).reshape((-1, 3))
+    if len(transitions) > 0:
+        transitions = transitions[np.sort(np.unique(transitions, axis=0, return_index=True)[1])]
+
+    S_adp = [state(k) for k in order]
+
+    return AdaptiveTransitionSystem(
+        S_adp, system.Act, system.AP,
+        I=[(s, list(system.Theta)) for s in system.I],
+        transitions=transitions,
+        labels=belief_state_labels(system, S_adp),
+    )
+
+def construct_ats(
+    system: ParametricTransitionSystem,
+    successors: Callable[[State, List[Parameter], Action], List[Tuple[State, List[Parameter]]]],
+) -> AdaptiveTransitionSystem:
+    """
+    ats = construct_ats(system, successors)
+    Description:
+        Explores the belief states (s, eta) that are reachable from the initial states (s0, Theta) of the system.
+        successors(s, eta, a) must return the belief states that can follow (s, eta) when a is taken.
+        States are numbered in the order in which they are discovered and transitions are stored in the order in which
+        they are found.
+    :param system:
+    :param successors:
+    :return:
+    """
+    # Constants
+    Act = system.Act
+
+    # Construct new S (with a copy of Theta, so that later changes to the system do not change the ATS)
+    S_adp = [(s, list(system.Theta)) for s in system.I]
+    state_index = {(s, tuple(eta)): k for (k, (s, eta)) in enumerate(S_adp)}
+    transitions, transition_set = [], set()
+
+    # Visit every state once (S_adp grows as new states are found)
+    for (s, eta) in S_adp:
+        k = state_index[(s, tuple(eta))]
+        for (a_index, act) in enumerate(Act):
+            for (s_prime, eta_prime) in successors(s, eta, act):
                 # Add the novel states to S_adp
-                for (s_prime, eta_prime) in succ_tuples:
-                    if (s_prime, eta_prime) not in S_adp:
-                        S_adp_new.append((s_prime, eta_prime))
-                        S_adp.append((s_prime, eta_prime))
+                key = (s_prime, tuple(eta_prime))
+                if key not in state_index:
+                    state_index[key] = len(S_adp)
+                    S_adp.append((s_prime, eta_prime))
 
                 # Add transitions from this state and action
-                for (s_prime, eta_prime) in succ_tuples:
-                    transitions.append(
-                        ((s, eta), act, (s_prime, eta_prime))
-                    )
+                transition = (k, a_index, state_index[key])
+                if transition not in transition_set:
+                    transition_set.add(transition)
+                    transitions.append(transition)
 
     # When done create system using S_adp
-    ats_out = AdaptiveTransitionSystem(
+    return AdaptiveTransitionSystem(
         S_adp, system.Act, system.AP,
-        I=[(s, system.Theta) for s in system.I],
+        I=[(s, list(system.Theta)) for s in system.I],
+        transitions=np.array(transitions, dtype=int).reshape((-1, 3)),
+        labels=belief_state_labels(system, S_adp),
     )
 
-    # Add transitions
-    for transition in transitions:
-        ats_out.add_transition(transition[0], transition[1], transition[2])
+def construct_ats_in_parallel(
+    system: ParametricTransitionSystem,
+    n_workers: int = None,
+    chunk_size: int = 256,
+    deterministic: bool = True,
+) -> AdaptiveTransitionSystem:
+    """
+    ats = construct_ats_in_parallel(system, n_workers=8)
+    Description:
+        Like construct_ats (with the successors of pts2ats), but the belief states are explored one breadth first layer
+        at a time: the layer is split into chunks of chunk_size belief states, the successors of each chunk (for every
+        action) are computed by a pool of worker processes and this process merges them, numbering the new belief
+        states with the same hashed state index as construct_ats. The system is sent to the workers once, through
+        shared memory (see share_system).
+        If deterministic is True, then the chunks are merged in order, so the states, transitions and labels are
+        exactly those of pts2ats(system). Otherwise each chunk is merged as soon as it is done, which gives the same
+        ATS up to the numbering of the states (and the order of the transitions).
+    :param system:
+    :param n_workers: Number of worker processes (None uses the number of CPUs).
+    :param chunk_size: Number of belief states that are sent to a worker at once.
+    :param deterministic:
+    :return:
+    """
+    # Input Processing
+    assert chunk_size > 0, f"Expected a positive chunk size, but received {chunk_size}!"
 
-    # Add outputs for each state
-    for (s, eta) in S_adp:
-        L_s = system.L(s)
-        if len(L_s) > 0:
-            [ats_out.add_label((s, eta), L_s[k]) for k in range(len(L_s))]
+    # Constants
+    S_adp = [(s, list(system.Theta)) for s in system.I]
+    state_index = {(s, tuple(eta)): k for (k, (s, eta)) in enumerate(S_adp)}
+    transitions, transition_set = [], set()
+
+    def merge(k: int, successors_by_action: List[List[Tuple[State, List[Parameter]]]]):
+        for (a_index, successors) in enumerate(successors_by_action):
+            for (s_prime, eta_prime) in successors:
+                key = (s_prime, tuple(eta_prime))
+                if key not in state_index:
+                    state_index[key] = len(S_adp)
+                    S_adp.append((s_prime, eta_prime))
+
+                transition = (k, a_index, state_index[key])
+                if transition not in transition_set:
+                    transition_set.add(transition)
+                    transitions.append(transition)
+
+    # Algorithm
+    handle, blocks = share_system(system)
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_initialize_worker, initargs=(handle,)) as pool:
+            layer_start = 0
+            while layer_start < len(S_adp):
+                layer_end = len(S_adp)
+                futures = {
+                    pool.submit(_expand_belief_states, S_adp[start:min(start + chunk_size, layer_end)]): start
+                    for start in range(layer_start, layer_end, chunk_size)
+                }
+                for future in (futures if deterministic else as_completed(futures)):
+                    for (offset, successors_by_action) in enumerate(future.result()):
+                        merge(futures[future] + offset, successors_by_action)
+                layer_start = layer_end
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return AdaptiveTransitionSystem(
+        S_adp, system.Act, system.AP,
+        I=[(s, list(system.Theta)) for s in system.I],
+        transitions=np.array(transitions, dtype=int).reshape((-1, 3)),
+        labels=belief_state_labels(system, S_adp),
+    )
+
+def _initialize_worker(handle: Dict[str, Any]):
+    _worker_state["system"], _worker_state["blocks"] = attach_system(handle)
 
-    return ats_out
+def _expand_belief_states(
+    belief_states: List[Tuple[State, List[Parameter]]],
+) -> List[List[List[Tuple[State, List[Parameter]]]]]:
+    system = _worker_state["system"]
+    return [
+        [collect_all_successors_that_can_follow_from(system, s, eta, act) for act in system.Act]
+        for (s, eta) in belief_states
+    ]
+
+def belief_state_labels(system: ParametricTransitionSystem, S_adp: List[Tuple[State, List[Parameter]]]) -> np.ndarray:
+    """
+    labels = belief_state_labels(system, S_adp)
+    Description:
+        The labels of the ATS: each belief state (s, eta) is labeled like s.
+    """
+    labels = []
+    for (k, (s, eta)) in enumerate(S_adp):
+        for ap_index in dict.fromkeys(system.AP.index(ap) for ap in system.L(s)):
+            labels.append((k, ap_index))
+
+    return np.array(labels, dtype=int).reshape((-1, 2))
+
+def construct_antichain_ats(
+    system: ParametricTransitionSystem,
+    successors: Callable[[State, List[Parameter], Action], List[Tuple[State, List[Parameter]]]],
+) -> AdaptiveTransitionSystem:
+    """
+    ats = construct_antichain_ats(system, successors)
+    Description:
+        Like construct_ats, but for each state s of the system only the belief states (s, eta) whose eta is maximal
+        (with respect to inclusion) among the discovered ones are kept:
+        - a new belief state (s, eta) is replaced by a known (s, eta_big) with eta a subset of eta_big,
+        - when a new (s, eta) contains the eta of known belief states, those are replaced by (s, eta) (and their
+          transitions are dropped, because the transitions of (s, eta) include them).
+        Since the successors of (s, eta_big) contain the successors of (s, eta) (with larger parameter sets), every
+        transition ((s, eta), a, (s', eta')) of the exact ATS is matched by a transition ((s, eta_big), a, (s', eta''))
+        with eta' contained in eta''. The result is therefore an over-approximation of the exact ATS that only
+        distinguishes fewer levels of knowledge, and is much smaller when Theta is large.
+    :param system:
+    :param successors:
+    :return:
+    """
+    # Constants
+    Act = system.Act
+
+    S_adp = [(s, list(system.Theta)) for s in system.I]
+    state_index = {(s, tuple(eta)): k for (k, (s, eta)) in enumerate(S_adp)}
+    maximal_states = {}  # maximal_states[s] contains the indices of the maximal belief states of s
+    for (k, (s, eta)) in enumerate(S_adp):
+        maximal_states.setdefault(s, []).append(k)
+    replaced_by = {}
+
+    def representative(k: int) -> int:
+        while k in replaced_by:
+            k = replaced_by[k]
+        return k
+
+    def find_or_add(s_prime: State, eta_prime: List[Parameter]) -> int:
+        key = (s_prime, tuple(eta_prime))
+        if key in state_index:
+            return representative(state_index[key])
+
+        eta_prime_set = set(eta_prime)
+        for k in maximal_states.get(s_prime, []):
+            if eta_prime_set <= set(S_adp[k][1]):
+                return k
+
+        k_new = len(S_adp)
+        state_index[key] = k_new
+        S_adp.append((s_prime, eta_prime))
+
+        smaller_states = [k for k in maximal_states.get(s_prime, []) if set(S_adp[k][1]) < eta_prime_set]
+        for k in smaller_states:
+            replaced_by[k] = k_new
+        maximal_states[s_prime] = [k for k in maximal_states.get(s_prime, []) if k not in replaced_by] + [k_new]
+
+        return k_new
+
+    # Algorithm
+    transitions = []
+    for (k, (s, eta)) in enumerate(S_adp):
+        if k in replaced_by:
+            continue
+        for (a_index, act) in enumerate(Act):
+            for (s_prime, eta_prime) in successors(s, eta, act):
+                transitions.append((k, a_index, find_or_add(s_prime, eta_prime)))
+
+    # Redirect the transitions to the maximal states and remove the states that can no longer be reached
+    transitions = np.array(
+        [(k, a_index, representative(k_prime)) for (k, a_index, k_prime) in transitions if k not in replaced_by],
+        dtype=int,
+    ).reshape((-1, 3))
+    transitions = transitions[np.sort(np.unique(transitions, axis=0, return_index=True)[1])]
+
+    kept = reachable_state_mask(len(S_adp), transitions, np.arange(len(system.I)))
+    new_index = np.cumsum(kept) - 1
+    transitions = transitions[kept[transitions[:, 0]]]
+    transitions[:, 0], transitions[:, 2] = new_index[transitions[:, 0]], new_index[transitions[:, 2]]
+
+    S_kept = [S_adp[k] for k in np.flatnonzero(kept)]
+
+    return AdaptiveTransitionSystem(
+        S_kept, system.Act, system.AP,
+        I=[(s, list(system.Theta)) for s in system.I],
+        transitions=transitions,
+        labels=belief_state_labels(system, S_kept),
+    )
 
 def collect_all_successors_that_can_follow_from(
     system, x: State, eta: List[Parameter], u: Action,
@@ -76,20 +404,6 @@ def collect_all_successors_that_can_follow_from(
     :param u:
     :return:
     """
-    # Setup
-    post_xeta_u = []
-    eta_prime = []
-
-    # Main loop
-    for theta in eta:
-        for s_prime in system.post(x, u, theta):
-            eta_prime = []
-            # Observe all of the thetas (from our current eta) that can explain s_prime
-            for theta_prime in eta:
-                if s_prime in system.post(x, u, theta_prime):
-                    eta_prime.append(theta_prime) if theta_prime not in eta_prime else None
-
-            if (s_prime, eta_prime) not in post_xeta_u:
-                post_xeta_u.append((s_prime, eta_prime))
-
-    return post_xeta_u
+    # Algorithm
+    tracker = BeliefTracker(system, states=[x], Theta=eta)
+    return tracker.successor_beliefs(u)
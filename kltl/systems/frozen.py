@@ -0,0 +1,201 @@
+"""
+frozen.py
+Description:
+    Read-only snapshots of the systems in this package. The systems are built by mutating them (the add_* methods vstack
+    new rows onto their arrays), so analysis that is shared (e.g., between the callers of shared_sadra_system or between
+    threads) runs on a frozen snapshot instead:
+        - its arrays are copies with writeable=False and its attributes can not be replaced,
+        - its name tables (S, Act, AP, I, Y, Theta) are tuples,
+        - its indexes (name maps, label matrix, successor tables, fingerprint, ...) are computed when it is frozen and
+          its index cache is then read-only; other indexes (e.g., sampling tables and game arenas) are cached by each
+          thread (see cached_index), so readers never write to it,
+        - it is hashable and compared by content, and
+        - it is pickled without its indexes.
+"""
+
+from types import MappingProxyType
+from typing import Any, Dict
+
+import numpy as np
+
+from kltl.artifact_cache import fingerprint
+from kltl.serialization import IgnoredAttributes
+from kltl.systems.graph_utils import cached_index, label_letters, label_matrix, name_to_index_map
+
+# Constants
+NameTables = ["S", "Act", "AP", "I", "Y", "Theta"]
+
+
+class FrozenSystemError(AttributeError):
+    pass
+
+
+class FreezableSystem(object):
+    """
+    FreezableSystem
+    Description:
+        Adds freeze() and thaw() to a system. Setting an attribute of a frozen system raises a FrozenSystemError, so the
+        add_* methods fail instead of changing a system that other code is reading.
+        Systems that are not frozen keep the default (identity based) equality and hash.
+    """
+    def __setattr__(self, name: str, value):
+        if self.__dict__.get("_frozen", False):
+            raise FrozenSystemError(f"Can not set {name} of a frozen {type(self).__name__}!")
+        super().__setattr__(name, value)
+
+    @property
+    def frozen(self) -> bool:
+        return self.__dict__.get("_frozen", False)
+
+    def freeze(self):
+        """
+        snapshot = system.freeze()
+        Description:
+            A read-only copy of the system. The arrays of the snapshot are copies with writeable=False, so later changes
+            to the system do not affect it, and the name tables are tuples. Name tables that are the same list in the
+            system (e.g., S and Y of the sadra system) are the same tuple in the snapshot. The indexes of the system
+            are precomputed (see seal_indexes). Freezing a frozen system returns the same object.
+        :return:
+        """
+        # Input Processing
+        if self.frozen:
+            return self
+
+        # Algorithm
+        snapshot = self.__class__.__new__(self.__class__)
+        snapshot.__dict__.update(copy_attributes(self.__dict__, read_only=True))
+        snapshot.__dict__["_frozen"] = True
+        snapshot.seal_indexes()
+
+        return snapshot
+
+    def thaw(self):
+        """
+        builder = system.thaw()
+        Description:
+            A mutable copy of the system (with list name tables and writeable arrays) that can be changed with the add_*
+            methods.
+        :return:
+        """
+        builder = self.__class__.__new__(self.__class__)
+        builder.__dict__.update(copy_attributes(self.__dict__, read_only=False))
+
+        return builder
+
+    def precompute_indexes(self):
+        """
+        system.precompute_indexes()
+        Description:
+            Computes the cached indexes of the system (the maps from names to indices, the label tables and, for frozen
+            systems, the content fingerprint). Subclasses add their own indexes. Indexes of arrays that the system does
+            not have are skipped.
+        """
+        for name in NameTables:
+            if name in self.__dict__:
+                name_to_index_map(self, name)
+
+        if self.has_arrays("labels") and ("AP" in self.__dict__):
+            label_matrix(self)
+            label_letters(self)
+
+        if self.frozen:
+            self.content_fingerprint()
+
+    def seal_indexes(self):
+        """
+        snapshot.seal_indexes()
+        Description:
+            Precomputes the indexes of a frozen system (see precompute_indexes) and makes its index cache read-only.
+            This happens before the system is shared, so the cache is never written while other code reads it; any
+            index that is requested later is cached by the thread that computes it (see cached_index).
+        """
+        # Input Processing
+        assert self.frozen, f"Only the indexes of a frozen {type(self).__name__} can be sealed!"
+
+        # Algorithm
+        cache = dict(self.__dict__.get("_index_cache", {}))
+        self.__dict__["_index_cache"] = cache
+        self.precompute_indexes()
+        self.__dict__["_index_cache"] = MappingProxyType(cache)
+
+    def has_arrays(self, *names: str) -> bool:
+        return all(isinstance(self.__dict__.get(name), np.ndarray) for name in names)
+
+    def fingerprint_attributes(self) -> Dict[str, Any]:
+        """
+        attributes = system.fingerprint_attributes()
+        Description:
+            The attributes that kltl.artifact_cache.fingerprint hashes. The name tables of a frozen system are listed as
+            lists, so a system and its snapshot have the same fingerprint.
+        """
+        return {
+            name: (list(value) if (name in NameTables) and isinstance(value, tuple) else value)
+            for (name, value) in self.__dict__.items()
+        }
+
+    def content_fingerprint(self) -> str:
+        """
+        key = system.content_fingerprint()
+        Description:
+            The fingerprint (see kltl.artifact_cache.fingerprint) of the system. It is cached on frozen systems.
+        """
+        if not self.frozen:
+            return fingerprint(self)
+
+        return cached_index(self, "content_fingerprint", (), lambda: fingerprint(self))
+
+    def __eq__(self, other):
+        if not (self.frozen and isinstance(other, FreezableSystem) and other.frozen):
+            return self is other
+        return (type(self) is type(other)) and (self.content_fingerprint() == other.content_fingerprint())
+
+    def __hash__(self):
+        if not self.frozen:
+            return object.__hash__(self)
+        return int(self.content_fingerprint()[:16], 16)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {name: value for (name, value) in self.__dict__.items() if name != "_index_cache"}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        if self.frozen:
+            for value in self.__dict__.values():
+                if isinstance(value, np.ndarray) and value.flags.writeable:
+                    value.setflags(write=False)
+            self.seal_indexes()
+
+
+def copy_attributes(attributes: Dict[str, Any], read_only: bool) -> Dict[str, Any]:
+    """
+    copied = copy_attributes(attributes, read_only)
+    Description:
+        Copies the arrays and name tables of a system (but not its cached indexes or its frozen flag). If read_only is
+        True, then the arrays can not be written and the name tables become tuples; otherwise they become lists.
+        Attributes that are the same object in attributes are the same object in copied.
+    :param attributes: The __dict__ of a system.
+    :param read_only:
+    :return:
+    """
+    # Constants
+    copies = {}
+
+    # Algorithm
+    copied = {}
+    for (name, value) in attributes.items():
+        if name in IgnoredAttributes:
+            continue
+        if id(value) not in copies:
+            if isinstance(value, np.ndarray):
+                value_copy = np.array(value)
+                value_copy.setflags(write=not read_only)
+            elif (name in NameTables) and isinstance(value, (list, tuple)):
+                value_copy = tuple(value) if read_only else list(value)
+            elif isinstance(value, list):
+                value_copy = list(value)
+            else:
+                value_copy = value
+            copies[id(value)] = value_copy
+        copied[name] = copies[id(value)]
+
+    return copied
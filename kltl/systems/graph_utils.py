@@ -2,10 +2,15 @@
 graph_utils.py
 """
 
-from typing import List, Set, Tuple, Union
+import threading
+import weakref
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Set, Tuple, Union
 
 import numpy as np
 
+# The indexes of frozen systems that were not precomputed, for each thread (see cached_index)
+_thread_index_caches = threading.local()
+
 
 # from . import TransitionSystem, AdaptiveTransitionSystem
 #
@@ -41,3 +46,244 @@ def transition_matrix2adjacency_matrix(system):
     return adjacency_matrix
 
 
+
+
+def compressed_sparse_rows(keys: np.ndarray, values: np.ndarray, n_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    offsets, sorted_values = compressed_sparse_rows(keys, values, n_keys)
+    Description:
+        Groups values by integer key. The values associated with key k are sorted_values[offsets[k]:offsets[k+1]],
+        in the same order in which they appear in values.
+    :param keys: Integer array of keys in [0, n_keys).
+    :param values: Array of values (same length as keys).
+    :param n_keys: Number of possible keys.
+    :return:
+    """
+    # Algorithm
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros((n_keys + 1,), dtype=int)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+
+    return offsets, values[order]
+
+def csr_gather(offsets: np.ndarray, values: np.ndarray, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    gathered, group = csr_gather(offsets, values, keys)
+    Description:
+        Collects the rows of a compressed sparse row table for many keys at once (without a python loop).
+    :param offsets: Offsets array produced by compressed_sparse_rows.
+    :param values: Sorted values produced by compressed_sparse_rows.
+    :param keys: Integer array of the keys whose rows should be collected.
+    :return: gathered contains the concatenation of the rows of each key; group[i] is the position (in keys) of the key
+        that gathered[i] came from.
+    """
+    # Constants
+    starts = offsets[keys]
+    counts = offsets[keys + 1] - starts
+
+    # Algorithm
+    group = np.repeat(np.arange(len(keys)), counts)
+    positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(np.sum(counts))
+
+    return values[positions], group
+
+def cached_index(system, name: str, sources: Tuple[Any, ...], compute: Callable[[], Any]):
+    """
+    index = cached_index(system, name, sources, compute)
+    Description:
+        Returns an index (e.g., a compressed sparse row version of the transitions) that is precomputed from some
+        attributes of the system. The index is recomputed when any of the sources is replaced or changes length, which
+        is what happens when the add_* methods of the systems vstack new rows onto their arrays.
+        The index cache of a frozen system is read-only once the system is published (see
+        FreezableSystem.seal_indexes), so indexes that were not precomputed are stored in a cache of the current thread
+        instead (see thread_index_cache) and readers never write to the shared system.
+    :param system: Any of the systems in this package.
+    :param name: Name under which the index is stored.
+    :param sources: The objects that the index is computed from.
+    :param compute: Function with no arguments that computes the index.
+    :return:
+    """
+    # Constants
+    cache = system.__dict__.setdefault("_index_cache", {})
+    if not isinstance(cache, dict):
+        cache = thread_index_cache(system)
+    source_lengths = tuple(len(src) for src in sources)
+
+    # Algorithm
+    if name in cache:
+        cached_sources, cached_lengths, index = cache[name]
+        if all(src1 is src2 for (src1, src2) in zip(cached_sources, sources)) and (cached_lengths == source_lengths):
+            return index
+
+    index = compute()
+    cache[name] = (sources, source_lengths, index)
+
+    return index
+
+def thread_index_cache(system) -> Dict[str, Any]:
+    """
+    cache = thread_index_cache(system)
+    Description:
+        The indexes of a (frozen) system that the current thread has computed. Each thread has its own dictionary, so
+        threads never write to a dictionary that another thread reads. It is dropped when the system is garbage
+        collected.
+    :param system: Any of the systems in this package.
+    :return:
+    """
+    # Constants
+    caches = _thread_index_caches.__dict__.setdefault("caches", {})
+    key = id(system)
+
+    # Algorithm
+    if (key not in caches) or (caches[key][0]() is not system):
+        caches[key] = (weakref.ref(system, lambda _, key=key: caches.pop(key, None)), {})
+
+    return caches[key][1]
+
+def name_to_index_map(system, attribute: str) -> Dict[Hashable, int]:
+    """
+    index_map = name_to_index_map(system, attribute)
+    Description:
+        Returns a dictionary mapping each element of the list system.<attribute> (e.g., "S", "Act", "Y") to its index.
+        Unlike list.index, each lookup is O(1). The dictionary is cached on the system.
+        Names that are not hashable (e.g., the (s, eta) states of an ATS) are stored under hashable_name(name).
+    :param system: Any of the systems in this package.
+    :param attribute: Name of the list attribute.
+    :return:
+    """
+    names = getattr(system, attribute)
+    return cached_index(
+        system, "index_map_" + attribute, (names,),
+        lambda: {hashable_name(name): index for (index, name) in enumerate(names)},
+    )
+
+def hashable_name(name: Any) -> Hashable:
+    """
+    key = hashable_name(name)
+    Description:
+        Converts the lists in a name (recursively) to tuples and sets to frozensets, so that it can be a dictionary key.
+    """
+    if isinstance(name, (list, tuple)):
+        return tuple(hashable_name(element) for element in name)
+    elif isinstance(name, set):
+        return frozenset(name)
+    return name
+
+def names_to_indices(system, attribute: str, names: List[Hashable]) -> np.ndarray:
+    """
+    indices = names_to_indices(system, attribute, names)
+    Description:
+        Converts a list of names (e.g., a sequence of states) to an int32 array of indices in system.<attribute>.
+    :param system: Any of the systems in this package.
+    :param attribute: Name of the list attribute.
+    :param names: The names to convert.
+    :return:
+    """
+    # Constants
+    index_map = name_to_index_map(system, attribute)
+
+    # Algorithm
+    indices = np.fromiter((index_map.get(hashable_name(name), -1) for name in names), dtype=np.int32, count=len(names))
+    assert np.all(indices >= 0), f"{names[int(np.argmin(indices))]} is not in {attribute}!"
+
+    return indices
+
+def label_matrix(system) -> np.ndarray:
+    """
+    L_matrix = label_matrix(system)
+    Description:
+        Boolean matrix whose (s, ap) entry is True if and only if state index s is labeled with proposition index ap.
+        The labels of many states can then be found with a single gather (L_matrix[state_indices]).
+        The matrix is cached on the system.
+    :param system: Any of the systems in this package.
+    :return: Boolean array of shape (len(system.S), len(system.AP)).
+    """
+    def compute():
+        matrix = np.zeros((len(system.S), len(system.AP)), dtype=bool)
+        matrix[system.labels[:, 0].astype(int), system.labels[:, 1].astype(int)] = True
+        return matrix
+
+    return cached_index(system, "label_matrix", (system.labels, system.S, system.AP), compute)
+
+def label_letters(system) -> Tuple[List[FrozenSet[Hashable]], np.ndarray]:
+    """
+    letters, letter_index = label_letters(system)
+    Description:
+        Groups the states by their set of labels. letters contains each distinct set of atomic propositions (i.e., each
+        letter that the system can produce) and letters[letter_index[k]] is the set of labels of state k.
+        The result is cached on the system.
+    :param system: Any of the systems in this package.
+    :return:
+    """
+    def compute():
+        unique_rows, letter_index = np.unique(label_matrix(system), axis=0, return_inverse=True)
+        letters = [frozenset(system.AP[ap_index] for ap_index in np.flatnonzero(row)) for row in unique_rows]
+        return letters, letter_index.reshape(-1)
+
+    return cached_index(system, "label_letters", (system.labels, system.S, system.AP), compute)
+
+def reachable_state_mask(n_states: int, transitions: np.ndarray, initial_indices: np.ndarray) -> np.ndarray:
+    """
+    reachable = reachable_state_mask(n_states, transitions, initial_indices)
+    Description:
+        Finds the states that can be reached from the initial states (breadth first, one vectorized step per layer).
+    :param n_states: Number of states.
+    :param transitions: Integer array whose rows are (source, action, target).
+    :param initial_indices: Indices of the initial states.
+    :return: Boolean array of length n_states.
+    """
+    # Constants
+    offsets, targets = compressed_sparse_rows(transitions[:, 0].astype(int), transitions[:, -1].astype(int), n_states)
+
+    # Algorithm
+    reachable = np.zeros((n_states,), dtype=bool)
+    frontier = np.unique(np.asarray(initial_indices, dtype=int))
+    reachable[frontier] = True
+    while len(frontier) > 0:
+        successors, _ = csr_gather(offsets, targets, frontier)
+        frontier = np.unique(successors[~reachable[successors]])
+        reachable[frontier] = True
+
+    return reachable
+
+def breadth_first_parents(n_states: int, transitions: np.ndarray, initial_indices: np.ndarray) -> np.ndarray:
+    """
+    parents = breadth_first_parents(n_states, transitions, initial_indices)
+    Description:
+        Builds a breadth first search tree from the initial states (one vectorized step per layer). parents[s] is the
+        state before s on a shortest path from the initial states to s; it is -1 for the initial states and for the
+        states that can not be reached.
+    :param n_states: Number of states.
+    :param transitions: Integer array whose rows are (source, action, target).
+    :param initial_indices: Indices of the initial states.
+    :return: Integer array of length n_states.
+    """
+    # Constants
+    offsets, targets = compressed_sparse_rows(transitions[:, 0].astype(int), transitions[:, -1].astype(int), n_states)
+
+    # Algorithm
+    parents = np.full((n_states,), -1, dtype=int)
+    reachable = np.zeros((n_states,), dtype=bool)
+    frontier = np.unique(np.asarray(initial_indices, dtype=int))
+    reachable[frontier] = True
+    while len(frontier) > 0:
+        successors, group = csr_gather(offsets, targets, frontier)
+        is_new = ~reachable[successors]
+        successors, first = np.unique(successors[is_new], return_index=True)
+        parents[successors] = frontier[group[is_new][first]]
+        reachable[successors] = True
+        frontier = successors
+
+    return parents
+
+def path_from_parents(parents: np.ndarray, target: int) -> List[int]:
+    """
+    path = path_from_parents(parents, target)
+    Description:
+        The path from the root of the search tree of breadth_first_parents to target (both included).
+    """
+    path = [int(target)]
+    while parents[path[-1]] >= 0:
+        path.append(int(parents[path[-1]]))
+
+    return path[::-1]
@@ -0,0 +1,276 @@
+"""
+products.py
+Description:
+    Computes the transitions of the product of a system (with transitions (s, a, t)) and an automaton. The product
+    state (s, q) has index s * n_Q + q, and ((s, q), a, (t, p)) is a transition when (s, a, t) is a transition of the
+    system and the automaton moves from q to p when reading the letter of t (see AdaptiveTransitionSystem.product).
+    The product transitions are a join of the transitions of the system with the transition table of the automaton on
+    the letter of the target state t. The transitions of the system can be split into shards that are processed by a
+    pool of worker processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+import numpy as np
+
+from kltl.automata import DeterministicRabinAutomaton
+from kltl.systems.graph_utils import compressed_sparse_rows, csr_gather, label_letters
+from kltl.systems.transport import attach_system, share_system
+
+# The tables of the automaton that product_transitions needs: letter_offsets, automaton_transitions (see
+# automaton_transitions_by_letter), the automaton's transition array, its number of states and its transition table
+# by letter (see letter_transition_table).
+AutomatonTables = Tuple[np.ndarray, np.ndarray, np.ndarray, int, Optional[np.ndarray]]
+
+# Each worker process keeps its copy of the system (and the shared memory blocks that back it) here.
+_worker_state: Dict[str, Any] = {}
+
+
+def product_components(
+        system,
+        automaton: DeterministicRabinAutomaton,
+        letters: Tuple[List[FrozenSet[Hashable]], np.ndarray] = None,
+        reachable_only: bool = False,
+        n_workers: int = 1,
+        shard_size: int = 1 << 18,
+) -> Tuple[list, list, np.ndarray, np.ndarray]:
+    """
+    S_prime, I_prime, transitions_prime, labels_prime = product_components(system, automaton)
+    Description:
+        The states, initial states, transitions and labels of the product of a system (a TransitionSystem or an
+        AdaptiveTransitionSystem) and an automaton. Each product state (s, q) is labeled with q.
+        See AdaptiveTransitionSystem.product for the parameters.
+    :return:
+    """
+    # Input Processing
+    if letters is None:
+        letters = label_letters(system)
+
+    # Constants
+    letters, letter_index = letters
+    n_Q = len(automaton.Q)
+    tables = automaton_tables(automaton, letters)
+    letter_offsets, automaton_transitions = tables[0], tables[1]
+
+    # Create the product's states
+    S_prime = [(s, q) for s in system.S for q in automaton.Q]
+
+    # Create the product's transition relation
+    if n_workers != 1:
+        transitions_prime = sharded_product_transitions(
+            system, letter_index, tables, reachable_only=reachable_only, n_workers=n_workers, shard_size=shard_size,
+        )
+    else:
+        transitions = system.transitions[system.reachable_skeleton()] if reachable_only else system.transitions
+        transitions_prime = unique_rows_in_order(
+            product_transitions(transitions, letter_index, tables), len(system.S) * n_Q, len(system.Act),
+        )
+
+    # Create the initial states of the product
+    I_prime = []
+    for s0 in system.I:
+        s0_letter = letter_index[system.S.index(s0)]
+        for k in automaton_transitions[letter_offsets[s0_letter]:letter_offsets[s0_letter + 1]]:
+            (q0_index, _, q_index) = automaton.transitions[k]
+            if automaton.Q[q0_index] in automaton.Q0:
+                I_prime += [(s0, automaton.Q[q_index])]
+
+    # Create the labels of the system (each (s, q) is labeled with q).
+    labels_prime = np.column_stack((
+        np.arange(len(S_prime)), np.tile(np.arange(n_Q), len(system.S)),
+    )).astype(int)
+
+    return S_prime, I_prime, transitions_prime, labels_prime
+
+
+def automaton_transitions_by_letter(
+        automaton: DeterministicRabinAutomaton,
+        letters: List[FrozenSet[Hashable]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    letter_offsets, automaton_transitions = automaton_transitions_by_letter(automaton, letters)
+    Description:
+        Groups the transitions of the automaton by letter. The indices of the transitions (q, sigma, p) whose sigma is
+        letters[k] are automaton_transitions[letter_offsets[k]:letter_offsets[k+1]] (in the automaton's order).
+        Transitions whose letter is not in letters are dropped.
+    :param automaton:
+    :param letters: List of distinct sets of atomic propositions.
+    :return:
+    """
+    # Constants
+    letter_codes = {letter: k for (k, letter) in enumerate(letters)}
+    sigma_to_letter = np.array(
+        [letter_codes.get(frozenset(sigma), -1) for sigma in automaton.Sigma], dtype=int,
+    )
+
+    # Algorithm
+    transition_letters = sigma_to_letter[automaton.transitions[:, 1].astype(int)]
+    matching = np.flatnonzero(transition_letters >= 0)
+
+    return compressed_sparse_rows(transition_letters[matching], matching, len(letters))
+
+
+def automaton_tables(automaton: DeterministicRabinAutomaton, letters: List[FrozenSet[Hashable]]) -> AutomatonTables:
+    """
+    tables = automaton_tables(automaton, letters)
+    Description:
+        The tables of the automaton that product_transitions needs (see AutomatonTables).
+    """
+    # Constants
+    letter_offsets, automaton_transitions = automaton_transitions_by_letter(automaton, letters)
+    automaton_table = automaton.transitions.astype(int).reshape((-1, 3))
+
+    return (
+        letter_offsets, automaton_transitions, automaton_table, len(automaton.Q),
+        letter_transition_table(letter_offsets, automaton_transitions, automaton_table, len(automaton.Q)),
+    )
+
+
+def letter_transition_table(
+        letter_offsets: np.ndarray,
+        automaton_transitions: np.ndarray,
+        automaton_table: np.ndarray,
+        n_Q: int,
+) -> Optional[np.ndarray]:
+    """
+    delta = letter_transition_table(letter_offsets, automaton_transitions, automaton_table, n_Q)
+    Description:
+        The transition function of the automaton by letter: delta[q, k] is the state that the automaton moves to from q
+        when it reads letters[k], or -1 if it has no such transition. If the automaton can move to more than one state
+        (i.e., it is not deterministic on these letters), then None is returned.
+    """
+    # Constants
+    n_letters = len(letter_offsets) - 1
+    transition_letters = np.repeat(np.arange(n_letters), np.diff(letter_offsets))
+    q, p = automaton_table[automaton_transitions, 0], automaton_table[automaton_transitions, 2]
+
+    # Algorithm
+    delta = np.full((n_Q, n_letters), -1, dtype=int)
+    delta[q, transition_letters] = p
+    if np.any(delta[q, transition_letters] != p):
+        return None
+
+    return delta
+
+
+def product_transitions(
+        transitions: np.ndarray,
+        letter_index: np.ndarray,
+        automaton_tables: AutomatonTables,
+) -> np.ndarray:
+    """
+    transitions_prime = product_transitions(transitions, letter_index, automaton_tables)
+    Description:
+        The product transitions of the rows (s, a, t) of transitions, grouped by the row of transitions. letter_index[t] is the index of the letter of state t.
+        When the automaton is deterministic on the letters, the product is a join: delta[:, letter_index[t]] gives the
+        successor p of every automaton state q for every transition at once, and the product transitions are the
+        (transition, q) pairs where p exists. Otherwise the automaton's transitions for each letter are gathered from
+        their compressed sparse rows.
+    :param transitions: Integer array whose rows are (s, a, t).
+    :param letter_index: The letter_index of label_letters.
+    :param automaton_tables: See automaton_tables.
+    :return: Integer array whose rows are (s * n_Q + q, a, t * n_Q + p).
+    """
+    # Constants
+    letter_offsets, automaton_transitions, automaton_table, n_Q, delta = automaton_tables
+    transitions = transitions.astype(int).reshape((-1, 3))
+
+    # Algorithm
+    if delta is not None:
+        targets = delta[:, letter_index[transitions[:, 2]]].T
+        rows, q = np.nonzero(targets >= 0)
+        return np.column_stack((
+            transitions[rows, 0] * n_Q + q, transitions[rows, 1], transitions[rows, 2] * n_Q + targets[rows, q],
+        )).reshape((-1, 3))
+
+    automaton_rows, group = csr_gather(letter_offsets, automaton_transitions, letter_index[transitions[:, 2]])
+    return np.column_stack((
+        transitions[group, 0] * n_Q + automaton_table[automaton_rows, 0],
+        transitions[group, 1],
+        transitions[group, 2] * n_Q + automaton_table[automaton_rows, 2],
+    )).astype(int).reshape((-1, 3))
+
+
+def sharded_product_transitions(
+        system,
+        letter_index: np.ndarray,
+        automaton_tables: AutomatonTables,
+        reachable_only: bool = False,
+        n_workers: int = None,
+        shard_size: int = 1 << 18,
+) -> np.ndarray:
+    """
+    transitions_prime = sharded_product_transitions(system, letter_index, automaton_tables, n_workers=8)
+    Description:
+        Computes product_transitions for shards of shard_size transitions of the system in a pool of worker processes.
+        The system is sent to the workers once, through shared memory (see share_system). The product transitions of
+        the shards are concatenated in order and the repeated rows are removed (keeping the first of each), so the
+        result does not depend on n_workers or shard_size.
+    :param system: An AdaptiveTransitionSystem or TransitionSystem.
+    :param letter_index: The letter_index of label_letters. If it is the cached one, the workers read it from shared
+        memory instead of receiving a copy.
+    :param automaton_tables: See product_transitions.
+    :param reachable_only: If True, then only the transitions in system.reachable_skeleton() are used.
+    :param n_workers: Number of worker processes (None uses the number of CPUs).
+    :param shard_size: Maximum number of transitions of the system in each shard.
+    :return:
+    """
+    # Input Processing
+    assert shard_size > 0, f"Expected a positive shard size, but received {shard_size}!"
+
+    # Constants
+    snapshot = system.freeze()
+    n_rows = len(snapshot.reachable_skeleton()) if reachable_only else len(snapshot.transitions)
+    shared_letter_index = np.array_equal(letter_index, label_letters(snapshot)[1])
+    tasks = [(start, min(start + shard_size, n_rows), reachable_only) for start in range(0, n_rows, shard_size)]
+
+    # Algorithm
+    handle, blocks = share_system(snapshot)
+    try:
+        with ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_initialize_worker,
+                initargs=(handle, None if shared_letter_index else letter_index, automaton_tables),
+        ) as pool:
+            shards = list(pool.map(_product_shard, tasks))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    transitions_prime = np.concatenate([np.zeros((0, 3), dtype=int)] + shards)
+
+    return unique_rows_in_order(transitions_prime, len(snapshot.S) * automaton_tables[3], len(snapshot.Act))
+
+
+def unique_rows_in_order(transitions: np.ndarray, n_states: int, n_actions: int) -> np.ndarray:
+    """
+    unique_transitions = unique_rows_in_order(transitions, n_states, n_actions)
+    Description:
+        Removes the repeated rows (s, a, t) of transitions, keeping the first occurrence of each. When the rows fit, they
+        are encoded as single integers (s * n_actions + a) * n_states + t, which is much faster than np.unique with
+        axis=0.
+    """
+    # Algorithm
+    if n_states * n_states * max(n_actions, 1) < np.iinfo(np.int64).max:
+        codes = (transitions[:, 0].astype(np.int64) * n_actions + transitions[:, 1]) * n_states + transitions[:, 2]
+        _, first = np.unique(codes, return_index=True)
+    else:
+        _, first = np.unique(transitions, axis=0, return_index=True)
+
+    return transitions[np.sort(first)]
+
+
+def _initialize_worker(handle: Dict[str, Any], letter_index: np.ndarray, automaton_tables: AutomatonTables):
+    _worker_state["system"], _worker_state["blocks"] = attach_system(handle)
+    _worker_state["letter_index"] = label_letters(_worker_state["system"])[1] if letter_index is None else letter_index
+    _worker_state["automaton_tables"] = automaton_tables
+
+
+def _product_shard(task: Tuple[int, int, bool]) -> np.ndarray:
+    # Constants
+    start, end, reachable_only = task
+    system = _worker_state["system"]
+
+    # Algorithm
+    rows = system.reachable_skeleton()[start:end] if reachable_only else np.arange(start, end)
+    return product_transitions(system.transitions[rows], _worker_state["letter_index"], _worker_state["automaton_tables"])
@@ -1,7 +1,7 @@
 from .parametric_transition_system import ParametricTransitionSystem
-from .trajectory import FiniteTrajectory, InfiniteTrajectory
+from .trajectory import FiniteTrajectory, InfiniteTrajectory, CompactFiniteTrajectory
 
 __all__ = [
     "ParametricTransitionSystem",
-    "FiniteTrajectory", "InfiniteTrajectory",
+    "FiniteTrajectory", "InfiniteTrajectory", "CompactFiniteTrajectory",
 ]
\ No newline at end of file
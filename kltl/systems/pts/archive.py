@@ -0,0 +1,262 @@
+"""
+archive.py
+Description:
+    A binary, columnar, on-disk format for storing a large number of finite trajectories of a parametric transition
+    system. An archive is a directory that contains:
+        header.yaml     - the number of trajectories and the sizes of the system's spaces,
+        states.bin      - the state indices of all trajectories, one after another (int32),
+        actions.bin     - the action indices of all trajectories, one after another (int32),
+        outputs.bin     - the output indices of all trajectories, one after another (int32),
+        parameters.bin  - the parameter index of each trajectory (int32),
+        offsets.bin     - the states of trajectory i are states[offsets[i]:offsets[i+1]] (int64).
+    Trajectory i has offsets[i+1] - offsets[i] states (and outputs) and one fewer action, so its actions are
+    actions[offsets[i] - i:offsets[i+1] - i - 1].
+    Archives are written incrementally (by appending to each column) and are read with np.memmap, so nothing is copied
+    until the trajectories are used.
+"""
+
+import os
+from typing import Iterator, Union
+import numpy as np
+import yaml
+
+from kltl.systems.pts.parametric_transition_system import ParametricTransitionSystem
+from kltl.systems.pts.trajectory import FiniteTrajectory, CompactFiniteTrajectory
+from kltl.systems.pts.sampling import TrajectoryBatch
+
+# Constants
+ArchiveVersion = 1
+HeaderFileName = "header.yaml"
+ColumnTypes = {
+    "states": np.dtype("<i4"),
+    "actions": np.dtype("<i4"),
+    "outputs": np.dtype("<i4"),
+    "parameters": np.dtype("<i4"),
+    "offsets": np.dtype("<i8"),
+}
+
+
+def system_sizes(system: ParametricTransitionSystem) -> dict:
+    return {"S": len(system.S), "Act": len(system.Act), "Y": len(system.Y), "Theta": len(system.Theta)}
+
+
+class TrajectoryArchiveWriter:
+    """
+    TrajectoryArchiveWriter
+    Description:
+        Appends trajectories to an archive (a new archive is created if the directory does not contain one).
+        The header is rewritten by flush() and close(), so readers only ever see complete trajectories.
+        Use as a context manager:
+            with TrajectoryArchiveWriter("rollouts", system) as writer:
+                writer.append_batch(batch)
+    """
+    def __init__(self, path: str, system: ParametricTransitionSystem):
+        # Input Processing
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.system = system
+
+        archive_exists = os.path.exists(os.path.join(path, HeaderFileName))
+        if archive_exists:
+            header = read_archive_header(path)
+            assert header["sizes"] == system_sizes(system), \
+                f"The archive in {path} was created for a system with sizes {header['sizes']}, " + \
+                f"but received a system with sizes {system_sizes(system)}!"
+            self.n_trajectories, self.n_states = header["n_trajectories"], header["n_states"]
+        else:
+            self.n_trajectories, self.n_states = 0, 0
+
+        # Drop anything that was written after the last complete flush
+        self.files = {}
+        column_lengths = {
+            "states": self.n_states, "actions": self.n_states - self.n_trajectories, "outputs": self.n_states,
+            "parameters": self.n_trajectories, "offsets": self.n_trajectories + 1 if archive_exists else 0,
+        }
+        for (name, dtype) in ColumnTypes.items():
+            column_file = open(os.path.join(path, name + ".bin"), "a+b")
+            column_file.truncate(column_lengths[name] * dtype.itemsize)
+            self.files[name] = column_file
+
+        if not archive_exists:
+            self.files["offsets"].write(np.zeros((1,), dtype=ColumnTypes["offsets"]).tobytes())
+
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, trajectory: Union[FiniteTrajectory, CompactFiniteTrajectory]):
+        """
+        writer.append(trajectory)
+        Description:
+            Appends a single trajectory to the archive.
+        :param trajectory:
+        :return:
+        """
+        # Input Processing
+        if isinstance(trajectory, FiniteTrajectory):
+            trajectory = trajectory.compact()
+
+        # Algorithm
+        self.write_columns(
+            trajectory.states, trajectory.actions, trajectory.outputs,
+            np.array([trajectory.param]), np.array([len(trajectory.states)]),
+        )
+
+    def append_batch(self, batch: TrajectoryBatch):
+        """
+        writer.append_batch(batch)
+        Description:
+            Appends every trajectory in a batch to the archive (without looping over the trajectories).
+        :param batch:
+        :return:
+        """
+        # Constants
+        B, n_states = batch.states.shape
+
+        # Algorithm
+        self.write_columns(
+            batch.states.flatten(), batch.actions.flatten(), batch.outputs.flatten(),
+            batch.parameters, np.full((B,), n_states),
+        )
+
+    def write_columns(
+            self,
+            states: np.ndarray,
+            actions: np.ndarray,
+            outputs: np.ndarray,
+            parameters: np.ndarray,
+            lengths: np.ndarray,
+    ):
+        # Input Processing
+        assert not self.closed(), f"The archive writer has already been closed!"
+
+        # Algorithm
+        offsets = self.n_states + np.cumsum(lengths)
+        for (name, column) in [
+            ("states", states), ("actions", actions), ("outputs", outputs), ("parameters", parameters),
+            ("offsets", offsets),
+        ]:
+            self.files[name].write(np.ascontiguousarray(column, dtype=ColumnTypes[name]).tobytes())
+
+        self.n_trajectories += len(lengths)
+        self.n_states = int(offsets[-1])
+
+    def flush(self):
+        """
+        writer.flush()
+        Description:
+            Writes the buffered columns to disk and then updates the header.
+        :return:
+        """
+        # Algorithm
+        for column_file in self.files.values():
+            column_file.flush()
+
+        header = {
+            "version": ArchiveVersion,
+            "n_trajectories": self.n_trajectories,
+            "n_states": self.n_states,
+            "sizes": system_sizes(self.system),
+        }
+        temporary_header_file = os.path.join(self.path, HeaderFileName + ".tmp")
+        with open(temporary_header_file, "w") as f:
+            yaml.safe_dump(header, f)
+        os.replace(temporary_header_file, os.path.join(self.path, HeaderFileName))
+
+    def close(self):
+        if self.closed():
+            return
+        self.flush()
+        for column_file in self.files.values():
+            column_file.close()
+        self.files = {}
+
+    def closed(self) -> bool:
+        return len(self.files) == 0
+
+
+class TrajectoryArchive:
+    """
+    TrajectoryArchive
+    Description:
+        Read-only view of an archive. The columns are memory mapped, so opening an archive does not read the
+        trajectories, and archive[i] is a CompactFiniteTrajectory whose arrays are views of the memory map.
+    """
+    def __init__(self, path: str, system: ParametricTransitionSystem):
+        # Constants
+        header = read_archive_header(path)
+
+        # Input Processing
+        assert header["sizes"] == system_sizes(system), \
+            f"The archive in {path} was created for a system with sizes {header['sizes']}, " + \
+            f"but received a system with sizes {system_sizes(system)}!"
+
+        self.path = path
+        self.system = system
+        self.n_trajectories = header["n_trajectories"]
+
+        # Algorithm
+        n_states = header["n_states"]
+        column_lengths = {
+            "states": n_states, "actions": n_states - self.n_trajectories, "outputs": n_states,
+            "parameters": self.n_trajectories, "offsets": self.n_trajectories + 1,
+        }
+        for (name, dtype) in ColumnTypes.items():
+            setattr(self, name, memory_map_column(os.path.join(path, name + ".bin"), dtype, column_lengths[name]))
+
+    def __len__(self):
+        return self.n_trajectories
+
+    def __getitem__(self, idx: int) -> CompactFiniteTrajectory:
+        # Input Processing
+        assert (idx >= 0) and (idx < len(self)), f"There are only {len(self)} trajectories, but user tried to access {idx}!"
+
+        # Algorithm
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return CompactFiniteTrajectory(
+            self.states[start:end], self.actions[start - idx:end - idx - 1], self.outputs[start:end],
+            int(self.parameters[idx]), self.system,
+        )
+
+    def __iter__(self) -> Iterator[CompactFiniteTrajectory]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def lengths(self) -> np.ndarray:
+        """
+        n_states = archive.lengths()
+        :return: The number of states in each trajectory.
+        """
+        return np.diff(self.offsets)
+
+
+def read_archive_header(path: str) -> dict:
+    """
+    header = read_archive_header(path)
+    Description:
+        Reads (and checks the version of) the header of an archive.
+    :param path: The directory of the archive.
+    :return:
+    """
+    # Input Processing
+    assert os.path.exists(os.path.join(path, HeaderFileName)), f"There is no trajectory archive in {path}!"
+
+    # Algorithm
+    with open(os.path.join(path, HeaderFileName), "r") as f:
+        header = yaml.safe_load(f)
+
+    assert header["version"] == ArchiveVersion, \
+        f"Archive version {header['version']} is not supported (expected {ArchiveVersion})!"
+
+    return header
+
+
+def memory_map_column(file_name: str, dtype: np.dtype, length: int) -> np.ndarray:
+    if length == 0:
+        return np.zeros((0,), dtype=dtype)
+    return np.memmap(file_name, dtype=dtype, mode="r", shape=(length,))
@@ -0,0 +1,275 @@
+"""
+belief.py
+Description:
+    A module for computing the set of (state, parameter) pairs of a parametric transition system that are consistent with
+    a sequence of observed outputs. This is the "knowledge" that the K operator of KLTL reasons about.
+"""
+
+from typing import List, Tuple
+import numpy as np
+
+from kltl.types import State, Action, Output
+from kltl.systems.graph_utils import csr_gather
+from kltl.systems.pts.parametric_transition_system import ParametricTransitionSystem
+from kltl.systems.pts.pts_types import Parameter
+
+
+class BeliefTracker:
+    """
+    BeliefTracker
+    Description:
+        Incrementally maintains the set of (state, parameter) pairs of a parametric transition system that are
+        consistent with the (action, output) history observed so far. Each update only visits the successors of the
+        pairs in the current belief (using the precomputed post relation of the system), so the cost of a step does
+        not depend on the length of the history.
+    """
+    def __init__(
+            self,
+            system: ParametricTransitionSystem,
+            states: List[State] = None,
+            Theta: List[Parameter] = None,
+    ):
+        # Input Processing
+        if states is None:
+            states = system.I if len(system.I) > 0 else system.S
+        if Theta is None:
+            Theta = system.Theta
+
+        for s in states:
+            assert s in system.S, f"State {s} is not in state space!"
+        for theta in Theta:
+            assert theta in system.Theta, f"Parameter {theta} is not in parameter space!"
+
+        self.system = system
+
+        # The belief is stored as two (sorted) arrays of state and parameter indices
+        state_indices = np.array([system.S.index(s) for s in states], dtype=int)
+        parameter_indices = np.array([system.Theta.index(theta) for theta in Theta], dtype=int)
+        self.set_belief(
+            np.repeat(state_indices, len(parameter_indices)),
+            np.tile(parameter_indices, len(state_indices)),
+        )
+
+    def set_belief(self, state_indices: np.ndarray, parameter_indices: np.ndarray):
+        """
+        tracker.set_belief(state_indices, parameter_indices)
+        Description:
+            Replaces the belief with the (state index, parameter index) pairs given (duplicates are removed).
+        :param state_indices:
+        :param parameter_indices:
+        :return:
+        """
+        # Constants
+        n_theta = len(self.system.Theta)
+
+        # Algorithm
+        pair_codes = np.unique(state_indices * n_theta + parameter_indices)
+        self.state_indices, self.parameter_indices = pair_codes // n_theta, pair_codes % n_theta
+
+    def observe(self, y: Output):
+        """
+        tracker.observe(y)
+        Description:
+            Removes the (state, parameter) pairs from the belief that can not produce the output y.
+        :param y: The observed output.
+        :return:
+        """
+        # Input Processing
+        assert y in self.system.Y, f"Output {y} is not in the output space!"
+
+        # Algorithm
+        consistent = self.output_is_consistent(self.state_indices, self.parameter_indices, self.system.Y.index(y))
+        self.state_indices = self.state_indices[consistent]
+        self.parameter_indices = self.parameter_indices[consistent]
+
+    def update(self, a: Action = None, y: Output = None):
+        """
+        tracker.update(a, y)
+        Description:
+            Moves the belief forward by one transition.
+        :param a: The action that was taken. If None, then all actions are considered.
+        :param y: The output observed after the transition. If None, then no output is used to filter the belief.
+        :return:
+        """
+        # Algorithm
+        successor_indices, successor_parameters = self.propagate(a)
+        self.set_belief(successor_indices, successor_parameters)
+
+        if y is not None:
+            self.observe(y)
+
+    def propagate(self, a: Action = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        successor_indices, successor_parameters = tracker.propagate(a)
+        Description:
+            Collects the successors of every (state, parameter) pair in the belief. The pairs are returned in the
+            order of the belief and (for each pair) in the order in which the transitions were added to the system.
+        :param a: The action that was taken. If None, then all actions are considered.
+        :return:
+        """
+        # Input Processing
+        assert (a in self.system.Act) or (a is None), f"Action {a} is not in action space!"
+
+        # Constants
+        n_act, n_theta = len(self.system.Act), len(self.system.Theta)
+        offsets, successors = self.system.successor_csr()
+        action_indices = np.arange(n_act) if a is None else np.array([self.system.Act.index(a)])
+
+        # Algorithm
+        keys = (self.state_indices[:, None] * n_act + action_indices[None, :]) * n_theta + self.parameter_indices[:, None]
+        successor_indices, group = csr_gather(offsets, successors, keys.flatten())
+        successor_parameters = np.repeat(self.parameter_indices, len(action_indices))[group]
+
+        return successor_indices, successor_parameters
+
+    def successor_beliefs(self, a: Action) -> List[Tuple[State, List[Parameter]]]:
+        """
+        succ = tracker.successor_beliefs(a)
+        Description:
+            Splits the belief that results from taking action a according to the next state that is observed.
+            For each possible next state s', the parameters of the belief that could have led to s' are collected.
+        :param a: The action that is taken.
+        :return: List of (s', eta') pairs in the order in which the successors are first encountered.
+        """
+        # Constants
+        n_theta = len(self.system.Theta)
+
+        # Algorithm
+        successor_indices, successor_parameters = self.propagate(a)
+
+        # Group the distinct (successor, parameter) pairs by successor in one sort
+        s_prime_indices, first_occurrence, group = np.unique(successor_indices, return_index=True, return_inverse=True)
+        pair_codes = np.unique(group.reshape(-1) * n_theta + successor_parameters)
+        group_starts = np.searchsorted(pair_codes // n_theta, np.arange(1, len(s_prime_indices)))
+        eta_primes = np.split(pair_codes % n_theta, group_starts)
+
+        successor_beliefs = []
+        for k in np.argsort(first_occurrence):
+            successor_beliefs.append(
+                (self.system.S[s_prime_indices[k]], [self.system.Theta[theta_index] for theta_index in eta_primes[k]])
+            )
+
+        return successor_beliefs
+
+    def output_is_consistent(self, state_indices: np.ndarray, parameter_indices: np.ndarray, y_index: int) -> np.ndarray:
+        """
+        consistent = tracker.output_is_consistent(state_indices, parameter_indices, y_index)
+        Description:
+            Checks (for many pairs at once) whether the output with index y_index can be produced by each
+            (state, parameter) pair.
+        :return: Boolean array.
+        """
+        # Constants
+        output_codes = self.system.output_codes()
+
+        # Algorithm
+        codes = (state_indices * len(self.system.Theta) + parameter_indices) * len(self.system.Y) + y_index
+        if len(output_codes) == 0:
+            return np.zeros(codes.shape, dtype=bool)
+
+        positions = np.minimum(np.searchsorted(output_codes, codes), len(output_codes) - 1)
+        return output_codes[positions] == codes
+
+    def states(self) -> List[State]:
+        """
+        S_consistent = tracker.states()
+        Description:
+            The states that are consistent with the observations.
+        :return:
+        """
+        return [self.system.S[s_index] for s_index in np.unique(self.state_indices)]
+
+    def parameters(self) -> List[Parameter]:
+        """
+        Theta_consistent = tracker.parameters()
+        Description:
+            The parameters that are consistent with the observations.
+        :return:
+        """
+        return [self.system.Theta[theta_index] for theta_index in np.unique(self.parameter_indices)]
+
+    def as_matrix(self) -> np.ndarray:
+        """
+        belief = tracker.as_matrix()
+        :return: Boolean array of shape (len(system.S), len(system.Theta)).
+        """
+        belief = np.zeros((len(self.system.S), len(self.system.Theta)), dtype=bool)
+        belief[self.state_indices, self.parameter_indices] = True
+        return belief
+
+    def __len__(self):
+        return len(self.state_indices)
+
+
+def observation_consistent_beliefs(
+        system: ParametricTransitionSystem,
+        outputs: List[Output],
+        actions: List[Action] = None,
+) -> List[np.ndarray]:
+    """
+    beliefs = observation_consistent_beliefs(system, outputs, actions)
+    Description:
+        Filters the belief forward along a sequence of observed outputs. The k-th element of beliefs contains the
+        (state, parameter) pairs that are consistent with outputs[:k+1] (and actions[:k], if given).
+        The cost is linear in the number of observations, instead of the number of consistent state sequences.
+    :param system: The parametric transition system.
+    :param outputs: The observed outputs y_0, y_1, ..., y_n.
+    :param actions: The actions a_0, ..., a_{n-1} (optional).
+    :return: List of boolean arrays of shape (len(system.S), len(system.Theta)).
+    """
+    # Input Processing
+    assert len(outputs) > 0, f"At least one output must be observed!"
+    if actions is not None:
+        assert len(actions) == len(outputs) - 1, \
+            f"Expected {len(outputs) - 1} actions for {len(outputs)} outputs, but received {len(actions)}!"
+
+    # Algorithm
+    tracker = BeliefTracker(system)
+    tracker.observe(outputs[0])
+    beliefs = [tracker.as_matrix()]
+    for k in range(1, len(outputs)):
+        tracker.update(None if actions is None else actions[k - 1], outputs[k])
+        beliefs.append(tracker.as_matrix())
+
+    return beliefs
+
+
+def pair_successors(system: ParametricTransitionSystem, state_index: int, parameter_index: int) -> np.ndarray:
+    """
+    successor_indices = pair_successors(system, state_index, parameter_index)
+    Description:
+        The indices (in system.S) of the states that can follow state_index under any action when the parameter has
+        index parameter_index. Each successor is listed once, in increasing order.
+    :param system: The parametric transition system.
+    :param state_index: Index (in system.S) of the state.
+    :param parameter_index: Index (in system.Theta) of the parameter.
+    :return:
+    """
+    # Constants
+    n_act, n_theta = len(system.Act), len(system.Theta)
+    offsets, successors = system.successor_csr()
+
+    # Algorithm
+    keys = (state_index * n_act + np.arange(n_act)) * n_theta + parameter_index
+    return np.unique(csr_gather(offsets, successors, keys)[0])
+
+
+def pair_outputs(system: ParametricTransitionSystem, state_index: int, parameter_index: int) -> np.ndarray:
+    """
+    output_indices = pair_outputs(system, state_index, parameter_index)
+    Description:
+        The indices (in system.Y) of the outputs that state_index can produce when the parameter has index
+        parameter_index, in increasing order.
+    :param system: The parametric transition system.
+    :param state_index: Index (in system.S) of the state.
+    :param parameter_index: Index (in system.Theta) of the parameter.
+    :return:
+    """
+    # Constants
+    n_theta, n_y = len(system.Theta), len(system.Y)
+    output_codes = system.output_codes()
+
+    # Algorithm
+    first_code = (state_index * n_theta + parameter_index) * n_y
+    start, end = np.searchsorted(output_codes, [first_code, first_code + n_y])
+    return output_codes[start:end] - first_code
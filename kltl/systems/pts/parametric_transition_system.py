@@ -8,9 +8,12 @@ from typing import List, Set, Tuple
 import numpy as np
 
 from kltl.types import State, Action, AtomicProposition, Output
+from kltl.serialization import BinarySerializable
+from kltl.systems.frozen import FreezableSystem
+from kltl.systems.graph_utils import compressed_sparse_rows, cached_index
 from .pts_types import Transition, Parameter
 
-class ParametricTransitionSystem:
+class ParametricTransitionSystem(FreezableSystem, BinarySerializable):
     """
     ParametricTransitionSystem
     Description:
@@ -221,3 +224,47 @@ class ParametricTransitionSystem:
         O_s = [self.Y[o1] for o1 in output_list]
         return list(set(O_s))
 
+    def successor_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        offsets, successors = pts.successor_csr()
+        Description:
+            The post relation of the system in compressed sparse row form. The indices of the successors of state
+            index s under action index a and parameter index theta are
+                successors[offsets[k]:offsets[k+1]], where k = (s * len(Act) + a) * len(Theta) + theta.
+            The table is computed once and reused until the transitions change.
+        :return:
+        """
+        def compute():
+            keys = (self.transitions[:, 0] * len(self.Act) + self.transitions[:, 1]) * len(self.Theta) + self.transitions[:, 2]
+            return compressed_sparse_rows(
+                keys.astype(int), self.transitions[:, 3].astype(int),
+                len(self.S) * len(self.Act) * len(self.Theta),
+            )
+
+        return cached_index(self, "successor_csr", (self.transitions, self.S, self.Act, self.Theta), compute)
+
+    def output_codes(self) -> np.ndarray:
+        """
+        codes = pts.output_codes()
+        Description:
+            Sorted array containing the code (s * len(Theta) + theta) * len(Y) + y for every entry (s, theta, y) of the
+            output map. Membership can be tested with np.searchsorted.
+        :return:
+        """
+        def compute():
+            codes = (self.output_map[:, 0] * len(self.Theta) + self.output_map[:, 1]) * len(self.Y) + self.output_map[:, 2]
+            return np.unique(codes.astype(int))
+
+        return cached_index(self, "output_codes", (self.output_map, self.S, self.Theta, self.Y), compute)
+
+    def precompute_indexes(self):
+        """
+        pts.precompute_indexes()
+        Description:
+            Computes the name maps, the label tables, successor_csr and output_codes (see FreezableSystem).
+        """
+        super().precompute_indexes()
+        if self.has_arrays("transitions"):
+            self.successor_csr()
+        if self.has_arrays("output_map"):
+            self.output_codes()
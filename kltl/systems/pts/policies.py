@@ -4,13 +4,15 @@ Description:
     A module for the finding the possible trajectories given the control policies of a parametric transition system.
 """
 
-from typing import List, Tuple, Union
+from typing import Callable, List, Tuple, Union
 import numpy as np
 
 from kltl.systems import TransitionSystem
+from kltl.systems.graph_utils import name_to_index_map
 from kltl.systems.pts.trajectory import create_random_trajectory_with_N_actions
-from kltl.systems.pts.sadra_noise import get_noisy_sadra_system
+from kltl.systems.pts.sadra_noise import shared_noisy_sadra_system
 from kltl.systems.pts.parametric_transition_system import ParametricTransitionSystem
+from kltl.systems.pts.policy_tables import PolicyTable, compile_policy
 from random import choice
 
 class ControlPolicies:
@@ -21,7 +23,7 @@ class ControlPolicies:
         self.theta = theta
 
         if system is None:
-            self.system = get_noisy_sadra_system()
+            self.system = shared_noisy_sadra_system()
         else:
             self.system = system
 
@@ -29,9 +31,40 @@ class ControlPolicies:
     def find(self, transitions: List[Tuple], dir: str):
         # Constants
         system = self.system
-        potential = [transition for transition in transitions if system.Act[transition[1]] == dir and system.Theta[transition[2] == self.theta]]
+        potential = [transition for transition in transitions if system.Act[transition[1]] == dir]
         return choice(potential)
-        
+
+    def transitions_from(self, y: str) -> np.ndarray:
+        """
+        transitions = policies.transitions_from(y)
+        Description:
+            The transitions of the system that start at the state whose name is the output y.
+        """
+        sadra = self.system
+        return sadra.transitions[sadra.transitions[:, 0] == name_to_index_map(sadra, "Y")[y]]
+
+    def goal_memory(self) -> Tuple[List[List[str]], np.ndarray]:
+        """
+        memory_histories, memory_update = policies.goal_memory()
+        Description:
+            The memory of control_policy_1 and control_policy_2: memory state m = reach1 + 2 * reach2 records which of
+            the two goals were visited. See compile_policy.
+        """
+        # Constants
+        sadra = self.system
+        goal1, goal2 = sadra.Y[sadra.labels[0, 0]], sadra.Y[sadra.labels[1, 0]]
+
+        # Algorithm
+        memory_histories = [
+            ([goal1, goal1, sadra.Act[0]] if m & 1 else []) + ([goal2, goal2, sadra.Act[0]] if m & 2 else [])
+            for m in range(4)
+        ]
+
+        memory = np.arange(4).reshape((-1, 1))
+        memory_update = memory | (np.array(sadra.Y) == goal1).astype(int) | 2 * (np.array(sadra.Y) == goal2).astype(int)
+
+        return memory_histories, memory_update
+
     def control_policy_1(self, trajectory: List[str], theta=-1):
         sadra = self.system
         coord = sadra.state_name_to_coordinates
@@ -39,19 +72,16 @@ class ControlPolicies:
         goal1, goal2 = sadra.labels[0, 0], sadra.labels[1, 0]
         goal1, goal2 = coord(sadra.Y[goal1]), coord(sadra.Y[goal2])
         reach1, reach2 = False, False
-        transitions = []
-        
+
         for i in range(0, len(trajectory), 3):
             y = trajectory[i]
 
             if coord(y) == goal1: reach1 = True
             if coord(y) == goal2: reach2 = True
             if reach1 and reach2: return None
-        
-        for transition in sadra.transitions:
-            if sadra.Y[transition[0]] == trajectory[-1]:
-                transitions.append(transition)
-                
+
+        transitions = self.transitions_from(trajectory[-1])
+
         if not reach1:
             if r_idx != goal1[0]:
                 if r_idx > goal1[0]: 
@@ -86,13 +116,9 @@ class ControlPolicies:
         return self.control_policy_1(trajectory, theta=-2)
         
     def control_policy_3(self, trajectory: List[str]):
-        sadra = get_noisy_sadra_system()
+        sadra = self.system
         coord = sadra.state_name_to_coordinates
-        transitions = []
-        
-        for transition in sadra.transitions:
-            if sadra.Y[transition[0]] == trajectory[-1]:
-                transitions.append(transition)
+        transitions = self.transitions_from(trajectory[-1])
                         
         if self.tested < self.test_num:
             if self.entered:
@@ -136,11 +162,47 @@ class ControlPolicies:
             return self.control_policy_1(trajectory, theta=theta)
         
 def get_all_trajectories(policy, max_len: int, pts: ParametricTransitionSystem):
+    """
+    trajs = get_all_trajectories(policy, max_len, pts)
+    Description:
+        Runs the policy (a function of the trajectory so far) from each initial state of pts for at most max_len steps.
+        Trajectories whose policy stops (returns None) are not extended anymore.
+        For many executions, compile the policy (see compile_control_policy) and use run_policy_batch instead.
+    :return: List of trajectories (each one a list [y0, y0, a0, y1, y1, ...]).
+    """
     trajs = [[y0, y0] for y0 in pts.I]
+    active = list(range(len(trajs)))
     for i in range(max_len):
-        for traj in trajs:
-            next = policy(traj)
-            if next != None: traj.extend(next)
-            else: print("Goals reached.")
+        still_active = []
+        for k in active:
+            next = policy(trajs[k])
+            if next is None:
+                print("Goals reached.")
+                continue
+            trajs[k].extend(next)
+            still_active.append(k)
+
+        active = still_active
+        if len(active) == 0:
+            break
+
     return trajs
-        
+
+def compile_control_policy(policies: ControlPolicies, policy: Callable[[List[str]], Tuple] = None) -> PolicyTable:
+    """
+    table = compile_control_policy(policies, policy)
+    Description:
+        Compiles control_policy_1 or control_policy_2 of policies (or any other policy whose decisions only depend on
+        the last output and on which of the two goals were visited) into a PolicyTable for policies.system.
+    :param policies:
+    :param policy: A policy of policies (control_policy_1 if None).
+    :return:
+    """
+    # Input Processing
+    if policy is None:
+        policy = policies.control_policy_1
+
+    # Algorithm
+    memory_histories, memory_update = policies.goal_memory()
+
+    return compile_policy(policy, policies.system, memory_histories, memory_update)
@@ -0,0 +1,361 @@
+"""
+policy_tables.py
+Description:
+    Finite memory policies for parametric transition systems, stored as tables.
+    A policy observes the outputs of the system. It keeps a memory state m (e.g., which goals were already visited) and
+    chooses its actions from the distribution action_probabilities[m, y] of its memory and the current output y.
+    After each new output y', the memory becomes memory_update[m, y']. Executing the policy only requires table lookups,
+    so each step takes constant time.
+"""
+
+from typing import Callable, List, Optional, Tuple, Union
+import numpy as np
+
+from kltl.serialization import BinarySerializable
+from kltl.systems.graph_utils import names_to_indices
+from kltl.systems.pts.parametric_transition_system import ParametricTransitionSystem
+from kltl.systems.pts.pts_types import Parameter
+from kltl.systems.pts.sampling import sampling_tables, sample_outputs
+from kltl.systems.pts.trajectory import CompactFiniteTrajectory
+
+
+class PolicyTable(BinarySerializable):
+    """
+    PolicyTable
+    Description:
+        A finite memory policy.
+            action_probabilities[m, y, a]  probability of action index a in memory state m when output index y is
+                                           observed (a row of zeros means that the policy stops),
+            memory_update[m, y]            memory state after output index y is observed in memory state m,
+            initial_memory                 memory state before the first output is observed,
+            Y, Act                         the outputs and actions of the system that the policy was built for.
+    """
+    def __init__(
+            self,
+            action_probabilities: np.ndarray,
+            memory_update: np.ndarray,
+            Y: List,
+            Act: List,
+            initial_memory: int = 0,
+    ):
+        # Input Processing
+        n_memory = memory_update.shape[0]
+        assert action_probabilities.shape == (n_memory, len(Y), len(Act)), \
+            f"Expected action probabilities of shape {(n_memory, len(Y), len(Act))}, but received {action_probabilities.shape}!"
+        assert memory_update.shape == (n_memory, len(Y)), \
+            f"Expected a memory update table of shape {(n_memory, len(Y))}, but received {memory_update.shape}!"
+        assert np.all((memory_update >= 0) & (memory_update < n_memory)), f"The memory update table has invalid entries!"
+        assert (initial_memory >= 0) and (initial_memory < n_memory), f"Invalid initial memory state {initial_memory}!"
+
+        row_sums = np.sum(action_probabilities, axis=-1)
+        assert np.allclose(row_sums[row_sums > 0], 1.0), f"Each row of action probabilities must sum to 0 or 1!"
+
+        self.action_probabilities = action_probabilities.astype(float)
+        self.memory_update = memory_update.astype(np.int32)
+        self.Y = Y
+        self.Act = Act
+        self.initial_memory = initial_memory
+
+        # Cumulative probabilities for sampling (the last entry of each row is 0 when the policy stops)
+        self.cumulative_probabilities = np.cumsum(self.action_probabilities, axis=-1)
+
+    @property
+    def n_memory(self) -> int:
+        return self.memory_update.shape[0]
+
+    def stops(self, memory: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        tf = table.stops(memory, y)
+        Description:
+            True when the policy does not choose any action in memory state memory after observing y.
+        """
+        return self.cumulative_probabilities[memory, y, -1] <= 0.0
+
+    def sample_actions(self, memory: np.ndarray, y: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        actions = table.sample_actions(memory, y, rng)
+        Description:
+            Samples one action index for each (memory, y) pair (the pairs must not stop).
+        """
+        # Constants
+        rows = self.cumulative_probabilities[memory, y]
+
+        # Algorithm
+        u = rng.random(np.shape(memory)) * rows[..., -1]
+        actions = np.sum(rows <= u[..., None], axis=-1)
+
+        return np.minimum(actions, len(self.Act) - 1).astype(np.int32)
+
+
+class PolicyExecutor:
+    """
+    PolicyExecutor
+    Description:
+        Runs a PolicyTable on a parametric transition system whose parameter is theta. The next state and output are
+        chosen uniformly among the possible ones (as in sample_trajectories).
+        Example:
+            executor = PolicyExecutor(table, sadra, "1", rng=0)
+            while executor.step() is not None:
+                pass
+            trajectory = executor.trajectory()
+    """
+    def __init__(
+            self,
+            table: PolicyTable,
+            system: ParametricTransitionSystem,
+            theta: Parameter,
+            rng: Union[np.random.Generator, int] = None,
+            s0=None,
+    ):
+        # Input Processing
+        assert list(table.Y) == list(system.Y), f"The policy was built for a system with different outputs!"
+        assert list(table.Act) == list(system.Act), f"The policy was built for a system with different actions!"
+        assert theta in system.Theta, f"Parameter {theta} is not in parameter space!"
+
+        self.table = table
+        self.system = system
+        self.theta = system.Theta.index(theta)
+        self.rng = np.random.default_rng(rng)
+
+        self.successor_offsets, self.successors, _, _, self.output_offsets, self.outputs = sampling_tables(system)
+
+        self.reset(s0)
+
+    def reset(self, s0=None):
+        """
+        executor.reset(s0)
+        Description:
+            Starts a new execution from s0 (or from an initial state chosen uniformly if s0 is None).
+        """
+        # Input Processing
+        if s0 is None:
+            s0 = self.system.I[self.rng.integers(len(self.system.I))]
+
+        # Algorithm
+        self.state = int(names_to_indices(self.system, "S", [s0])[0])
+        self.output = self.sample_output(self.state)
+        self.memory = int(self.table.memory_update[self.table.initial_memory, self.output])
+
+        self.states, self.actions, self.outputs_seen = [self.state], [], [self.output]
+
+    @property
+    def done(self) -> bool:
+        return bool(self.table.stops(self.memory, self.output))
+
+    def sample_output(self, s: int) -> int:
+        return int(sample_outputs(
+            np.array([s]), np.array([self.theta]), self.output_offsets, self.outputs, len(self.system.Theta), self.rng,
+        )[0])
+
+    def step(self) -> Optional[Tuple[int, int, int]]:
+        """
+        a, s_next, y_next = executor.step()
+        Description:
+            Takes one action of the policy. Returns None (and does nothing) if the policy has stopped.
+        :return: The indices of the action, the next state and the next output.
+        """
+        # Input Processing
+        if self.done:
+            return None
+
+        # Constants
+        system = self.system
+
+        # Algorithm
+        a = int(self.table.sample_actions(np.array(self.memory), np.array(self.output), self.rng))
+        key = (self.state * len(system.Act) + a) * len(system.Theta) + self.theta
+        start, end = self.successor_offsets[key], self.successor_offsets[key + 1]
+        assert end > start, \
+            f"State {system.S[self.state]} has no successors under action {system.Act[a]} and parameter {system.Theta[self.theta]}!"
+
+        self.state = int(self.successors[start + self.rng.integers(end - start)])
+        self.output = self.sample_output(self.state)
+        self.memory = int(self.table.memory_update[self.memory, self.output])
+
+        self.states.append(self.state)
+        self.actions.append(a)
+        self.outputs_seen.append(self.output)
+
+        return a, self.state, self.output
+
+    def run(self, max_steps: int) -> CompactFiniteTrajectory:
+        """
+        trajectory = executor.run(max_steps)
+        Description:
+            Steps until the policy stops or max_steps actions were taken, and returns the trajectory so far.
+        """
+        for _ in range(max_steps):
+            if self.step() is None:
+                break
+
+        return self.trajectory()
+
+    def trajectory(self) -> CompactFiniteTrajectory:
+        return CompactFiniteTrajectory(
+            np.array(self.states), np.array(self.actions, dtype=np.int32), np.array(self.outputs_seen),
+            self.theta, self.system,
+        )
+
+
+def compile_policy(
+        policy: Callable[[List[str]], Optional[Tuple]],
+        system: ParametricTransitionSystem,
+        memory_histories: List[List[str]],
+        memory_update: np.ndarray,
+        initial_memory: int = 0,
+) -> PolicyTable:
+    """
+    table = compile_policy(policy, system, memory_histories, memory_update, initial_memory)
+    Description:
+        Converts a hand-written policy (a function of the trajectory so far, like ControlPolicies.control_policy_1,
+        which returns a tuple whose first entry is the action, or None when it stops) into a PolicyTable.
+        The decisions of the policy must only depend on its memory state and on the last output. memory_histories[m]
+        is a trajectory prefix (a list [y, y, a, y, y, a, ...]) after which the policy is in memory state m; the policy
+        is called once for each memory state and output.
+    :param policy:
+    :param system:
+    :param memory_histories: One trajectory prefix per memory state.
+    :param memory_update: Memory update table (see PolicyTable).
+    :param initial_memory:
+    :return:
+    """
+    # Input Processing
+    assert len(memory_histories) == memory_update.shape[0], \
+        f"Expected one history per memory state, but received {len(memory_histories)} histories!"
+
+    # Algorithm
+    action_probabilities = np.zeros((len(memory_histories), len(system.Y), len(system.Act)))
+    for (m, history) in enumerate(memory_histories):
+        for (y_index, y) in enumerate(system.Y):
+            decision = policy(list(history) + [y, y])
+            if decision is None:
+                continue
+            action_probabilities[m, y_index, system.Act.index(decision[0])] = 1.0
+
+    return PolicyTable(action_probabilities, memory_update, system.Y, system.Act, initial_memory=initial_memory)
+
+
+class PolicyRollouts:
+    """
+    PolicyRollouts
+    Description:
+        The result of run_policy_batch: B executions of a policy with at most N actions each, stored as padded integer
+        arrays (entries after the end of an execution are -1).
+            states[b, k], outputs[b, k]  indices of the k-th state and output of execution b  (shape B x (N+1))
+            actions[b, k]                index of the k-th action of execution b               (shape B x N)
+            parameters[b]                index of the parameter of execution b                 (shape B)
+            lengths[b]                   number of actions taken in execution b                (shape B)
+            stopped[b]                   True if the policy stopped (instead of running out of steps)
+    """
+    def __init__(
+            self,
+            states: np.ndarray,
+            actions: np.ndarray,
+            outputs: np.ndarray,
+            parameters: np.ndarray,
+            lengths: np.ndarray,
+            stopped: np.ndarray,
+            system: ParametricTransitionSystem,
+    ):
+        self.states = states
+        self.actions = actions
+        self.outputs = outputs
+        self.parameters = parameters
+        self.lengths = lengths
+        self.stopped = stopped
+        self.system = system
+
+    def __len__(self):
+        return self.states.shape[0]
+
+    def trajectory(self, b: int) -> CompactFiniteTrajectory:
+        """
+        trajectory_b = rollouts.trajectory(b)
+        Description:
+            The b-th execution (without its padding) as a CompactFiniteTrajectory.
+        """
+        # Input Processing
+        assert (b >= 0) and (b < len(self)), f"There are only {len(self)} executions, but user tried to access {b}!"
+
+        # Algorithm
+        n = self.lengths[b]
+        return CompactFiniteTrajectory(
+            self.states[b, :n + 1], self.actions[b, :n], self.outputs[b, :n + 1], int(self.parameters[b]), self.system,
+        )
+
+
+def run_policy_batch(
+        table: PolicyTable,
+        system: ParametricTransitionSystem,
+        parameters: List[Parameter],
+        max_len: int,
+        initial_states: List = None,
+        rng: Union[np.random.Generator, int] = None,
+) -> PolicyRollouts:
+    """
+    rollouts = run_policy_batch(table, system, parameters, max_len, initial_states, rng)
+    Description:
+        Runs one execution of the policy for each entry of parameters, all of them in lockstep: each step samples the
+        actions, next states and outputs of every active execution with a few array operations. Executions whose
+        policy stops are removed from the active set, and the loop ends as soon as no execution is active.
+    :param table: The policy.
+    :param system: The parametric transition system.
+    :param parameters: The parameter of each execution (the batch size is len(parameters)).
+    :param max_len: Maximum number of actions in each execution.
+    :param initial_states: The initial state of each execution (chosen uniformly from system.I if None).
+    :param rng: A numpy random generator (or a seed for one).
+    :return:
+    """
+    # Input Processing
+    assert list(table.Y) == list(system.Y), f"The policy was built for a system with different outputs!"
+    assert list(table.Act) == list(system.Act), f"The policy was built for a system with different actions!"
+    assert max_len >= 0, f"Expected a nonnegative number of steps, but received {max_len}!"
+
+    rng = np.random.default_rng(rng)
+    B = len(parameters)
+
+    if initial_states is None:
+        initial_states = [system.I[k] for k in rng.integers(0, len(system.I), size=B)]
+    assert len(initial_states) == B, f"Expected {B} initial states, but received {len(initial_states)}!"
+
+    # Constants
+    n_act, n_theta = len(system.Act), len(system.Theta)
+    successor_offsets, successors, _, _, output_offsets, outputs = sampling_tables(system)
+
+    theta = names_to_indices(system, "Theta", parameters).astype(int)
+    states = np.full((B, max_len + 1), -1, dtype=np.int32)
+    actions = np.full((B, max_len), -1, dtype=np.int32)
+    output_indices = np.full((B, max_len + 1), -1, dtype=np.int32)
+    lengths = np.zeros((B,), dtype=np.int32)
+
+    # The current state, output and memory of every execution
+    s = names_to_indices(system, "S", initial_states).astype(int)
+    y = sample_outputs(s, theta, output_offsets, outputs, n_theta, rng).astype(int)
+    memory = table.memory_update[table.initial_memory, y].astype(int)
+    states[:, 0], output_indices[:, 0] = s, y
+
+    # Algorithm
+    active = np.arange(B)
+    for k in range(max_len):
+        active = active[~table.stops(memory[active], y[active])]
+        if len(active) == 0:
+            break
+
+        a = table.sample_actions(memory[active], y[active], rng)
+        keys = (s[active] * n_act + a) * n_theta + theta[active]
+        n_successors = successor_offsets[keys + 1] - successor_offsets[keys]
+        assert np.all(n_successors > 0), \
+            f"State {system.S[s[active][np.argmin(n_successors)]]} has no successors under action " + \
+            f"{system.Act[a[np.argmin(n_successors)]]}!"
+
+        s[active] = successors[successor_offsets[keys] + (rng.random(len(active)) * n_successors).astype(int)]
+        y[active] = sample_outputs(s[active], theta[active], output_offsets, outputs, n_theta, rng)
+        memory[active] = table.memory_update[memory[active], y[active]]
+
+        actions[active, k] = a
+        states[active, k + 1], output_indices[active, k + 1] = s[active], y[active]
+        lengths[active] += 1
+
+    return PolicyRollouts(
+        states, actions, output_indices, theta.astype(np.int32), lengths, table.stops(memory, y), system,
+    )
@@ -0,0 +1,226 @@
+"""
+rollouts.py
+Description:
+    A module for generating (and evaluating) a large number of trajectories of a parametric transition system in
+    parallel. The work is split into shards which are processed by a pool of worker processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple, Union
+import numpy as np
+
+from kltl.grammar.kltl_semantics import KLTLFormula, ObservedTrace, contains_knows, kltl_evaluate
+from kltl.types import AtomicProposition
+from kltl.systems.pts.parametric_transition_system import ParametricTransitionSystem
+from kltl.systems.pts.sampling import TrajectoryBatch, sample_trajectories, sampling_tables
+from kltl.systems.transport import share_system, attach_system
+
+# Each worker process keeps its copy of the system (and the shared memory blocks that back it) here.
+_worker_state: Dict[str, Any] = {}
+
+
+class TraceFormulaEvaluator:
+    """
+    TraceFormulaEvaluator
+    Description:
+        Evaluates a (temporal logic) formula on the trace of every trajectory in a batch. Formulae with K are evaluated
+        on the outputs (and labels) of each trajectory (see ObservedTrace). Instances can be sent to worker processes.
+    """
+    def __init__(self, formula: Union[AtomicProposition, KLTLFormula]):
+        if isinstance(formula, str):
+            formula = KLTLFormula(formula, [])
+        self.formula = formula
+
+    def __call__(self, batch: TrajectoryBatch) -> np.ndarray:
+        """
+        sat = evaluator(batch)
+        :param batch: Batch of trajectories.
+        :return: Boolean array with one entry per trajectory in the batch.
+        """
+        # Constants
+        system = batch.system
+        labels_of_state = [system.L(s) for s in system.S]
+
+        # Algorithm
+        satisfied = np.zeros((len(batch),), dtype=bool)
+        for b in range(len(batch)):
+            trace = [labels_of_state[s_index] for s_index in batch.states[b]]
+            if contains_knows(self.formula):
+                trace = ObservedTrace(system, [system.Y[y_index] for y_index in batch.outputs[b]], labels=trace)
+            satisfied[b] = kltl_evaluate(self.formula, trace, system)
+
+        return satisfied
+
+
+class RolloutResults:
+    """
+    RolloutResults
+    Description:
+        The merged results of a set of rollouts. values[i] is the value of the evaluation function on the i-th
+        trajectory. If the trajectories were kept, then batch contains all of them (in the same order).
+    """
+    def __init__(self, values: np.ndarray, batch: TrajectoryBatch = None):
+        self.values = values
+        self.batch = batch
+
+    def __len__(self):
+        return len(self.values)
+
+
+class RolloutRunner:
+    """
+    RolloutRunner
+    Description:
+        Keeps a pool of worker processes (each holding the system) alive so that several sets of rollouts can be run
+        without sending the system again. Use as a context manager:
+            with RolloutRunner(system, n_workers=8) as runner:
+                results = runner.run(10000, 50, evaluate, seed=0)
+    """
+    def __init__(self, system: ParametricTransitionSystem, n_workers: int = None):
+        self.system = system
+        self.n_workers = n_workers
+        self.pool, self.blocks = None, []
+
+    def __enter__(self):
+        if self.n_workers != 1:
+            snapshot = self.system.freeze()
+            sampling_tables(snapshot)
+            handle, self.blocks = share_system(snapshot)
+            self.pool = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_initialize_worker, initargs=(handle,))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        runner.close()
+        Description:
+            Shuts down the worker processes and releases the shared memory.
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def run(
+            self,
+            n_rollouts: int,
+            N: int,
+            evaluate: Callable[[TrajectoryBatch], np.ndarray] = None,
+            generate: Callable[[ParametricTransitionSystem, int, int, np.random.Generator], TrajectoryBatch] = sample_trajectories,
+            shard_size: int = 10000,
+            seed: Union[int, np.random.SeedSequence] = None,
+            keep_trajectories: bool = False,
+    ) -> RolloutResults:
+        """
+        results = runner.run(n_rollouts, N, evaluate, seed=0)
+        Description:
+            See run_rollouts.
+        """
+        # Input Processing
+        assert n_rollouts > 0, f"Expected a positive number of rollouts, but received {n_rollouts}!"
+        assert shard_size > 0, f"Expected a positive shard size, but received {shard_size}!"
+
+        # Constants
+        shard_sizes = [shard_size] * (n_rollouts // shard_size)
+        if n_rollouts % shard_size > 0:
+            shard_sizes.append(n_rollouts % shard_size)
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        shard_seeds = seed_sequence.spawn(len(shard_sizes))
+        tasks = [(B, N, shard_seed, evaluate, generate, keep_trajectories) for (B, shard_seed) in zip(shard_sizes, shard_seeds)]
+
+        # Algorithm
+        if self.pool is None:
+            _worker_state["system"] = self.system
+            shard_results = [_run_shard(task) for task in tasks]
+            _worker_state.clear()
+        else:
+            shard_results = list(self.pool.map(_run_shard, tasks))
+
+        return merge_shard_results(shard_results, self.system)
+
+
+def run_rollouts(
+        system: ParametricTransitionSystem,
+        n_rollouts: int,
+        N: int,
+        evaluate: Callable[[TrajectoryBatch], np.ndarray] = None,
+        generate: Callable[[ParametricTransitionSystem, int, int, np.random.Generator], TrajectoryBatch] = sample_trajectories,
+        n_workers: int = None,
+        shard_size: int = 10000,
+        seed: Union[int, np.random.SeedSequence] = None,
+        keep_trajectories: bool = False,
+) -> RolloutResults:
+    """
+    results = run_rollouts(system, n_rollouts, N, evaluate, n_workers=8, seed=0)
+    Description:
+        Generates n_rollouts trajectories with N actions each and evaluates them. The rollouts are split into shards of
+        at most shard_size trajectories. Each shard is given its own random stream (spawned from seed), so the results
+        only depend on the seed and shard_size, not on the number of workers or the order in which shards finish.
+        The system is sent to each worker once; its integer arrays are placed in shared memory instead of being copied.
+    :param system: The parametric transition system.
+    :param n_rollouts: Total number of trajectories.
+    :param N: Number of actions in each trajectory.
+    :param evaluate: Function that maps a TrajectoryBatch to an array with one value per trajectory
+        (e.g., a TraceFormulaEvaluator). Must be picklable if n_workers > 1. If None, nothing is evaluated.
+    :param generate: Function with the signature of sample_trajectories that creates each shard.
+    :param n_workers: Number of worker processes. If None, the number of CPUs is used. If 1, no pool is created.
+    :param shard_size: Maximum number of trajectories in each shard.
+    :param seed: Seed for the random streams.
+    :param keep_trajectories: If True, the trajectories are returned as well.
+    :return:
+    """
+    with RolloutRunner(system, n_workers=n_workers) as runner:
+        return runner.run(
+            n_rollouts, N, evaluate,
+            generate=generate, shard_size=shard_size, seed=seed, keep_trajectories=keep_trajectories,
+        )
+
+
+def merge_shard_results(
+        shard_results: List[Tuple[np.ndarray, Tuple[np.ndarray, ...]]],
+        system: ParametricTransitionSystem,
+) -> RolloutResults:
+    """
+    results = merge_shard_results(shard_results, system)
+    Description:
+        Concatenates the results of each shard (in shard order).
+    :param shard_results: List of (values, trajectory arrays) for each shard.
+    :param system:
+    :return:
+    """
+    # Algorithm
+    values = np.concatenate([values_i for (values_i, _) in shard_results])
+
+    batch = None
+    if shard_results[0][1] is not None:
+        states, actions, outputs, parameters = [
+            np.concatenate([arrays_i[k] for (_, arrays_i) in shard_results]) for k in range(4)
+        ]
+        batch = TrajectoryBatch(states, actions, outputs, parameters, system)
+
+    return RolloutResults(values, batch)
+
+
+def _initialize_worker(handle: Dict[str, Any]):
+    _worker_state["system"], _worker_state["blocks"] = attach_system(handle)
+
+
+def _run_shard(task) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+    # Constants
+    B, N, shard_seed, evaluate, generate, keep_trajectories = task
+    system = _worker_state["system"]
+
+    # Algorithm
+    batch = generate(system, B, N, np.random.default_rng(shard_seed))
+    values = np.zeros((len(batch),)) if evaluate is None else np.asarray(evaluate(batch))
+
+    arrays = None
+    if keep_trajectories:
+        arrays = (batch.states, batch.actions, batch.outputs, batch.parameters)
+
+    return values, arrays
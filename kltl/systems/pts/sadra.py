@@ -7,6 +7,7 @@ Description:
 import numpy as np
 
 from kltl.systems.pts import ParametricTransitionSystem, FiniteTrajectory
+from kltl.systems.shared import shared_system
 
 from typing import Tuple, Dict, Any
 from kltl.types import State
@@ -19,8 +20,8 @@ import matplotlib.animation as manimation
 class SadraSystem(ParametricTransitionSystem):
     def __init__(self, n_cols: int = 15, n_rows: int = 10, windy_region_y_lb: int = 3, windy_region_y_ub: int = 6):
         # Constants
-        self.windy_region_y_lb = 3
-        self.windy_region_y_ub = 6
+        self.windy_region_y_lb = windy_region_y_lb
+        self.windy_region_y_ub = windy_region_y_ub
 
         # Create state space
         self.n_cols = n_cols
@@ -266,7 +267,20 @@ class SadraSystem(ParametricTransitionSystem):
 
         animation.save(filename=filename, fps=fps)
 
-def get_sadra_system():
-    """Gets sadra system."""
-
-    return SadraSystem()
\ No newline at end of file
+def get_sadra_system(n_cols: int = 15, n_rows: int = 10, windy_region_y_lb: int = 3, windy_region_y_ub: int = 6):
+    """
+    sadra = get_sadra_system(n_cols=15, n_rows=10, windy_region_y_lb=3, windy_region_y_ub=6)
+    Description:
+        Builds a new sadra system (that can be modified) with the given grid size and windy region.
+        Code that only reads the system should use shared_sadra_system instead.
+    """
+    return SadraSystem(n_cols, n_rows, windy_region_y_lb, windy_region_y_ub)
+
+def shared_sadra_system(n_cols: int = 15, n_rows: int = 10, windy_region_y_lb: int = 3, windy_region_y_ub: int = 6):
+    """
+    sadra = shared_sadra_system(n_cols=15, n_rows=10, windy_region_y_lb=3, windy_region_y_ub=6)
+    Description:
+        Gets the (frozen) sadra system with the given grid size and windy region. The system is built once per process
+        and shared by every caller; use get_sadra_system (or sadra.thaw()) to get a system that can be modified.
+    """
+    return shared_system(SadraSystem, n_cols, n_rows, windy_region_y_lb, windy_region_y_ub)
@@ -0,0 +1,197 @@
+"""
+sampling.py
+Description:
+    A module for sampling many random trajectories of a parametric transition system at once.
+    All of the sampling is done on integer indices, so the only python loop is over the time steps.
+"""
+
+from typing import Tuple, Union
+import numpy as np
+
+from kltl.systems.graph_utils import compressed_sparse_rows, cached_index
+from kltl.systems.pts.parametric_transition_system import ParametricTransitionSystem
+from kltl.systems.pts.trajectory import FiniteTrajectory, CompactFiniteTrajectory
+
+
+class TrajectoryBatch:
+    """
+    TrajectoryBatch
+    Description:
+        A batch of B finite trajectories with N actions each, stored as integer index arrays.
+            states[b, k]  is the index (in system.S) of the k-th state of trajectory b      (shape B x (N+1))
+            outputs[b, k] is the index (in system.Y) of the k-th output of trajectory b     (shape B x (N+1))
+            actions[b, k] is the index (in system.Act) of the k-th action of trajectory b   (shape B x N)
+            parameters[b] is the index (in system.Theta) of the parameter of trajectory b  (shape B)
+    """
+    def __init__(
+            self,
+            states: np.ndarray,
+            actions: np.ndarray,
+            outputs: np.ndarray,
+            parameters: np.ndarray,
+            system: ParametricTransitionSystem,
+    ):
+        # Input Processing
+        assert states.shape == outputs.shape, f"Expected states and outputs to have the same shape!"
+        assert states.shape[0] == actions.shape[0] == parameters.shape[0], f"Batch sizes do not match!"
+        assert states.shape[1] == actions.shape[1] + 1, f"Expected one more state than actions in each trajectory!"
+
+        self.states = states
+        self.actions = actions
+        self.outputs = outputs
+        self.parameters = parameters
+        self.system = system
+
+    def __len__(self):
+        return self.states.shape[0]
+
+    def trajectory(self, b: int) -> FiniteTrajectory:
+        """
+        traj_b = batch.trajectory(b)
+        Description:
+            Converts the b-th trajectory of the batch into a FiniteTrajectory.
+        :param b: Index of the trajectory in the batch.
+        :return:
+        """
+        # Input Processing
+        assert (b >= 0) and (b < len(self)), f"There are only {len(self)} trajectories, but user tried to access {b}!"
+
+        # Algorithm
+        trajectory_as_list = []
+        for k in range(self.actions.shape[1]):
+            trajectory_as_list += [
+                self.system.S[self.states[b, k]], self.system.Y[self.outputs[b, k]], self.system.Act[self.actions[b, k]],
+            ]
+        trajectory_as_list += [self.system.S[self.states[b, -1]], self.system.Y[self.outputs[b, -1]]]
+
+        return FiniteTrajectory(trajectory_as_list, self.system.Theta[self.parameters[b]], self.system)
+
+    def compact_trajectory(self, b: int) -> CompactFiniteTrajectory:
+        """
+        traj_b = batch.compact_trajectory(b)
+        Description:
+            Returns the b-th trajectory of the batch as a CompactFiniteTrajectory (no names are looked up).
+        :param b: Index of the trajectory in the batch.
+        :return:
+        """
+        # Input Processing
+        assert (b >= 0) and (b < len(self)), f"There are only {len(self)} trajectories, but user tried to access {b}!"
+
+        return CompactFiniteTrajectory(
+            self.states[b], self.actions[b], self.outputs[b], int(self.parameters[b]), self.system,
+        )
+
+
+def sampling_tables(system: ParametricTransitionSystem) -> Tuple[np.ndarray, ...]:
+    """
+    successor_offsets, successors, enabled_actions, n_enabled, output_offsets, outputs = sampling_tables(system)
+    Description:
+        Precomputes the integer tables that are used to sample trajectories:
+        - The successors of (s, a, theta) in compressed sparse row form (see ParametricTransitionSystem.successor_csr),
+        - enabled_actions[s, theta, :n_enabled[s, theta]] contains the actions with at least one successor,
+        - The (unique) outputs of (s, theta) are outputs[output_offsets[k]:output_offsets[k+1]], k = s * len(Theta) + theta.
+    :param system:
+    :return:
+    """
+    def compute():
+        # Constants
+        n_s, n_act, n_theta = len(system.S), len(system.Act), len(system.Theta)
+        successor_offsets, successors = system.successor_csr()
+
+        # Enabled actions (sorted so that the enabled ones come first)
+        enabled = (np.diff(successor_offsets) > 0).reshape((n_s, n_act, n_theta)).transpose((0, 2, 1))
+        enabled_actions = np.argsort(~enabled, axis=-1, kind="stable").astype(np.int32)
+        n_enabled = np.sum(enabled, axis=-1)
+
+        # Unique outputs of each (state, parameter) pair
+        output_codes = system.output_codes()
+        output_offsets, outputs = compressed_sparse_rows(
+            output_codes // len(system.Y), output_codes % len(system.Y), n_s * n_theta,
+        )
+
+        return successor_offsets, successors, enabled_actions, n_enabled, output_offsets, outputs
+
+    return cached_index(
+        system, "sampling_tables", (system.transitions, system.output_map, system.S, system.Act, system.Theta, system.Y),
+        compute,
+    )
+
+
+def sample_trajectories(
+        system: ParametricTransitionSystem,
+        B: int,
+        N: int,
+        rng: Union[np.random.Generator, int] = None,
+) -> TrajectoryBatch:
+    """
+    batch = sample_trajectories(system, B, N, rng)
+    Description:
+        Samples B random trajectories with N actions each. Like create_random_trajectory_with_N_actions, the parameter
+        and the initial state are chosen uniformly, each action is chosen uniformly among the actions that are enabled
+        (i.e., have a successor) and the next state and output are chosen uniformly among the possible ones.
+    :param system: The parametric transition system.
+    :param B: Number of trajectories.
+    :param N: Number of actions in each trajectory.
+    :param rng: A numpy random generator (or a seed for one).
+    :return:
+    """
+    # Input Processing
+    assert B > 0, f"Expected a positive number of trajectories, but received {B}!"
+    assert N >= 0, f"Expected a nonnegative number of actions, but received {N}!"
+    assert len(system.I) > 0, f"The system must have initial states in order to sample trajectories!"
+
+    rng = np.random.default_rng(rng)
+
+    # Constants
+    n_act, n_theta = len(system.Act), len(system.Theta)
+    successor_offsets, successors, enabled_actions, n_enabled, output_offsets, outputs = sampling_tables(system)
+    I_indices = np.array([system.S.index(s0) for s0 in system.I], dtype=np.int32)
+
+    states = np.zeros((B, N + 1), dtype=np.int32)
+    actions = np.zeros((B, N), dtype=np.int32)
+    output_indices = np.zeros((B, N + 1), dtype=np.int32)
+
+    # Select an initial condition
+    parameters = rng.integers(0, n_theta, size=B).astype(np.int32)
+    states[:, 0] = I_indices[rng.integers(0, len(I_indices), size=B)]
+    output_indices[:, 0] = sample_outputs(states[:, 0], parameters, output_offsets, outputs, n_theta, rng)
+
+    # Algorithm
+    for k in range(N):
+        s_k = states[:, k]
+
+        n_enabled_k = n_enabled[s_k, parameters]
+        assert np.all(n_enabled_k > 0), \
+            f"State {system.S[s_k[np.argmin(n_enabled_k)]]} has no enabled actions under parameter " + \
+            f"{system.Theta[parameters[np.argmin(n_enabled_k)]]}!"
+        actions[:, k] = enabled_actions[s_k, parameters, (rng.random(B) * n_enabled_k).astype(int)]
+
+        keys = (s_k.astype(int) * n_act + actions[:, k]) * n_theta + parameters
+        n_successors = successor_offsets[keys + 1] - successor_offsets[keys]
+        states[:, k + 1] = successors[successor_offsets[keys] + (rng.random(B) * n_successors).astype(int)]
+
+        output_indices[:, k + 1] = sample_outputs(states[:, k + 1], parameters, output_offsets, outputs, n_theta, rng)
+
+    return TrajectoryBatch(states, actions, output_indices, parameters, system)
+
+
+def sample_outputs(
+        state_indices: np.ndarray,
+        parameters: np.ndarray,
+        output_offsets: np.ndarray,
+        outputs: np.ndarray,
+        n_theta: int,
+        rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    y = sample_outputs(state_indices, parameters, output_offsets, outputs, n_theta, rng)
+    Description:
+        Chooses one of the outputs of each (state, parameter) pair uniformly.
+    :return:
+    """
+    # Algorithm
+    keys = state_indices.astype(int) * n_theta + parameters
+    n_outputs = output_offsets[keys + 1] - output_offsets[keys]
+    assert np.all(n_outputs > 0), f"Some sampled states do not have any outputs!"
+
+    return outputs[output_offsets[keys] + (rng.random(len(keys)) * n_outputs).astype(int)]
@@ -57,4 +57,4 @@ class InfiniteTrace:
             idx = idx % len(self.repeating_suffix)
 
             # Return the element in the repeating suffix
-            return self.states[idx]
\ No newline at end of file
+            return self.repeating_suffix[idx]
\ No newline at end of file
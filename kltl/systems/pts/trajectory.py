@@ -7,10 +7,11 @@ Description:
 from typing import List, Tuple, Union
 import numpy as np
 
-from kltl.systems.ts.traces import FiniteTrace, InfiniteTrace
+from kltl.systems.ts.traces import FiniteTrace, InfiniteTrace, LazyFiniteTrace, LazyInfiniteTrace
 from kltl.types import State, Action, AtomicProposition, Transition, Output
 from kltl.systems.pts.pts_types import Parameter
 from kltl.systems.pts import ParametricTransitionSystem
+from kltl.systems.graph_utils import names_to_indices, label_matrix
 
 class FiniteTrajectory:
     def __init__(
@@ -56,8 +57,8 @@ class FiniteTrajectory:
         return len(self.states)
 
     def trace(self):
-        trace_as_list = [self.system.L(s) for s in self.states]
-        return FiniteTrace(trace_as_list, self.system)
+        state_indices = names_to_indices(self.system, "S", self.states)
+        return LazyFiniteTrace(label_matrix(self.system)[state_indices], self.system)
 
     def __str__(self):
         traj_as_str = ""
@@ -68,6 +69,119 @@ class FiniteTrajectory:
         traj_as_str += self.s(len(self)-1) + " , " + self.y(len(self)-1)
         return traj_as_str
 
+    def compact(self) -> 'CompactFiniteTrajectory':
+        """
+        compact_traj = traj.compact()
+        Description:
+            Converts the trajectory into a CompactFiniteTrajectory.
+        :return:
+        """
+        return CompactFiniteTrajectory(
+            names_to_indices(self.system, "S", self.states),
+            names_to_indices(self.system, "Act", self.actions),
+            names_to_indices(self.system, "Y", self.outputs),
+            self.system.Theta.index(self.param),
+            self.system,
+        )
+
+
+class CompactFiniteTrajectory:
+    """
+    CompactFiniteTrajectory
+    Description:
+        A finite trajectory that stores the indices of its states, actions and outputs in int32 arrays (instead of
+        lists of strings). Names are only looked up when s(), a() or y() are called.
+    """
+    __slots__ = ("states", "actions", "outputs", "param", "system")
+
+    def __init__(
+            self,
+            states: np.ndarray,
+            actions: np.ndarray,
+            outputs: np.ndarray,
+            theta_index: int,
+            system: ParametricTransitionSystem,
+    ):
+        # Input Processing
+        assert len(states) > 0
+        assert len(states) == len(outputs), f"Expected {len(states)} outputs, but found {len(outputs)}!"
+        assert len(states) == len(actions) + 1, f"Expected {len(states) - 1} actions, but found {len(actions)}!"
+
+        self.states = np.asarray(states, dtype=np.int32)
+        self.actions = np.asarray(actions, dtype=np.int32)
+        self.outputs = np.asarray(outputs, dtype=np.int32)
+        self.param = theta_index
+        self.system = system
+
+    def s(self, state_idx: int) -> State:
+        assert (state_idx >= 0) and (state_idx < len(self.states)), f"There are only {len(self.states)} states, but user tried to access {state_idx} state!"
+        return self.system.S[self.states[state_idx]]
+
+    def a(self, action_idx: int) -> Action:
+        assert (action_idx >= 0) and (action_idx < len(self.actions)), \
+            f"There are only {len(self.actions)} actions, but user tried to access {action_idx} action!"
+        return self.system.Act[self.actions[action_idx]]
+
+    def y(self, output_idx: int) -> Output:
+        assert (output_idx >= 0) and (output_idx < len(self.outputs)), \
+            f"There are only {len(self.outputs)} outputs, but user tried to access {output_idx} output!"
+        return self.system.Y[self.outputs[output_idx]]
+
+    def theta(self) -> Parameter:
+        return self.system.Theta[self.param]
+
+    def __len__(self):
+        return len(self.states)
+
+    def trace(self):
+        return LazyFiniteTrace(label_matrix(self.system)[self.states], self.system)
+
+    def expand(self) -> FiniteTrajectory:
+        """
+        traj = compact_traj.expand()
+        Description:
+            Converts the trajectory back into a FiniteTrajectory (with lists of strings).
+        :return:
+        """
+        trajectory_as_list = []
+        for k in range(len(self) - 1):
+            trajectory_as_list += [self.s(k), self.y(k), self.a(k)]
+        trajectory_as_list += [self.s(len(self) - 1), self.y(len(self) - 1)]
+
+        return FiniteTrajectory(trajectory_as_list, self.theta(), self.system)
+
+    def __str__(self):
+        return str(self.expand())
+
+
+def compact_trajectory_from_string(
+        trajectory_string: List[Union[State, Action, Output]],
+        theta: Parameter,
+        system: ParametricTransitionSystem,
+) -> CompactFiniteTrajectory:
+    """
+    compact_traj = compact_trajectory_from_string(trajectory_string, theta, system)
+    Description:
+        Creates a CompactFiniteTrajectory from the same kind of list that FiniteTrajectory accepts
+        (state, output, action, state, output, ...). The names are converted with the system's name -> index maps.
+    :param trajectory_string:
+    :param theta:
+    :param system:
+    :return:
+    """
+    # Input Processing
+    assert len(trajectory_string) % 3 == 2, f"Trajectory should have 3n+2 entries, but found {len(trajectory_string)}!"
+    assert theta in system.Theta, f"Parameter {theta} is not in parameter space!"
+
+    # Algorithm
+    return CompactFiniteTrajectory(
+        names_to_indices(system, "S", trajectory_string[0::3]),
+        names_to_indices(system, "Act", trajectory_string[2::3]),
+        names_to_indices(system, "Y", trajectory_string[1::3]),
+        system.Theta.index(theta),
+        system,
+    )
+
 
 class InfiniteTrajectory:
     """
@@ -147,9 +261,12 @@ class InfiniteTrajectory:
         return np.inf
 
     def trace(self):
-        trace_prefix_as_list = [self.system.L(s) for s in self.prefix_states]
-        trace_suffix_as_list = [self.system.L(s) for s in self.suffix_states]
-        return InfiniteTrace(trace_prefix_as_list, trace_suffix_as_list, self.system)
+        L_matrix = label_matrix(self.system)
+        return LazyInfiniteTrace(
+            L_matrix[names_to_indices(self.system, "S", self.prefix_states)],
+            L_matrix[names_to_indices(self.system, "S", self.suffix_states)],
+            self.system,
+        )
 
 
 def decompose_string_into_states_actions_and_outputs(
@@ -0,0 +1,47 @@
+"""
+shared.py
+Description:
+    A process-wide cache of frozen systems (e.g., the Sadra grid world or the beverage vending machine). Every call with
+    the same builder and arguments returns the same read-only instance, so the system is only built once per process.
+"""
+
+import inspect
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# Constants
+_shared_systems: Dict[Tuple[Hashable, ...], Any] = {}
+_shared_systems_lock = threading.Lock()
+
+
+def shared_system(builder: Callable[..., Any], *args, **kwargs):
+    """
+    system = shared_system(builder, *args, **kwargs)
+    Description:
+        Returns builder(*args, **kwargs).freeze(), building the system only the first time that it is requested. The
+        cache is keyed by the builder and its bound arguments (with the defaults filled in), so
+        shared_system(SadraSystem) and shared_system(SadraSystem, n_cols=15) return the same instance.
+    :param builder: A system class or a function that returns a system (with hashable arguments).
+    :return:
+    """
+    # Constants
+    bound_arguments = inspect.signature(builder).bind(*args, **kwargs)
+    bound_arguments.apply_defaults()
+    key = (builder, tuple(bound_arguments.arguments.items()))
+
+    # Algorithm
+    with _shared_systems_lock:
+        if key not in _shared_systems:
+            _shared_systems[key] = builder(*bound_arguments.args, **bound_arguments.kwargs).freeze()
+
+        return _shared_systems[key]
+
+
+def clear_shared_systems():
+    """
+    clear_shared_systems()
+    Description:
+        Forgets every shared system (e.g., to release their memory). Later calls to shared_system build new instances.
+    """
+    with _shared_systems_lock:
+        _shared_systems.clear()
@@ -0,0 +1,115 @@
+"""
+transport.py
+Description:
+    Sends a frozen system to other processes without copying its integer arrays. share_system places the arrays of the
+    system (e.g., transitions, labels and output_map) and the arrays of its cached indexes (e.g., successor_csr or
+    sampling_tables) in one shared memory block; the small picklable handle that it returns holds the name tables and
+    the layout of the block. attach_system rebuilds a frozen system whose arrays are read-only views of the block, so
+    any number of worker processes share a single copy of the arrays.
+"""
+
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from kltl.serialization import BufferAlignment
+
+# Constants
+ArrayTag, TupleTag, ValueTag = "a", "t", "v"
+
+
+def share_system(system) -> Tuple[Dict[str, Any], List[shared_memory.SharedMemory]]:
+    """
+    handle, blocks = share_system(system)
+    Description:
+        Places the arrays of system.freeze() (and of the indexes that it has computed) in a shared memory block. The
+        handle can be pickled and used (with attach_system) to rebuild the system in another process. Arrays that are
+        the same object in the system (e.g., the successors of successor_csr and sampling_tables) are shared once.
+        The caller owns the blocks and must close and unlink them when the other processes are done.
+    :param system: Any of the systems in this package.
+    :return:
+    """
+    # Constants
+    snapshot = system.freeze()
+    attribute_names = {id(value): name for (name, value) in snapshot.__dict__.items()}
+    arrays, array_ids = [], {}
+
+    def encode(value):
+        if isinstance(value, np.ndarray):
+            if id(value) not in array_ids:
+                array_ids[id(value)] = len(arrays)
+                arrays.append(np.ascontiguousarray(value))
+            return ArrayTag, array_ids[id(value)]
+        if isinstance(value, tuple) and any(isinstance(element, np.ndarray) for element in value):
+            return TupleTag, [encode(element) for element in value]
+        return ValueTag, value
+
+    # Algorithm
+    attributes = {
+        name: encode(value) for (name, value) in snapshot.__dict__.items() if name != "_index_cache"
+    }
+
+    indexes = {}
+    for (name, (sources, lengths, index)) in snapshot.__dict__.get("_index_cache", {}).items():
+        if not all(id(src) in attribute_names for src in sources):
+            continue
+        if not (isinstance(index, (np.ndarray, tuple, str))):
+            continue  # e.g., the name maps, which attach_system recomputes
+        indexes[name] = ([attribute_names[id(src)] for src in sources], lengths, encode(index))
+
+    offsets = np.zeros((len(arrays) + 1,), dtype=int)
+    for (k, array) in enumerate(arrays):
+        offsets[k + 1] = -(-(offsets[k] + array.nbytes) // BufferAlignment) * BufferAlignment
+
+    block = shared_memory.SharedMemory(create=True, size=max(int(offsets[-1]), 1))
+    for (array, offset) in zip(arrays, offsets):
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, offset=offset)[...] = array
+
+    handle = {
+        "class": type(snapshot),
+        "attributes": attributes,
+        "indexes": indexes,
+        "block": block.name,
+        "arrays": [(int(offset), array.shape, array.dtype.str) for (array, offset) in zip(arrays, offsets)],
+    }
+
+    return handle, [block]
+
+
+def attach_system(handle: Dict[str, Any]) -> Tuple[Any, List[shared_memory.SharedMemory]]:
+    """
+    system, blocks = attach_system(handle)
+    Description:
+        Rebuilds a system that was shared with share_system. The system is frozen and its arrays (and the arrays of its
+        indexes) are read-only views of the shared memory block, so the block must be kept alive for as long as the
+        system is used. Indexes that were not shared are computed again.
+    :param handle:
+    :return:
+    """
+    # Constants
+    block = shared_memory.SharedMemory(name=handle["block"])
+    arrays = []
+    for (offset, shape, dtype) in handle["arrays"]:
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+        array.setflags(write=False)
+        arrays.append(array)
+
+    def decode(encoded):
+        tag, value = encoded
+        if tag == ArrayTag:
+            return arrays[value]
+        if tag == TupleTag:
+            return tuple(decode(element) for element in value)
+        return value
+
+    # Algorithm
+    system = handle["class"].__new__(handle["class"])
+    system.__dict__.update({name: decode(encoded) for (name, encoded) in handle["attributes"].items()})
+    system.__dict__["_index_cache"] = {
+        name: (tuple(system.__dict__[src] for src in source_names), lengths, decode(index))
+        for (name, (source_names, lengths, index)) in handle["indexes"].items()
+    }
+    system.seal_indexes()
+
+    return system, [block]
@@ -1,16 +1,16 @@
 from .transition_system import TransitionSystem
-from .beverage import get_beverage_vending_machine
+from .beverage import get_beverage_vending_machine, shared_beverage_vending_machine
 from .traces import (
-    FiniteTrace, InfiniteTrace
+    FiniteTrace, InfiniteTrace, LazyFiniteTrace, LazyInfiniteTrace,
 )
 from .trajectory import (
     create_random_trajectory_with_N_actions,
-    FiniteTrajectory, InfiniteTrajectory,
+    FiniteTrajectory, InfiniteTrajectory, CompactFiniteTrajectory,
 )
 
 __all__ = [
     "TransitionSystem",
-    "get_beverage_vending_machine",
-    "create_random_trajectory_with_N_actions", "FiniteTrajectory", "InfiniteTrajectory",
-    "FiniteTrace", "InfiniteTrace",
+    "get_beverage_vending_machine", "shared_beverage_vending_machine",
+    "create_random_trajectory_with_N_actions", "FiniteTrajectory", "InfiniteTrajectory", "CompactFiniteTrajectory",
+    "FiniteTrace", "InfiniteTrace", "LazyFiniteTrace", "LazyInfiniteTrace",
 ]
\ No newline at end of file
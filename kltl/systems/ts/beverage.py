@@ -1,9 +1,10 @@
 
 from kltl.systems.ts import TransitionSystem
+from kltl.systems.shared import shared_system
 
 def get_beverage_vending_machine():
     """
-    Returns a beverage vending machine transition system.
+    Returns a new beverage vending machine transition system (that can be modified).
     :return:
     """
     # Constants
@@ -39,3 +40,11 @@ def get_beverage_vending_machine():
         ts.add_label(*label)
 
     return ts
+
+def shared_beverage_vending_machine():
+    """
+    Returns the (frozen) beverage vending machine transition system, which is built once per process and shared by every
+    caller. See get_beverage_vending_machine.
+    :return:
+    """
+    return shared_system(get_beverage_vending_machine)
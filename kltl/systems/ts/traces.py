@@ -5,10 +5,12 @@ Description:
 """
 
 from typing import List, Tuple, Union
+import numpy as np
+
 from kltl.types import AtomicProposition
 
 from kltl.systems.ts import TransitionSystem
-from kltl.grammar.ltl_semantics import evaluate, LTLFormula
+from kltl.grammar.ltl_semantics import evaluate, evaluate_lasso, LTLFormula
 
 class FiniteTrace:
     """
@@ -60,4 +62,97 @@ class InfiniteTrace:
             idx = idx % len(self.repeating_suffix)
 
             # Return the element in the repeating suffix
-            return self.states[idx]
\ No newline at end of file
+            return self.repeating_suffix[idx]
+
+    def satisfies(self, formula: Union[AtomicProposition, LTLFormula]):
+        """
+        satisfied = trace.satisfies(formula)
+        Description:
+            Evaluates the formula on the infinite trace (with the semantics of infinite words).
+            The repeating suffix is never unrolled.
+        :param formula:
+        :return:
+        """
+        return evaluate_lasso(formula, self.prefix, self.repeating_suffix)
+
+
+class LazyFiniteTrace(FiniteTrace):
+    """
+    LazyFiniteTrace
+    Description:
+        A finite trace that is stored as a boolean matrix with one row per time step and one column per atomic
+        proposition of the system. The lists of atomic propositions are only created when they are requested.
+    """
+    def __init__(self, label_rows: np.ndarray, system: TransitionSystem):
+        # Input Processing
+        assert label_rows.shape[0] > 0
+
+        self.label_rows = label_rows
+        self.system = system
+        self._trace_list = None
+
+    @property
+    def trace_list(self) -> List[List[AtomicProposition]]:
+        if self._trace_list is None:
+            self._trace_list = [self.labels_in_row(row) for row in self.label_rows]
+        return self._trace_list
+
+    def __len__(self):
+        return self.label_rows.shape[0]
+
+    def __getitem__(self, idx):
+        assert idx >= 0 and idx < len(self), f"Index {idx} is out of bounds for trace of length {len(self)}!"
+        return self.labels_in_row(self.label_rows[idx])
+
+    def labels_in_row(self, row: np.ndarray) -> List[AtomicProposition]:
+        return [self.system.AP[ap_index] for ap_index in np.flatnonzero(row)]
+
+    def holds(self, ap: AtomicProposition) -> np.ndarray:
+        """
+        ap_holds = trace.holds(ap)
+        Description:
+            Boolean array whose k-th entry says whether ap is in the k-th element of the trace.
+        :param ap:
+        :return:
+        """
+        assert ap in self.system.AP, f"Proposition {ap} is not in atomic proposition space!"
+        return self.label_rows[:, self.system.AP.index(ap)]
+
+
+class LazyInfiniteTrace(InfiniteTrace):
+    """
+    LazyInfiniteTrace
+    Description:
+        An infinite trace (prefix followed by an infinitely repeating suffix) stored as two boolean matrices, like
+        LazyFiniteTrace.
+    """
+    def __init__(self, prefix_rows: np.ndarray, suffix_rows: np.ndarray, system: TransitionSystem):
+        # Input Processing
+        assert suffix_rows.shape[0] > 0
+
+        self.prefix_rows, self.suffix_rows = prefix_rows, suffix_rows
+        self.system = system
+        self._prefix, self._repeating_suffix = None, None
+
+    @property
+    def prefix(self) -> List[List[AtomicProposition]]:
+        if self._prefix is None:
+            self._prefix = [self.labels_in_row(row) for row in self.prefix_rows]
+        return self._prefix
+
+    @property
+    def repeating_suffix(self) -> List[List[AtomicProposition]]:
+        if self._repeating_suffix is None:
+            self._repeating_suffix = [self.labels_in_row(row) for row in self.suffix_rows]
+        return self._repeating_suffix
+
+    def __getitem__(self, idx):
+        assert idx >= 0, f"Index must be nonnegative; received {idx}"
+        if idx < self.prefix_rows.shape[0]:
+            return self.labels_in_row(self.prefix_rows[idx])
+        else:
+            return self.labels_in_row(self.suffix_rows[(idx - self.prefix_rows.shape[0]) % self.suffix_rows.shape[0]])
+
+    def labels_in_row(self, row: np.ndarray) -> List[AtomicProposition]:
+        return [self.system.AP[ap_index] for ap_index in np.flatnonzero(row)]
+
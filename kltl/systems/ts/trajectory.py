@@ -7,9 +7,10 @@ Description:
 from typing import List, Tuple, Union
 import numpy as np
 
-from kltl.systems.ts import FiniteTrace, InfiniteTrace
+from kltl.systems.ts.traces import FiniteTrace, InfiniteTrace, LazyFiniteTrace, LazyInfiniteTrace
 from kltl.types import State, Action, AtomicProposition, Transition
 from kltl.systems.ts import TransitionSystem
+from kltl.systems.graph_utils import names_to_indices, label_matrix
 
 class FiniteTrajectory:
     def __init__(self, trajectory_string: List[Union[State, Action]], system: TransitionSystem):
@@ -40,8 +41,87 @@ class FiniteTrajectory:
         return len(self.states)
 
     def trace(self):
-        trace_as_list = [self.system.L(s) for s in self.states]
-        return FiniteTrace(trace_as_list, self.system)
+        state_indices = names_to_indices(self.system, "S", self.states)
+        return LazyFiniteTrace(label_matrix(self.system)[state_indices], self.system)
+
+    def compact(self) -> 'CompactFiniteTrajectory':
+        """
+        compact_traj = traj.compact()
+        Description:
+            Converts the trajectory into a CompactFiniteTrajectory.
+        :return:
+        """
+        return CompactFiniteTrajectory(
+            names_to_indices(self.system, "S", self.states),
+            names_to_indices(self.system, "Act", self.actions),
+            self.system,
+        )
+
+class CompactFiniteTrajectory:
+    """
+    CompactFiniteTrajectory
+    Description:
+        A finite trajectory that stores the indices of its states and actions in int32 arrays (instead of
+        lists of strings). Names are only looked up when s() or a() are called.
+    """
+    __slots__ = ("states", "actions", "system")
+
+    def __init__(self, states: np.ndarray, actions: np.ndarray, system: TransitionSystem):
+        # Input Processing
+        assert len(states) > 0
+        assert len(states) == len(actions) + 1, f"Expected {len(states) - 1} actions, but found {len(actions)}!"
+
+        self.states = np.asarray(states, dtype=np.int32)
+        self.actions = np.asarray(actions, dtype=np.int32)
+        self.system = system
+
+    def s(self, state_idx: int) -> State:
+        assert (state_idx >= 0) and (state_idx < len(self.states)), f"There are only {len(self.states)} states, but user tried to access {state_idx} state!"
+        return self.system.S[self.states[state_idx]]
+
+    def a(self, action_idx: int) -> Action:
+        assert (action_idx >= 0) and (action_idx < len(self.actions)), \
+            f"There are only {len(self.actions)} actions, but user tried to access {action_idx} action!"
+        return self.system.Act[self.actions[action_idx]]
+
+    def __len__(self):
+        return len(self.states)
+
+    def trace(self):
+        return LazyFiniteTrace(label_matrix(self.system)[self.states], self.system)
+
+    def expand(self) -> FiniteTrajectory:
+        """
+        traj = compact_traj.expand()
+        Description:
+            Converts the trajectory back into a FiniteTrajectory (with lists of strings).
+        :return:
+        """
+        trajectory_as_list = [self.s(0)]
+        for k in range(len(self.actions)):
+            trajectory_as_list += [self.a(k), self.s(k + 1)]
+
+        return FiniteTrajectory(trajectory_as_list, self.system)
+
+def compact_trajectory_from_string(trajectory_string: List[Union[State, Action]], system: TransitionSystem) -> CompactFiniteTrajectory:
+    """
+    compact_traj = compact_trajectory_from_string(trajectory_string, system)
+    Description:
+        Creates a CompactFiniteTrajectory from the same kind of list that FiniteTrajectory accepts
+        (state, action, state, ...). The names are converted with the system's name -> index maps.
+    :param trajectory_string:
+    :param system:
+    :return:
+    """
+    # Input Processing
+    assert len(trajectory_string) % 2 == 1, f"Trajectory should have an odd number of entries, but found {len(trajectory_string)}!"
+
+    # Algorithm
+    return CompactFiniteTrajectory(
+        names_to_indices(system, "S", trajectory_string[0::2]),
+        names_to_indices(system, "Act", trajectory_string[1::2]),
+        system,
+    )
 
 class InfiniteTrajectory:
     """
@@ -101,9 +181,12 @@ class InfiniteTrajectory:
         return np.inf
 
     def trace(self):
-        trace_prefix_as_list = [self.system.L(s) for s in self.prefix_states]
-        trace_suffix_as_list = [self.system.L(s) for s in self.suffix_states]
-        return InfiniteTrace(trace_prefix_as_list, trace_suffix_as_list, self.system)
+        L_matrix = label_matrix(self.system)
+        return LazyInfiniteTrace(
+            L_matrix[names_to_indices(self.system, "S", self.prefix_states)],
+            L_matrix[names_to_indices(self.system, "S", self.suffix_states)],
+            self.system,
+        )
 
 def decompose_string_into_states_and_actions(trajectory_as_string: str, system: TransitionSystem)->Tuple[List[State],List[Action]]:
     """
@@ -4,14 +4,18 @@ Description:
     A transition system for the robot motion planning example.
 """
 
-from typing import List, Set, Tuple
+from typing import FrozenSet, List, Set, Tuple
 import networkx as nx
 import numpy as np
 
+from kltl.automata import DeterministicRabinAutomaton
 from kltl.systems.graph_utils import transition_matrix2adjacency_matrix
+from kltl.systems.products import product_components
+from kltl.serialization import BinarySerializable
+from kltl.systems.frozen import FreezableSystem
 from kltl.types import State, Action, AtomicProposition, Transition
 
-class TransitionSystem(object):
+class TransitionSystem(FreezableSystem, BinarySerializable):
     def __init__(
             self,
             S: List[State], Act: List[Action], AP: List[AtomicProposition],
@@ -148,4 +152,36 @@ class TransitionSystem(object):
                 self.find_action_sequence_that_explains_state_sequence(state_sequence[:2]),
                 self.find_action_sequence_that_explains_state_sequence(state_sequence[1:])
             )
-            return action_sequence
\ No newline at end of file
+            return action_sequence
+
+    def product(
+            self,
+            automaton: DeterministicRabinAutomaton,
+            letters: Tuple[List[FrozenSet[AtomicProposition]], np.ndarray] = None,
+            n_workers: int = 1,
+            shard_size: int = 1 << 18,
+    ) -> 'TransitionSystem':
+        """
+        product_ts = ts.product(automaton)
+        Description:
+            Creates the product of the transition system and an automaton, exactly like AdaptiveTransitionSystem.product:
+            the product state (s, q) has index S.index(s) * len(automaton.Q) + automaton.Q.index(q), it is labeled with
+            q, and ((s, q), a, (t, p)) is a transition when (s, a, t) is a transition of the system and the automaton
+            moves from q to p when reading the labels of t.
+        :param automaton:
+        :param letters: The result of label_letters(ts) (if None, the cached value is used).
+        :param n_workers: See AdaptiveTransitionSystem.product.
+        :param shard_size:
+        :return:
+        """
+        # Input Processing
+        assert isinstance(automaton, DeterministicRabinAutomaton), f"Input {automaton} is not a DeterministicRabinAutomaton!"
+
+        # Algorithm
+        S_prime, I_prime, transitions_prime, labels_prime = product_components(
+            self, automaton, letters, n_workers=n_workers, shard_size=shard_size,
+        )
+
+        return TransitionSystem(
+            S_prime, self.Act, automaton.Q, I=I_prime, transitions=transitions_prime, labels=labels_prime,
+        )
@@ -0,0 +1,7 @@
+from .statistical_model_checking import (
+    SMCResult, estimate_probability, sequential_probability_ratio_test,
+)
+
+__all__ = [
+    "SMCResult", "estimate_probability", "sequential_probability_ratio_test",
+]
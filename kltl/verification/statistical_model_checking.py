@@ -0,0 +1,206 @@
+"""
+statistical_model_checking.py
+Description:
+    Statistical model checking (SMC) of temporal logic formulae on the trajectories of a parametric transition system.
+    Trajectories are drawn in batches and the sampling stops as soon as the requested confidence is reached.
+"""
+
+import os
+import time
+from typing import Callable, Union
+import numpy as np
+
+from kltl.grammar.kltl_semantics import KLTLFormula
+from kltl.types import AtomicProposition
+from kltl.systems.pts.parametric_transition_system import ParametricTransitionSystem
+from kltl.systems.pts.rollouts import RolloutRunner, TraceFormulaEvaluator
+from kltl.systems.pts.sampling import TrajectoryBatch, sample_trajectories
+
+
+class SMCResult:
+    """
+    SMCResult
+    Description:
+        The outcome of a statistical model checking query.
+        - estimate is the fraction of sampled trajectories that satisfied the formula,
+        - n_samples and n_satisfied are the number of trajectories drawn and the number that satisfied the formula,
+        - wall_time is the time (in seconds) spent sampling and evaluating,
+        - decision is the result of a hypothesis test (None for estimation queries),
+        - half_width is the half width of the confidence interval around estimate (None for hypothesis tests).
+    """
+    def __init__(
+            self,
+            n_samples: int,
+            n_satisfied: int,
+            wall_time: float,
+            confidence: float,
+            decision: bool = None,
+            half_width: float = None,
+    ):
+        self.n_samples = n_samples
+        self.n_satisfied = n_satisfied
+        self.estimate = n_satisfied / n_samples
+        self.wall_time = wall_time
+        self.confidence = confidence
+        self.decision = decision
+        self.half_width = half_width
+
+    def __str__(self):
+        result_as_str = f"SMC Result:\nEstimate: {self.estimate}\nSamples: {self.n_samples}\nWall time: {self.wall_time} s"
+        if self.decision is not None:
+            result_as_str += f"\nDecision: {self.decision}"
+        if self.half_width is not None:
+            result_as_str += f"\nConfidence interval: {self.estimate} +/- {self.half_width} (confidence {self.confidence})"
+        return result_as_str
+
+
+def okamoto_bound(epsilon: float, delta: float) -> int:
+    """
+    n = okamoto_bound(epsilon, delta)
+    Description:
+        Number of samples after which the Chernoff-Hoeffding bound guarantees |estimate - p| <= epsilon with probability
+        at least 1 - delta.
+    :return:
+    """
+    return int(np.ceil(np.log(2.0 / delta) / (2.0 * epsilon ** 2)))
+
+
+def estimate_probability(
+        system: ParametricTransitionSystem,
+        formula: Union[AtomicProposition, KLTLFormula],
+        N: int,
+        epsilon: float = 0.01,
+        delta: float = 0.05,
+        batch_size: int = 1000,
+        generate: Callable[[ParametricTransitionSystem, int, int, np.random.Generator], TrajectoryBatch] = sample_trajectories,
+        n_workers: int = 1,
+        seed: int = None,
+) -> SMCResult:
+    """
+    result = estimate_probability(system, formula, N, epsilon=0.01, delta=0.05)
+    Description:
+        Estimates the probability that a trajectory with N actions satisfies the formula, so that the estimate is within
+        epsilon of the true probability with probability at least 1 - delta.
+        After each batch, an empirical Bernstein interval (with the confidence split over the batches) is computed and the
+        sampling stops once its half width is at most epsilon. This stops early when the probability is close to 0 or 1.
+        The sampling never goes past the (non adaptive) Chernoff-Hoeffding sample size.
+        Each of the two bounds uses half of delta.
+    :param system: The parametric transition system.
+    :param formula: The formula to check on the trace of each trajectory.
+    :param N: Number of actions in each trajectory.
+    :param epsilon: Desired accuracy.
+    :param delta: 1 - delta is the desired confidence.
+    :param batch_size: Number of trajectories drawn before each stopping check.
+    :param generate: Function with the signature of sample_trajectories that creates each batch.
+    :param n_workers: Number of worker processes (see RolloutRunner). Each batch is split into n_workers shards, so the
+        samples (for a given seed) depend on n_workers.
+    :param seed: Seed for the random streams.
+    :return:
+    """
+    # Input Processing
+    assert (epsilon > 0) and (epsilon < 1), f"epsilon must be in (0, 1), but received {epsilon}!"
+    assert (delta > 0) and (delta < 1), f"delta must be in (0, 1), but received {delta}!"
+
+    # Constants
+    n_max = okamoto_bound(epsilon, delta / 2.0)
+    evaluator = TraceFormulaEvaluator(formula)
+    batch_seeds = np.random.SeedSequence(seed)
+    n_shards = (os.cpu_count() or 1) if n_workers is None else n_workers
+
+    # Algorithm
+    start_time = time.time()
+    n_samples, n_satisfied, half_width = 0, 0, 1.0
+    with RolloutRunner(system, n_workers=n_workers) as runner:
+        for k in range(1, n_max + 1):
+            B = min(batch_size, n_max - n_samples)
+            shard_size = max(1, int(np.ceil(B / n_shards)))
+            results = runner.run(B, N, evaluator, generate=generate, shard_size=shard_size, seed=batch_seeds.spawn(1)[0])
+            n_samples += len(results)
+            n_satisfied += int(np.sum(results.values))
+
+            if n_samples >= n_max:
+                half_width = epsilon
+                break
+
+            # Empirical Bernstein bound (with delta_k = (delta / 2) / (k (k + 1)), so that the union over k is delta / 2)
+            p_hat = n_satisfied / n_samples
+            log_term = np.log(3.0 / (delta / 2.0 / (k * (k + 1))))
+            half_width = np.sqrt(2.0 * p_hat * (1.0 - p_hat) * log_term / n_samples) + 3.0 * log_term / n_samples
+            if half_width <= epsilon:
+                break
+
+    return SMCResult(n_samples, n_satisfied, time.time() - start_time, 1.0 - delta, half_width=half_width)
+
+
+def sequential_probability_ratio_test(
+        system: ParametricTransitionSystem,
+        formula: Union[AtomicProposition, KLTLFormula],
+        N: int,
+        theta: float,
+        indifference: float = 0.01,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+        batch_size: int = 1000,
+        max_samples: int = 10 ** 7,
+        generate: Callable[[ParametricTransitionSystem, int, int, np.random.Generator], TrajectoryBatch] = sample_trajectories,
+        n_workers: int = 1,
+        seed: int = None,
+) -> SMCResult:
+    """
+    result = sequential_probability_ratio_test(system, formula, N, theta=0.9)
+    Description:
+        Uses Wald's sequential probability ratio test to decide whether the probability p that a trajectory with N
+        actions satisfies the formula is at least theta. The hypotheses
+            H0: p >= theta + indifference   and   H1: p <= theta - indifference
+        are tested with type I error alpha and type II error beta. result.decision is True if H0 is accepted.
+        The trajectories of each batch are used one at a time, so n_samples is the exact number used by the test.
+    :param system: The parametric transition system.
+    :param formula: The formula to check on the trace of each trajectory.
+    :param N: Number of actions in each trajectory.
+    :param theta: Probability threshold.
+    :param indifference: Half width of the indifference region around theta.
+    :param alpha: Probability of rejecting H0 when it is true.
+    :param beta: Probability of accepting H0 when H1 is true.
+    :param batch_size: Number of trajectories drawn at once.
+    :param max_samples: The test gives up (with decision None) after this many trajectories.
+    :param generate: Function with the signature of sample_trajectories that creates each batch.
+    :param n_workers: Number of worker processes (see RolloutRunner). Each batch is split into n_workers shards, so the
+        samples (for a given seed) depend on n_workers.
+    :param seed: Seed for the random streams.
+    :return:
+    """
+    # Input Processing
+    p0, p1 = theta + indifference, theta - indifference
+    assert (p1 > 0) and (p0 < 1), f"The indifference region ({p1}, {p0}) must be inside (0, 1)!"
+
+    # Constants
+    log_accept_h1, log_accept_h0 = np.log((1.0 - beta) / alpha), np.log(beta / (1.0 - alpha))
+    log_ratio_satisfied, log_ratio_violated = np.log(p1 / p0), np.log((1.0 - p1) / (1.0 - p0))
+    evaluator = TraceFormulaEvaluator(formula)
+    batch_seeds = np.random.SeedSequence(seed)
+    n_shards = (os.cpu_count() or 1) if n_workers is None else n_workers
+
+    # Algorithm
+    start_time = time.time()
+    n_samples, n_satisfied, log_ratio, decision = 0, 0, 0.0, None
+    with RolloutRunner(system, n_workers=n_workers) as runner:
+        while (decision is None) and (n_samples < max_samples):
+            B = min(batch_size, max_samples - n_samples)
+            shard_size = max(1, int(np.ceil(B / n_shards)))
+            satisfied = runner.run(
+                B, N, evaluator, generate=generate, shard_size=shard_size, seed=batch_seeds.spawn(1)[0],
+            ).values
+
+            # Log likelihood ratio after each trajectory of the batch
+            log_ratios = log_ratio + np.cumsum(np.where(satisfied, log_ratio_satisfied, log_ratio_violated))
+            crossed = np.argwhere((log_ratios >= log_accept_h1) | (log_ratios <= log_accept_h0)).flatten()
+
+            n_used = B if len(crossed) == 0 else crossed[0] + 1
+            n_samples += n_used
+            n_satisfied += int(np.sum(satisfied[:n_used]))
+            log_ratio = log_ratios[n_used - 1]
+
+            if len(crossed) > 0:
+                decision = bool(log_ratio <= log_accept_h0)
+
+    return SMCResult(n_samples, n_satisfied, time.time() - start_time, 1.0 - max(alpha, beta), decision=decision)
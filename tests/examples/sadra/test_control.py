@@ -0,0 +1,52 @@
+"""
+test_control.py
+Description:
+    Smoke test of the controller synthesis pipeline in examples/sadra/control.py.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from examples.sadra import control
+from kltl.systems.pts.sadra import get_sadra_system
+
+
+class TestSadraControl(unittest.TestCase):
+    def test_main1(self):
+        """
+        test_main1
+        Description:
+            Runs main on a small sadra system (in a temporary directory, so that the cache and the figures are not
+            written to the repository) and verifies that it plots a trajectory of the first path that it finds.
+        """
+        # Constants
+        small_sadra = get_sadra_system(n_cols=6, n_rows=6, windy_region_y_lb=2, windy_region_y_ub=4)
+        working_dir = os.getcwd()
+
+        # Algorithm
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.chdir(temp_dir)
+            try:
+                with mock.patch.object(control, "get_sadra_system", lambda: small_sadra):
+                    with contextlib.redirect_stdout(io.StringIO()) as output:
+                        control.main()
+            finally:
+                os.chdir(working_dir)
+                control.plt.close("all")
+
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, "figures", "example_reaching_traj.gif")))
+
+        self.assertIn(" - Plotted one trajectory.", output.getvalue())
+        self.assertIn("- Matching matrix is:", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+test_kltl_semantics.py
+Description:
+    Tests the evaluation of KLTL formulae.
+"""
+
+import time
+import unittest
+
+from kltl.grammar.kltl_semantics import And, Always, Eventually, Knows, Next, Not, ObservedTrace, Or, kltl_evaluate
+from kltl.systems.pts import ParametricTransitionSystem
+from kltl.systems.pts.belief import pair_outputs, pair_successors
+from kltl.systems.pts.sadra import shared_sadra_system
+
+
+def get_two_mode_system(s3_output: str = "o2") -> ParametricTransitionSystem:
+    """
+    sys = get_two_mode_system()
+    Description:
+        A small system whose parameter is revealed by the output of its second state (if s3_output is not "o2") or of
+        its third state. Only s4 (which is reached under theta1) is labeled with ap1.
+    """
+    # Constants
+    Theta = ["theta1", "theta2"]
+    sys = ParametricTransitionSystem(
+        ["s1", "s2", "s3", "s4", "s5"], ["a1"], ["ap1"],
+        I=["s1"], Y=["o1", "o2", "o3"], Theta=Theta,
+    )
+
+    sys.add_transition("s1", "a1", "theta1", "s2")
+    sys.add_transition("s1", "a1", "theta2", "s3")
+    sys.add_transition("s2", "a1", "theta1", "s4")
+    sys.add_transition("s3", "a1", "theta2", "s5")
+
+    sys.add_output("s1", Theta[0], "o1")
+    sys.add_output("s1", Theta[1], "o1")
+    sys.add_output("s2", Theta[0], "o2")
+    sys.add_output("s3", Theta[1], s3_output)
+    sys.add_output("s4", Theta[0], "o2")
+    sys.add_output("s5", Theta[1], "o3")
+
+    sys.add_label("s4", "ap1")
+
+    return sys
+
+
+class TestKLTLSemantics(unittest.TestCase):
+    def test_satisfies_knows1(self):
+        """
+        test_satisfies_knows1
+        Description:
+            Tests that the K operator is judged at the first position of the trace (with the belief after the first
+            output) and only holds once the observations rule out every state where the proposition fails.
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system()
+
+        # Test
+        self.assertFalse(kltl_evaluate(Knows("ap1"), ["o1", "o2"], sys))
+        self.assertFalse(kltl_evaluate(Knows("ap1"), ["o1", "o2", "o2"], sys))
+        self.assertTrue(kltl_evaluate(Next(Next(Knows("ap1"))), ["o1", "o2", "o2"], sys))
+        self.assertTrue(kltl_evaluate(Knows(Not("ap1")), ["o1"], sys))
+        self.assertTrue(kltl_evaluate(Knows(Or("ap1", Not("ap1"))), ["o1", "o2"], sys))
+
+    def test_satisfies_knows2(self):
+        """
+        test_satisfies_knows2
+        Description:
+            Tests K under Always and Eventually: the K operators at later positions use the outputs that were observed
+            before them (instead of filtering the suffix again from the initial states).
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system()
+
+        # Test
+        self.assertTrue(kltl_evaluate(Eventually(Knows("ap1")), ["o1", "o2", "o2"], sys))
+        self.assertFalse(kltl_evaluate(Eventually(Knows("ap1")), ["o1", "o2"], sys))
+        self.assertFalse(kltl_evaluate(Always(Not(Knows("ap1"))), ["o1", "o2", "o2"], sys))
+        self.assertTrue(kltl_evaluate(Always(Not(Knows("ap1"))), ["o1", "o2"], sys))
+        self.assertTrue(kltl_evaluate(Always(Knows(Or("ap1", Not("ap1")))), ["o1", "o2", "o2"], sys))
+
+    def test_satisfies_knows3(self):
+        """
+        test_satisfies_knows3
+        Description:
+            Tests temporal operators inside K: they are checked on every run that is consistent with the outputs
+            observed so far (and not with the later ones).
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system(s3_output="o3")
+
+        # Test
+        self.assertFalse(kltl_evaluate(Knows(Eventually("ap1")), ["o1", "o2", "o2"], sys))
+        self.assertTrue(kltl_evaluate(Next(Knows(Eventually("ap1"))), ["o1", "o2", "o2"], sys))
+        self.assertFalse(kltl_evaluate(Next(Knows("ap1")), ["o1", "o2", "o2"], sys))
+        self.assertTrue(kltl_evaluate(Next(Knows(Next("ap1"))), ["o1", "o2", "o2"], sys))
+        self.assertTrue(kltl_evaluate(Next(Knows(Always(Not("ap1")))), ["o1", "o3", "o3"], sys))
+
+    def test_satisfies_knows4(self):
+        """
+        test_satisfies_knows4
+        Description:
+            Tests nested K operators, both directly nested (K K phi is K phi) and under a temporal operator (the inner K
+            uses the outputs of each run).
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system(s3_output="o3")
+        outputs = ["o1", "o2", "o2"]
+
+        # Test
+        for k in range(3):
+            trace = ObservedTrace(sys, outputs)[k:]
+            self.assertEqual(
+                kltl_evaluate(Knows(Knows(Eventually("ap1"))), trace, sys),
+                kltl_evaluate(Knows(Eventually("ap1")), trace, sys),
+            )
+        self.assertTrue(kltl_evaluate(Next(Knows(Not(Knows("ap1")))), outputs, sys))
+        self.assertTrue(kltl_evaluate(Next(Knows(Eventually(Knows("ap1")))), outputs, sys))
+        self.assertFalse(kltl_evaluate(Knows(Eventually(Knows("ap1"))), outputs, sys))
+
+    def test_satisfies_knows5(self):
+        """
+        test_satisfies_knows5
+        Description:
+            Tests that outputs which the system can not produce (an empty belief) give no knowledge, and that the labels
+            of an observed trace can be used outside of K.
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system()
+
+        # Test
+        self.assertFalse(kltl_evaluate(Next(Knows(Or("ap1", Not("ap1")))), ["o1", "o3"], sys))
+        self.assertTrue(kltl_evaluate(Next(Not(Knows("ap1"))), ["o1", "o3"], sys))
+
+        trace = ObservedTrace(sys, ["o1", "o2", "o2"], labels=[[], [], ["ap1"]])
+        self.assertTrue(kltl_evaluate(Eventually(And("ap1", Knows("ap1"))), trace, sys))
+        with self.assertRaises(AssertionError):
+            kltl_evaluate(Or("ap1", Knows("ap1")), ["o1", "o2"], sys)
+
+    def test_satisfies_knows6(self):
+        """
+        test_satisfies_knows6
+        Description:
+            Tests that K with temporal subformulae is checked without listing the runs of the system: on a 12 step trace
+            of the sadra system (whose number of runs grows exponentially with its length), it must finish in seconds.
+        :return:
+        """
+        # Constants
+        sys = shared_sadra_system()
+        s_index, outputs = sys.S.index(sys.I[0]), []
+        for _ in range(12):
+            outputs.append(sys.Y[pair_outputs(sys, s_index, 0)[0]])
+            s_index = int(pair_successors(sys, s_index, 0)[-1])
+
+        # Test
+        start_time = time.time()
+        self.assertTrue(kltl_evaluate(Knows(Eventually(Not("Crashed!"))), outputs, sys))
+        self.assertFalse(kltl_evaluate(Knows(Always(Not("Crashed!"))), outputs, sys))
+        self.assertTrue(kltl_evaluate(Always(Knows(Eventually(Not("Crashed!")))), outputs, sys))
+        self.assertLess(time.time() - start_time, 10.0)
+
+    def test_satisfies_always1(self):
+        """
+        test_satisfies_always1
+        Description:
+            Tests that Always checks its subformula at every position of the trace (and not only at the first one).
+        :return:
+        """
+        # Constants
+        sys = ParametricTransitionSystem(["s1"], ["a1"], ["ap1", "ap2"], I=["s1"], Y=["o1"], Theta=["theta1"])
+        trace = [["ap1"], ["ap1", "ap2"], ["ap2"]]
+
+        # Test
+        self.assertFalse(kltl_evaluate(Always("ap1"), trace, sys))
+        self.assertTrue(kltl_evaluate(Always("ap1"), trace[:2], sys))
+        self.assertTrue(kltl_evaluate(Always(Eventually("ap2")), trace, sys))
+        self.assertFalse(kltl_evaluate(Always(Eventually("ap1")), trace, sys))
+
+
+if __name__ == '__main__':
+    unittest.main()
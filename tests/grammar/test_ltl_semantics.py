@@ -0,0 +1,133 @@
+"""
+test_ltl_semantics.py
+Description:
+    Tests the evaluation of LTL formulae.
+"""
+
+import unittest
+
+from kltl.grammar.ltl_semantics import (
+    Always, Eventually, Next, Not, Until, And,
+    evaluate, evaluate_lasso, lasso_truth_values,
+)
+from kltl.systems.ts import get_beverage_vending_machine, InfiniteTrace
+
+
+class TestLassoSemantics(unittest.TestCase):
+    def test_evaluate_lasso1(self):
+        """
+        test_evaluate_lasso1
+        Description:
+            Tests "infinitely often" and "eventually always" on a suffix where the proposition alternates.
+        :return:
+        """
+        # Constants
+        prefix, suffix = [[]], [["a"], []]
+
+        self.assertTrue(evaluate_lasso(Always(Eventually("a")), prefix, suffix))
+        self.assertFalse(evaluate_lasso(Eventually(Always("a")), prefix, suffix))
+        self.assertFalse(evaluate_lasso(Always("a"), prefix, suffix))
+        self.assertTrue(evaluate_lasso(Eventually(Always(Not(And("a", Next("a"))))), prefix, suffix))
+
+    def test_evaluate_lasso2(self):
+        """
+        test_evaluate_lasso2
+        Description:
+            Tests that Until requires the second formula to eventually hold, even when the first one holds forever.
+        :return:
+        """
+        # Constants
+        prefix = [["a"], ["a"]]
+
+        self.assertTrue(evaluate_lasso(Until("a", "b"), prefix, [["b"]]))
+        self.assertFalse(evaluate_lasso(Until("a", "b"), prefix, [["a"]]))
+        self.assertTrue(evaluate_lasso(Until("a", "b"), [], [["a"], ["a"], ["b"], []]))
+        self.assertFalse(evaluate_lasso(Until("a", "b"), [], [["a"], [], ["b"]]))
+
+    def test_lasso_truth_values1(self):
+        """
+        test_lasso_truth_values1
+        Description:
+            Tests that Next at the end of the suffix wraps back to the start of the loop.
+        :return:
+        """
+        # Algorithm
+        values = lasso_truth_values(Next("a"), [["a"]], [[], ["b"], ["a"]])
+
+        self.assertEqual(list(values), [False, False, True, False])
+
+    def test_infinite_trace_satisfies1(self):
+        """
+        test_infinite_trace_satisfies1
+        Description:
+            Tests the satisfies method of an infinite trace.
+        :return:
+        """
+        # Constants
+        ts1 = get_beverage_vending_machine()
+        trace = InfiniteTrace([[]], [["paid"], ["selected"], ["dispensed"]], ts1)
+
+        self.assertTrue(trace.satisfies(Always(Eventually("dispensed"))))
+        self.assertFalse(trace.satisfies("paid"))
+        self.assertTrue(trace.satisfies(Next("paid")))
+
+
+class TestFiniteTraceSemantics(unittest.TestCase):
+    def test_satisfies_always1(self):
+        """
+        test_satisfies_always1
+        Description:
+            Tests that Always checks its subformula at every position of the trace (and not only at the first one).
+        :return:
+        """
+        # Constants
+        trace = [["a"], ["a", "b"], ["b"]]
+
+        self.assertFalse(evaluate(Always("a"), trace))
+        self.assertTrue(evaluate(Always("a"), trace[:2]))
+        self.assertTrue(evaluate(Always(Eventually("b")), trace))
+        self.assertFalse(evaluate(Always(Eventually("a")), trace))
+
+    def test_satisfies_not1(self):
+        """
+        test_satisfies_not1
+        Description:
+            Tests that Not negates its subformula (and not the formula itself) on finite traces.
+        :return:
+        """
+        # Constants
+        trace = [["a"], ["b"]]
+
+        self.assertFalse(evaluate(Not("a"), trace))
+        self.assertTrue(evaluate(Not("b"), trace))
+        self.assertTrue(evaluate(Eventually(Not("a")), trace))
+        self.assertFalse(evaluate(Always(Not("b")), trace))
+
+    def test_satisfies_until1(self):
+        """
+        test_satisfies_until1
+        Description:
+            Tests that Until is non-strict on finite traces (phi2 may hold at the first position) and that it agrees with
+            Until on lasso-shaped infinite traces whose loop does not satisfy phi2.
+        :return:
+        """
+        # Constants
+        traces = [
+            [["b"], []],
+            [["a"], ["a", "b"], []],
+            [["a"], ["a"], ["b"]],
+            [["a"], [], ["b"]],
+            [["a"], ["a"]],
+            [[], ["b"]],
+        ]
+
+        for trace in traces:
+            self.assertEqual(evaluate(Until("a", "b"), trace), evaluate_lasso(Until("a", "b"), trace, [[]]))
+
+        self.assertTrue(evaluate(Until("a", "b"), [["b"]]))
+        self.assertFalse(evaluate(Until("a", "b"), [["a"], ["a"]]))
+        self.assertTrue(evaluate(Until("a", "b"), [["a"], ["a"], ["b"]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+test_bdd.py
+Description:
+    Tests the BDD package in kltl/symbolic.
+"""
+
+import unittest
+
+import numpy as np
+
+from kltl.symbolic import BDD, FALSE, TRUE
+
+
+class TestBDD(unittest.TestCase):
+    def test_ite1(self):
+        """
+        test_ite1
+        Description:
+            Verifies that the basic operations are canonical (equal functions are the same node).
+        """
+        bdd = BDD()
+        x, y = [bdd.variable(v) for v in bdd.add_variables(2)]
+
+        self.assertEqual(bdd.conjunction(x, y), bdd.conjunction(y, x))
+        self.assertEqual(bdd.negate(bdd.negate(x)), x)
+        self.assertEqual(bdd.disjunction(x, bdd.negate(x)), TRUE)
+        self.assertEqual(bdd.conjunction(x, bdd.negate(x)), FALSE)
+        # De Morgan
+        self.assertEqual(
+            bdd.negate(bdd.conjunction(x, y)),
+            bdd.disjunction(bdd.negate(x), bdd.negate(y)),
+        )
+
+    def test_from_rows1(self):
+        """
+        test_from_rows1
+        Description:
+            Verifies that to_rows inverts from_rows and that count agrees with the number of rows.
+        """
+        bdd = BDD()
+        variables = [bdd.add_variables(3), bdd.add_variables(2)]
+        rows = np.array([[5, 1], [0, 3], [7, 0], [5, 1]])
+
+        f = bdd.from_rows(variables, rows)
+
+        self.assertTrue(np.array_equal(bdd.to_rows(f, variables), np.array([[0, 3], [5, 1], [7, 0]])))
+        self.assertEqual(bdd.count(f, variables[0] + variables[1]), 3)
+
+    def test_exists1(self):
+        """
+        test_exists1
+        Description:
+            Verifies quantification (the projection of a relation) and the relational product.
+        """
+        bdd = BDD()
+        x_variables, y_variables = bdd.add_variables(2), bdd.add_variables(2)
+        relation = bdd.from_rows([x_variables, y_variables], np.array([[0, 1], [0, 2], [3, 2]]))
+
+        projection = bdd.exists(relation, y_variables)
+        self.assertTrue(np.array_equal(bdd.to_rows(projection, [x_variables]), np.array([[0], [3]])))
+
+        X = bdd.from_rows([x_variables], np.array([[3]]))
+        image = bdd.and_exists(relation, X, x_variables)
+        self.assertTrue(np.array_equal(bdd.to_rows(image, [y_variables]), np.array([[2]])))
+
+    def test_rename1(self):
+        """
+        test_rename1
+        Description:
+            Verifies that rename swaps two blocks of variables (which does not preserve the order).
+        """
+        bdd = BDD()
+        x_variables, y_variables = bdd.add_variables(2), bdd.add_variables(2)
+        relation = bdd.from_rows([x_variables, y_variables], np.array([[0, 1], [3, 2]]))
+
+        swapped = bdd.rename(relation, {**dict(zip(x_variables, y_variables)), **dict(zip(y_variables, x_variables))})
+
+        self.assertTrue(np.array_equal(
+            bdd.to_rows(swapped, [x_variables, y_variables]),
+            np.array([[1, 0], [2, 3]]),
+        ))
+
+
+if __name__ == '__main__':
+    unittest.main()
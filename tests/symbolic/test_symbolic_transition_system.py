@@ -0,0 +1,161 @@
+"""
+test_symbolic_transition_system.py
+Description:
+    Tests the symbolic transition systems in kltl/symbolic by comparing them with the explicit systems.
+"""
+
+from itertools import chain, combinations
+import unittest
+
+import numpy as np
+
+from kltl.automata import DeterministicRabinAutomaton
+from kltl.symbolic import SymbolicTransitionSystem
+from kltl.systems.ats.pts_to_ats import pts2ats
+from kltl.systems.graph_utils import names_to_indices, reachable_state_mask
+from kltl.systems.pts.sadra import get_sadra_system
+from kltl.systems.ts import get_beverage_vending_machine
+
+
+class TestSymbolicTransitionSystem(unittest.TestCase):
+    def powerset(self, iterable):
+        s = list(iterable)
+        return chain.from_iterable(combinations(s, r) for r in range(len(s) + 1))
+
+    def test_from_transition_system1(self):
+        """
+        test_from_transition_system1
+        Description:
+            Verifies that the image, preimage and reachable states of the beverage vending machine match the explicit
+            transitions.
+        """
+        system = get_beverage_vending_machine()
+        symbolic_system = SymbolicTransitionSystem.from_transition_system(system)
+
+        self.assertEqual(symbolic_system.states(symbolic_system.initial), [(s,) for s in system.I])
+
+        pay = symbolic_system.encode(np.array([[system.S.index("pay")]]))
+        self.assertEqual(
+            set(symbolic_system.states(symbolic_system.image(pay))),
+            set((s,) for s in system.post("pay")),
+        )
+        self.assertEqual(
+            set(symbolic_system.states(symbolic_system.preimage(pay))),
+            set((system.S[s],) for (s, _, s_prime) in system.transitions if system.S[s_prime] == "pay"),
+        )
+
+        reachable = reachable_state_mask(len(system.S), system.transitions, names_to_indices(system, "S", system.I))
+        self.assertTrue(np.array_equal(
+            symbolic_system.decode(symbolic_system.reachable())[:, 0],
+            np.flatnonzero(reachable),
+        ))
+
+    def test_from_parametric_transition_system1(self):
+        """
+        test_from_parametric_transition_system1
+        Description:
+            Verifies that the parameter of a (state, parameter) pair never changes.
+        """
+        system = get_sadra_system()
+        symbolic_system = SymbolicTransitionSystem.from_parametric_transition_system(system)
+
+        self.assertEqual(symbolic_system.count(symbolic_system.initial), len(system.I) * len(system.Theta))
+        for theta_index in range(len(system.Theta)):
+            X = symbolic_system.encode(np.array([[system.S.index(system.I[0]), theta_index]]))
+            reachable = symbolic_system.decode(symbolic_system.reachable(X))
+            self.assertTrue(np.all(reachable[:, 1] == theta_index))
+
+    def test_product1(self):
+        """
+        test_product1
+        Description:
+            Verifies that the symbolic product of the Sadra ATS with an automaton has the same transitions and reachable
+            states as AdaptiveTransitionSystem.product.
+        """
+        ats = pts2ats(get_sadra_system())
+        automaton = DeterministicRabinAutomaton(
+            ["q0", "q1", "q2"], [set(elt) for elt in self.powerset(ats.AP)], ["q0"],
+        )
+        rng = np.random.default_rng(0)
+        for q in automaton.Q:
+            for sigma in automaton.Sigma:
+                automaton.add_transition(q, sigma, automaton.Q[rng.integers(len(automaton.Q))])
+
+        product_ats = ats.product(automaton)
+        symbolic_product = SymbolicTransitionSystem.from_transition_system(ats).product(automaton)
+
+        # Product states (s, q) have index s * |Q| + q
+        n_Q = len(automaton.Q)
+        transitions = symbolic_product.bdd.to_rows(
+            symbolic_product.transitions,
+            symbolic_product.current + [symbolic_product.action_variables] + symbolic_product.next,
+        )
+        transitions = np.column_stack((
+            transitions[:, 0] * n_Q + transitions[:, 1], transitions[:, 2], transitions[:, 3] * n_Q + transitions[:, 4],
+        ))
+        self.assertEqual(set(map(tuple, transitions)), set(map(tuple, product_ats.transitions)))
+
+        initial = symbolic_product.decode(symbolic_product.initial)
+        self.assertEqual(
+            set(initial[:, 0] * n_Q + initial[:, 1]),
+            set(names_to_indices(product_ats, "S", product_ats.I)),
+        )
+
+        reachable = symbolic_product.decode(symbolic_product.reachable())
+        expected = reachable_state_mask(
+            len(product_ats.S), product_ats.transitions, names_to_indices(product_ats, "S", product_ats.I),
+        )
+        self.assertEqual(set(reachable[:, 0] * n_Q + reachable[:, 1]), set(np.flatnonzero(expected)))
+
+
+    def test_from_belief_states1(self):
+        """
+        test_from_belief_states1
+        Description:
+            Verifies that the reachable belief states of the symbolic ATS and the transitions between them are those of
+            pts2ats, and that the symbolic ATS can be used in a product.
+        """
+        system = get_sadra_system(n_cols=8, n_rows=6, windy_region_y_lb=2, windy_region_y_ub=4)
+        ats = pts2ats(system)
+        symbolic_ats = SymbolicTransitionSystem.from_belief_states(system)
+
+        self.assertEqual(
+            set((s, tuple(eta)) for (s, eta) in symbolic_ats.states(symbolic_ats.initial)),
+            set((s, tuple(eta)) for (s, eta) in ats.I),
+        )
+
+        # Algorithm
+        reachable = symbolic_ats.reachable()
+        self.assertEqual(
+            set((s, tuple(eta)) for (s, eta) in symbolic_ats.states(reachable)),
+            set((s, tuple(eta)) for (s, eta) in ats.S),
+        )
+
+        transitions = symbolic_ats.bdd.to_rows(
+            symbolic_ats.bdd.conjunction(symbolic_ats.transitions, reachable),
+            symbolic_ats.current + [symbolic_ats.action_variables] + symbolic_ats.next,
+        )
+        Eta = symbolic_ats.domains[1]
+        self.assertEqual(
+            set(
+                ((system.S[s], tuple(Eta[eta])), system.Act[a], (system.S[s_prime], tuple(Eta[eta_prime])))
+                for (s, eta, a, s_prime, eta_prime) in transitions
+            ),
+            set(
+                ((ats.S[k][0], tuple(ats.S[k][1])), ats.Act[a], (ats.S[k_prime][0], tuple(ats.S[k_prime][1])))
+                for (k, a, k_prime) in ats.transitions
+            ),
+        )
+
+        automaton = DeterministicRabinAutomaton(["q0", "q1"], [set(elt) for elt in self.powerset(ats.AP)], ["q0"])
+        for sigma in automaton.Sigma:
+            automaton.add_transition("q0", sigma, "q1" if "Crashed!" in sigma else "q0")
+            automaton.add_transition("q1", sigma, "q1")
+        product_ats, symbolic_product = ats.product(automaton), symbolic_ats.product(automaton)
+        expected = reachable_state_mask(
+            len(product_ats.S), product_ats.transitions, names_to_indices(product_ats, "S", product_ats.I),
+        )
+        self.assertEqual(symbolic_product.count(symbolic_product.reachable()), int(np.sum(expected)))
+
+if __name__ == '__main__':
+    unittest.main()
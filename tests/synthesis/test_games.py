@@ -0,0 +1,259 @@
+"""
+test_games.py
+Description:
+    Tests the game solvers in kltl/synthesis/games.py.
+"""
+
+from itertools import product as cartesian_product
+import unittest
+
+import numpy as np
+
+from kltl.synthesis import (
+    NoAction, GameArena, game_arena,
+    solve_safety_game, solve_reachability_game, solve_buchi_game, solve_rabin_game,
+)
+from kltl.systems import TransitionSystem
+
+
+class TestGames(unittest.TestCase):
+    def get_random_game(self, seed: int, n_states: int = 6, n_actions: int = 2):
+        """
+        system = self.get_random_game(seed)
+        Description:
+            A random transition system in which each action of a state has one or two successors (or is missing, so some
+            states may have no outgoing transitions).
+        """
+        rng = np.random.default_rng(seed)
+        transitions = []
+        for (s, a) in cartesian_product(range(n_states), range(n_actions)):
+            if rng.random() < 0.2:
+                continue
+            for s_prime in rng.choice(n_states, size=rng.integers(1, 3), replace=False):
+                transitions.append((s, a, s_prime))
+        return TransitionSystem(
+            [f"s{k}" for k in range(n_states)], [f"a{k}" for k in range(n_actions)], [],
+            transitions=np.array(transitions, dtype=int).reshape((-1, 3)),
+        )
+
+    def strategy_graph(self, system, strategy: np.ndarray, region: np.ndarray) -> np.ndarray:
+        """
+        adjacency = self.strategy_graph(system, strategy, region)
+        Description:
+            The transitions from region that follow the strategy, as a boolean adjacency matrix.
+        """
+        adjacency = np.zeros((len(system.S), len(system.S)), dtype=bool)
+        for (s, a, s_prime) in system.transitions:
+            if region[s] and (strategy[s] == a):
+                adjacency[s, s_prime] = True
+        return adjacency
+
+    def on_cycle(self, adjacency: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+        """
+        mask = self.on_cycle(adjacency, allowed)
+        Description:
+            The allowed states that lie on a cycle of the graph restricted to allowed.
+        """
+        restricted = adjacency & allowed[:, None] & allowed[None, :]
+        closure = restricted.copy()
+        for k in range(len(adjacency)):
+            closure |= closure[:, [k]] & closure[[k], :]
+        return np.diag(closure).copy()
+
+    def wins_rabin_pair(self, system, strategy, start, finite, infinite) -> bool:
+        """
+        tf = self.wins_rabin_pair(system, strategy, start, finite, infinite)
+        Description:
+            Checks that every play from start that follows the memoryless strategy satisfies the pair (finite, infinite).
+        """
+        n = len(system.S)
+        adjacency = self.strategy_graph(system, strategy, np.ones((n,), dtype=bool))
+        if np.any(strategy[start] == NoAction):
+            return False
+
+        reachable = np.zeros((n,), dtype=bool)
+        reachable[start] = True
+        for _ in range(n):
+            reachable |= np.any(adjacency[reachable], axis=0)
+
+        # Every reachable state must have a move (no dead ends) ...
+        if np.any(reachable & ~np.any(adjacency, axis=1)):
+            return False
+        # ... no reachable cycle may visit finite, and no reachable cycle may avoid infinite.
+        if np.any(self.on_cycle(adjacency, reachable) & finite):
+            return False
+        if np.any(self.on_cycle(adjacency, reachable & ~infinite)):
+            return False
+        return True
+
+    def test_controllable_predecessor1(self):
+        """
+        test_controllable_predecessor1
+        Description:
+            Verifies that a state is a controllable predecessor only if some action keeps all of its successors in X.
+        """
+        arena = GameArena(3, 2, np.array([[0, 0, 1], [0, 0, 2], [0, 1, 1], [1, 0, 2]]))
+
+        cpre, action = arena.controllable_predecessor(np.array([False, True, False]))
+        self.assertTrue(np.array_equal(cpre, [True, False, False]))
+        self.assertEqual(action[0], 1)
+        self.assertEqual(action[2], NoAction)
+
+    def test_attractor1(self):
+        """
+        test_attractor1
+        Description:
+            Compares the counter based attractors with the fixpoints of the controllable predecessor.
+        """
+        for seed in range(20):
+            system = self.get_random_game(seed, n_states=8)
+            arena = game_arena(system)
+            rng = np.random.default_rng(400 + seed)
+            target, domain = rng.random(8) < 0.2, rng.random(8) < 0.8
+
+            # Controller
+            expected, expected_strategy = target.copy(), np.full((8,), NoAction)
+            while True:
+                cpre, action = arena.controllable_predecessor(expected)
+                layer = cpre & domain & ~expected
+                if not np.any(layer):
+                    break
+                expected_strategy[layer] = action[layer]
+                expected |= layer
+
+            A, strategy = arena.attractor(target, domain)
+            self.assertTrue(np.array_equal(A, expected))
+            self.assertTrue(np.array_equal(strategy, expected_strategy))
+
+            # Environment (the complement of the greatest fixpoint of X = ~target & CPre(X))
+            X = ~target
+            while True:
+                cpre, _ = arena.controllable_predecessor(X)
+                if np.array_equal(X & cpre, X):
+                    break
+                X &= cpre
+
+            self.assertTrue(np.array_equal(arena.environment_attractor(target), ~X))
+
+    def test_reachability1(self):
+        """
+        test_reachability1
+        Description:
+            Verifies the reach-while-avoid game on a small system where the environment can block one action.
+        """
+        system = TransitionSystem(
+            ["start", "risky", "safe", "goal", "bad"], ["left", "right"], [],
+            transitions=np.array([
+                [0, 0, 1], [0, 1, 2],
+                [1, 0, 3], [1, 0, 4],
+                [2, 0, 3],
+                [3, 0, 3], [4, 0, 4],
+            ]),
+        )
+
+        winning, strategy = solve_reachability_game(system, [3], safe=[0, 1, 2])
+
+        self.assertTrue(np.array_equal(winning, [True, False, True, True, False]))
+        self.assertEqual(system.Act[strategy[0]], "right")
+        self.assertEqual(strategy[3], NoAction)
+
+    def test_safety1(self):
+        """
+        test_safety1
+        Description:
+            Verifies that the safety game keeps the play in the safe states forever (dead ends are losing).
+        """
+        for seed in range(20):
+            system = self.get_random_game(seed)
+            safe = np.random.default_rng(100 + seed).random(len(system.S)) < 0.7
+
+            winning, strategy = solve_safety_game(system, safe)
+
+            self.assertFalse(np.any(winning & ~safe))
+            for s in np.flatnonzero(winning):
+                successors = system.transitions[
+                    (system.transitions[:, 0] == s) & (system.transitions[:, 1] == strategy[s]), 2,
+                ]
+                self.assertGreater(len(successors), 0)
+                self.assertTrue(np.all(winning[successors]))
+
+    def test_buchi1(self):
+        """
+        test_buchi1
+        Description:
+            Verifies that Buchi games agree with Rabin games whose only pair has an empty finite set, and that the
+            Buchi strategy is winning.
+        """
+        for seed in range(20):
+            system = self.get_random_game(seed)
+            accepting = np.random.default_rng(200 + seed).random(len(system.S)) < 0.4
+            empty = np.zeros((len(system.S),), dtype=bool)
+
+            winning, strategy = solve_buchi_game(system, accepting)
+            rabin_winning, _ = solve_rabin_game(system, [(empty, accepting)])
+
+            self.assertTrue(np.array_equal(winning, rabin_winning))
+            for s in np.flatnonzero(winning):
+                self.assertTrue(self.wins_rabin_pair(system, strategy, [s], empty, accepting))
+
+    def test_rabin1(self):
+        """
+        test_rabin1
+        Description:
+            Compares the winning region of one pair Rabin games with a brute force search over all memoryless
+            strategies, and checks the strategy that is returned.
+        """
+        for seed in range(15):
+            system = self.get_random_game(seed, n_states=5)
+            rng = np.random.default_rng(300 + seed)
+            finite, infinite = rng.random(5) < 0.3, rng.random(5) < 0.5
+
+            winning, strategy = solve_rabin_game(system, [(finite, infinite)])
+
+            brute_force = np.zeros((5,), dtype=bool)
+            for candidate in cartesian_product(range(len(system.Act)), repeat=5):
+                candidate = np.array(candidate)
+                for s in range(5):
+                    brute_force[s] |= self.wins_rabin_pair(system, candidate, [s], finite, infinite)
+
+            self.assertTrue(np.array_equal(winning, brute_force))
+            for s in np.flatnonzero(winning):
+                self.assertTrue(self.wins_rabin_pair(system, strategy, [s], finite, infinite))
+
+    def test_rabin2(self):
+        """
+        test_rabin2
+        Description:
+            Verifies a two pair Rabin game where each half of the system satisfies a different pair.
+        """
+        system = TransitionSystem(
+            ["s0", "s1", "s2", "s3"], ["a", "b"], [],
+            transitions=np.array([
+                [0, 0, 1], [0, 1, 2],
+                [1, 0, 1],
+                [2, 0, 3], [3, 0, 2],
+            ]),
+        )
+        pairs = [([2, 3], [1]), ([0, 1], [3])]
+
+        winning, strategy = solve_rabin_game(system, pairs)
+
+        self.assertTrue(np.all(winning))
+        self.assertTrue(np.all(strategy >= 0))
+
+        # Without the second pair, states 2 and 3 are losing
+        winning, _ = solve_rabin_game(system, pairs[:1])
+        self.assertTrue(np.array_equal(winning, [True, True, False, False]))
+
+    def test_game_arena1(self):
+        """
+        test_game_arena1
+        Description:
+            Verifies that the arena is cached on the system.
+        """
+        system = self.get_random_game(0)
+        self.assertIs(game_arena(system), game_arena(system))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,8 +6,12 @@ Description:
 import unittest
 from itertools import chain, combinations
 
+import numpy as np
+
 from kltl.automata import DeterministicRabinAutomaton
 from kltl.systems import AdaptiveTransitionSystem
+from kltl.systems.ats.pts_to_ats import pts2ats
+from kltl.systems.pts.sadra import SadraSystem
 class TestAdaptiveTransitionSystem(unittest.TestCase):
     def powerset(self, iterable):
         "powerset([1,2,3]) --> () (1,) (2,) (3,) (1,2) (1,3) (2,3) (1,2,3)"
@@ -74,6 +78,132 @@ class TestAdaptiveTransitionSystem(unittest.TestCase):
         #     print((product_ts.S[transition[0]], product_ts.Act[transition[1]], product_ts.S[transition[2]]))
         assert len(product_ts.reachable_states_from(product_ts.I)) == 4, f"Expected 4 transitions, got {len(product_ts.transitions)} transitions."
 
+    def get_traffic_light_example(self):
+        """
+        ts1, aut1 = self.get_traffic_light_example()
+        Description:
+            The traffic light system and automaton from test_product1.
+        """
+        # Create dummy transition system
+        ts1 = AdaptiveTransitionSystem(
+            ["red", "red/yellow", "green", "yellow"],
+            ["switch"],
+            ["red", "green", "yellow"],
+            I=["green"],
+        )
+        ts1.add_transition("red", "switch", "red/yellow")
+        ts1.add_transition("red/yellow", "switch", "green")
+        ts1.add_transition("green", "switch", "yellow")
+        ts1.add_transition("yellow", "switch", "red")
+
+        ts1.add_label("red", "red")
+        ts1.add_label("red/yellow", "red")
+        ts1.add_label("red/yellow", "yellow")
+        ts1.add_label("green", "green")
+        ts1.add_label("yellow", "yellow")
+
+        # Create dummy automaton
+        aut1 = DeterministicRabinAutomaton(
+            ["q0", "q1", "qF"],
+            [set(elt) for elt in self.powerset(["red", "green", "yellow"])],
+            ["q0"],
+            F=[(set(["qF"]), set(["qF"]))],
+        )
+        # Add transitions for q0
+        for sigma in aut1.Sigma:
+            if ("yellow" in sigma) and ("red" not in sigma):
+                aut1.add_transition("q0", sigma, "q1")
+            if ("red" not in sigma) and ("yellow" not in sigma):
+                aut1.add_transition("q0", sigma, "q0")
+            if "red" in sigma:
+                aut1.add_transition("q0", sigma, "qF")
+
+        # Add transitions from q1
+        for sigma in aut1.Sigma:
+            if "yellow" in sigma:
+                aut1.add_transition("q1", sigma, "q1")
+            else:
+                aut1.add_transition("q1", sigma, "q0")
+
+        return ts1, aut1
+
+    def test_product2(self):
+        """
+        test_product2
+        Description:
+            Tests that the product contains exactly the transitions ((s, q), a, (t, p)) where the automaton reads the
+            labels of t, and that reusing the letter index or the reachable skeleton does not change it.
+        :return:
+        """
+        # Constants
+        ts1, aut1 = self.get_traffic_light_example()
+        ts1.add_transition("red", "switch", "red")
+
+        # Algorithm
+        product_ts = ts1.product(aut1)
+
+        expected_transitions = set()
+        for (s, a, t) in ts1.transitions:
+            for (q, sigma, p) in aut1.transitions:
+                if aut1.Sigma[sigma] == set(ts1.L(ts1.S[t])):
+                    expected_transitions.add((s * len(aut1.Q) + q, a, t * len(aut1.Q) + p))
+
+        self.assertEqual(set(map(tuple, product_ts.transitions)), expected_transitions)
+        self.assertEqual(product_ts.S[5], ("red/yellow", "qF"))
+        self.assertEqual(product_ts.L(("red/yellow", "qF")), ["qF"])
+        self.assertEqual(product_ts.I, [("green", "q0")])
+
+        letters = ts1.label_letters()
+        self.assertEqual(len(letters[0]), 4)
+        self.assertTrue(np.array_equal(ts1.product(aut1, letters=letters).transitions, product_ts.transitions))
+        self.assertTrue(np.array_equal(ts1.product(aut1, reachable_only=True).transitions, product_ts.transitions))
+
+    def test_reachable_skeleton1(self):
+        """
+        test_reachable_skeleton1
+        Description:
+            Tests that transitions leaving unreachable states are not part of the reachable skeleton.
+        :return:
+        """
+        # Constants
+        ts1, aut1 = self.get_traffic_light_example()
+        ts1.I = ["yellow"]
+        ts1.transitions = ts1.transitions[[0, 2, 3]]  # Remove red/yellow -> green
+
+        # Algorithm
+        skeleton = ts1.reachable_skeleton()
+
+        self.assertEqual(list(skeleton), [0, 2])  # red -> red/yellow and yellow -> red
+        self.assertEqual(len(ts1.product(aut1, reachable_only=True).transitions), 2 * 2)
+
+    def test_product3(self):
+        """
+        test_product3
+        Description:
+            Tests that the sharded (parallel) product gives the same transitions as the sequential one, for any shard
+            size and with or without the reachable skeleton.
+        :return:
+        """
+        # Constants
+        ats = pts2ats(SadraSystem(n_cols=6, n_rows=5))
+        automaton = DeterministicRabinAutomaton(
+            ["q0", "q1", "q2"], [set(elt) for elt in self.powerset(ats.AP)], ["q0"],
+        )
+        rng = np.random.default_rng(1)
+        for q in automaton.Q:
+            for sigma in automaton.Sigma:
+                automaton.add_transition(q, sigma, automaton.Q[rng.integers(len(automaton.Q))])
+
+        # Algorithm
+        for reachable_only in [False, True]:
+            product_ats = ats.product(automaton, reachable_only=reachable_only)
+            for shard_size in [37, len(ats.transitions)]:
+                sharded_product = ats.product(
+                    automaton, reachable_only=reachable_only, n_workers=2, shard_size=shard_size,
+                )
+                self.assertTrue(np.array_equal(sharded_product.transitions, product_ats.transitions))
+                self.assertEqual(sharded_product.I, product_ats.I)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,17 +4,20 @@ Description:
     Tests the functions of this file.
 """
 import unittest
+from unittest import mock
 
 import numpy as np
 
-from kltl.systems.ats.pts_to_ats import collect_all_successors_that_can_follow_from, pts2ats
+from kltl.systems.ats import pts_to_ats
+from kltl.systems.ats.pts_to_ats import collect_all_successors_that_can_follow_from, pts2ats, update_ats
+from kltl.systems.pts import ParametricTransitionSystem
 import kltl.systems.pts.sadra as sadra_og
 import kltl.systems.pts.sadra_noise as sadra_noise
 
 class TestPTS2ATS(unittest.TestCase):
     def test_collect_all_successors_that_can_follow_from1(self):
         # Setup
-        system = sadra_og.get_sadra_system()
+        system = sadra_og.SadraSystem()
         s = "s_(4,4)"
 
         # Add noise to system's transitions
@@ -73,6 +76,155 @@ class TestPTS2ATS(unittest.TestCase):
         self.assertGreater(len(ats.Act), 0)
         self.assertGreater(len(ats.S), 0)
         self.assertGreater(len(ats.AP), 0)
+    def assertSameATS(self, ats1, ats2):
+        self.assertEqual(ats1.S, ats2.S)
+        self.assertEqual(ats1.I, ats2.I)
+        self.assertTrue(np.array_equal(ats1.transitions, ats2.transitions))
+        self.assertTrue(np.array_equal(ats1.labels, ats2.labels))
+
+    def test_update_ats1(self):
+        """
+        test_update_ats1
+        Description:
+            Tests that updating the ATS after adding transitions to the Sadra system gives the same ATS as converting
+            the new system from scratch.
+        :return:
+        """
+        # Constants
+        system = sadra_og.SadraSystem(n_cols=5)
+        ats = pts2ats(system)
+        added_transitions = [
+            ("s_(2,2)", "up", system.Theta[0], "s_(3,3)"),
+            ("s_(1,3)", "right", system.Theta[1], "s_(0,0)"),
+        ]
+
+        # Algorithm
+        for transition in added_transitions:
+            system.add_transition(*transition)
+
+        self.assertSameATS(update_ats(ats, system, added_transitions=added_transitions), pts2ats(system))
+
+    def test_update_ats2(self):
+        """
+        test_update_ats2
+        Description:
+            Tests that updating the ATS after adding a parameter gives the same ATS as converting the new system
+            from scratch.
+        :return:
+        """
+        # Constants
+        system = ParametricTransitionSystem(
+            ["s1", "s2", "s3", "s4"], ["a1", "a2"], ["ap1"], I=["s1"], Theta=["theta1"],
+        )
+        system.add_transition("s1", "a1", "theta1", "s2")
+        system.add_transition("s2", "a1", "theta1", "s3")
+        system.add_transition("s3", "a2", "theta1", "s1")
+        system.add_label("s3", "ap1")
+        ats = pts2ats(system)
+
+        # Algorithm
+        system.Theta.append("theta2")
+        added_transitions = [("s1", "a1", "theta2", "s4"), ("s4", "a2", "theta2", "s1")]
+        for transition in added_transitions:
+            system.add_transition(*transition)
+
+        updated_ats = update_ats(ats, system, added_transitions=added_transitions, added_parameters=["theta2"])
+
+        self.assertSameATS(updated_ats, pts2ats(system))
+        self.assertIn(("s4", ["theta2"]), updated_ats.S)
+    def test_update_ats3(self):
+        """
+        test_update_ats3
+        Description:
+            Tests that update_ats only expands the belief states (s, eta) such that an added transition starts at s
+            with a parameter in eta (the rows of the other belief states are copied from the previous ATS).
+        :return:
+        """
+        # Constants
+        system = sadra_og.SadraSystem(n_cols=5)
+        ats = pts2ats(system)
+        added_transitions = [("s_(2,2)", "up", system.Theta[0], "s_(3,3)")]
+        for transition in added_transitions:
+            system.add_transition(*transition)
+
+        # Algorithm
+        with mock.patch.object(
+            pts_to_ats, "collect_all_successors_that_can_follow_from",
+            side_effect=collect_all_successors_that_can_follow_from,
+        ) as expand:
+            updated_ats = update_ats(ats, system, added_transitions=added_transitions)
+
+        expanded = set((s, tuple(eta)) for (_, s, eta, _) in (call.args for call in expand.call_args_list))
+        self.assertSameATS(updated_ats, pts2ats(system))
+        self.assertGreater(len(expanded), 0)
+        self.assertEqual(expanded, set(
+            (s, tuple(eta)) for (s, eta) in updated_ats.S if (s == "s_(2,2)") and (system.Theta[0] in eta)
+        ))
+
+    def test_pts2ats_antichain1(self):
+        """
+        test_pts2ats_antichain1
+        Description:
+            Tests that the antichain ATS of the Sadra system only contains maximal belief states and simulates every
+            transition of the exact ATS (with larger parameter sets).
+        :return:
+        """
+        # Constants
+        system = sadra_og.SadraSystem(n_cols=5)
+
+        # Algorithm
+        exact_ats = pts2ats(system)
+        antichain_ats = pts2ats(system, antichain=True)
+
+        self.assertLess(len(antichain_ats.S), len(exact_ats.S))
+        self.assertEqual(antichain_ats.I, exact_ats.I)
+
+        # No belief state is contained in another one with the same state
+        for (s, eta) in antichain_ats.S:
+            for (s2, eta2) in antichain_ats.S:
+                if (s == s2) and (eta != eta2):
+                    self.assertFalse(set(eta) <= set(eta2))
+
+        # Every exact belief state is covered by a maximal one with the same labels
+        def cover(ats_state):
+            (s, eta) = ats_state
+            return [k for (k, (s2, eta2)) in enumerate(antichain_ats.S) if (s2 == s) and (set(eta) <= set(eta2))]
+
+        antichain_transitions = set(map(tuple, antichain_ats.transitions))
+        for (k, a_index, k_prime) in exact_ats.transitions:
+            sources, targets = cover(exact_ats.S[k]), cover(exact_ats.S[k_prime])
+            self.assertGreater(len(sources), 0)
+            self.assertTrue(any(
+                (source, a_index, target) in antichain_transitions for source in sources for target in targets
+            ))
+        for ats_state in antichain_ats.S:
+            self.assertEqual(antichain_ats.L(ats_state), system.L(ats_state[0]))
+
+    def test_pts2ats_parallel1(self):
+        """
+        test_pts2ats_parallel1
+        Description:
+            Tests that the parallel construction gives exactly the sequential ATS when it is deterministic, and the same
+            ATS up to the numbering of the states otherwise.
+        :return:
+        """
+        # Constants
+        system = sadra_noise.SadraSystem(n_cols=8, n_rows=8)
+        exact_ats = pts2ats(system)
+
+        def named_transitions(ats):
+            return set((str(ats.S[k]), a_index, str(ats.S[k_prime])) for (k, a_index, k_prime) in ats.transitions)
+
+        def named_labels(ats):
+            return set((str(ats.S[k]), ap_index) for (k, ap_index) in ats.labels)
+
+        # Algorithm
+        self.assertSameATS(pts2ats(system, n_workers=2, chunk_size=7), exact_ats)
+
+        unordered_ats = pts2ats(system, n_workers=2, chunk_size=3, deterministic=False)
+        self.assertEqual(sorted(map(str, unordered_ats.S)), sorted(map(str, exact_ats.S)))
+        self.assertEqual(named_transitions(unordered_ats), named_transitions(exact_ats))
+        self.assertEqual(named_labels(unordered_ats), named_labels(exact_ats))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+test_archive.py
+Description:
+    Tests the memory mapped trajectory archive.
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from kltl.systems.pts.sadra import get_sadra_system
+from kltl.systems.pts.sampling import sample_trajectories
+from kltl.systems.pts.archive import TrajectoryArchive, TrajectoryArchiveWriter
+
+
+class TestArchive(unittest.TestCase):
+    def test_archive1(self):
+        """
+        test_archive1
+        Description:
+            Tests that batches and single trajectories (of different lengths) are read back exactly.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        batch1 = sample_trajectories(sadra, 20, 5, rng=0)
+        batch2 = sample_trajectories(sadra, 10, 8, rng=1)
+        single = batch2.trajectory(3)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rollouts")
+
+            # Algorithm
+            with TrajectoryArchiveWriter(path, sadra) as writer:
+                writer.append_batch(batch1)
+                writer.append(single)
+                writer.append_batch(batch2)
+
+            archive = TrajectoryArchive(path, sadra)
+
+            self.assertEqual(len(archive), 31)
+            self.assertEqual(list(archive.lengths()), [6] * 20 + [9] * 11)
+            for b in range(len(batch1)):
+                self.assertTrue(np.all(archive[b].states == batch1.states[b]))
+                self.assertTrue(np.all(archive[b].actions == batch1.actions[b]))
+                self.assertTrue(np.all(archive[b].outputs == batch1.outputs[b]))
+                self.assertEqual(archive[b].param, batch1.parameters[b])
+            self.assertEqual(archive[20].expand().states, single.states)
+            self.assertEqual(archive[20].expand().actions, single.actions)
+            self.assertTrue(np.all(archive[30].actions == batch2.actions[9]))
+            self.assertEqual(sum(1 for _ in archive), 31)
+
+    def test_archive2(self):
+        """
+        test_archive2
+        Description:
+            Tests that reopening an archive appends to it instead of overwriting it.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        batch = sample_trajectories(sadra, 4, 3, rng=2)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Algorithm
+            with TrajectoryArchiveWriter(tmpdir, sadra) as writer:
+                writer.append_batch(batch)
+            with TrajectoryArchiveWriter(tmpdir, sadra) as writer:
+                writer.append(batch.compact_trajectory(0))
+
+            archive = TrajectoryArchive(tmpdir, sadra)
+
+            self.assertEqual(len(archive), 5)
+            self.assertTrue(np.all(archive[4].states == batch.states[0]))
+            self.assertTrue(np.all(archive.offsets == np.arange(6) * 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+test_belief.py
+Description:
+    Tests the belief filtering functions for parametric transition systems.
+"""
+
+import unittest
+
+import numpy as np
+
+from kltl.systems.pts import ParametricTransitionSystem
+from kltl.systems.pts.belief import BeliefTracker, observation_consistent_beliefs, pair_outputs, pair_successors
+
+
+def get_two_mode_system() -> ParametricTransitionSystem:
+    """
+    sys = get_two_mode_system()
+    Description:
+        A small system in which the parameter can be identified after two transitions.
+    """
+    # Constants
+    Theta = ["theta1", "theta2"]
+
+    # Define PTS
+    sys = ParametricTransitionSystem(
+        ["s1", "s2", "s3", "s4", "s5"], ["a1"], ["ap1"],
+        I=["s1"], Y=["o1", "o2", "o3"], Theta=Theta,
+    )
+
+    sys.add_transition("s1", "a1", "theta1", "s2")
+    sys.add_transition("s1", "a1", "theta2", "s3")
+    sys.add_transition("s2", "a1", "theta1", "s4")
+    sys.add_transition("s3", "a1", "theta2", "s5")
+    sys.add_transition("s4", "a1", "theta1", "s1")
+    sys.add_transition("s5", "a1", "theta2", "s1")
+
+    sys.add_output("s1", Theta[0], "o1")
+    sys.add_output("s1", Theta[1], "o1")
+    sys.add_output("s2", Theta[0], "o2")
+    sys.add_output("s3", Theta[1], "o2")
+    sys.add_output("s4", Theta[0], "o2")
+    sys.add_output("s5", Theta[1], "o3")
+
+    sys.add_label("s4", "ap1")
+
+    return sys
+
+
+class TestBelief(unittest.TestCase):
+    def test_observation_consistent_beliefs1(self):
+        """
+        test_observation_consistent_beliefs1
+        Description:
+            Tests that the belief shrinks to a single (state, parameter) pair once the outputs disambiguate it.
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system()
+
+        # Algorithm
+        beliefs = observation_consistent_beliefs(sys, ["o1", "o2", "o2"])
+
+        self.assertEqual(len(beliefs), 3)
+        self.assertEqual(np.sum(beliefs[0]), 2)
+        self.assertEqual(
+            set(map(tuple, np.argwhere(beliefs[1]))),
+            {(1, 0), (2, 1)},
+        )
+        self.assertEqual(
+            set(map(tuple, np.argwhere(beliefs[2]))),
+            {(3, 0)},
+        )
+
+    def test_observation_consistent_beliefs2(self):
+        """
+        test_observation_consistent_beliefs2
+        Description:
+            Tests that an impossible observation sequence produces an empty belief.
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system()
+
+        # Algorithm
+        beliefs = observation_consistent_beliefs(sys, ["o1", "o3"], actions=["a1"])
+
+        self.assertFalse(np.any(beliefs[-1]))
+
+    def test_BeliefTracker_update1(self):
+        """
+        test_BeliefTracker_update1
+        Description:
+            Tests that the tracker identifies the parameter incrementally and that it can be run for many steps.
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system()
+        tracker = BeliefTracker(sys)
+
+        # Algorithm
+        tracker.observe("o1")
+        self.assertEqual(tracker.parameters(), ["theta1", "theta2"])
+
+        tracker.update("a1", "o2")
+        self.assertEqual(tracker.states(), ["s2", "s3"])
+
+        tracker.update("a1", "o2")
+        self.assertEqual(tracker.states(), ["s4"])
+        self.assertEqual(tracker.parameters(), ["theta1"])
+
+        for k in range(300):
+            tracker.update("a1", ["o1", "o2", "o2"][k % 3])
+        self.assertEqual(tracker.parameters(), ["theta1"])
+        self.assertEqual(len(tracker), 1)
+
+    def test_BeliefTracker_successor_beliefs1(self):
+        """
+        test_BeliefTracker_successor_beliefs1
+        Description:
+            Tests that the successors of a belief are split according to the parameters that explain them.
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system()
+        sys.add_transition("s1", "a1", "theta2", "s2")
+
+        # Algorithm
+        succ = BeliefTracker(sys, states=["s1"]).successor_beliefs("a1")
+
+        self.assertEqual(
+            succ,
+            [("s2", ["theta1", "theta2"]), ("s3", ["theta2"])],
+        )
+
+    def test_BeliefTracker_successor_beliefs2(self):
+        """
+        test_BeliefTracker_successor_beliefs2
+        Description:
+            Tests the split of a large belief against a direct computation from the successors of each pair.
+        :return:
+        """
+        # Constants
+        rng = np.random.default_rng(0)
+        S, Theta = [f"s{k}" for k in range(200)], [f"theta{k}" for k in range(4)]
+        sys = ParametricTransitionSystem(S, ["a1", "a2"], [], I=S, Y=["o1"], Theta=Theta)
+        for (s_index, a, theta) in zip(rng.integers(0, 200, 2000), rng.choice(["a1", "a2"], 2000), rng.choice(Theta, 2000)):
+            sys.add_transition(S[s_index], a, theta, S[rng.integers(0, 200)])
+        tracker = BeliefTracker(sys)
+
+        # Algorithm
+        succ = tracker.successor_beliefs("a1")
+
+        successor_indices, successor_parameters = tracker.propagate("a1")
+        expected = {}
+        for (s_prime_index, theta_index) in zip(successor_indices, successor_parameters):
+            expected.setdefault(S[s_prime_index], set()).add(Theta[theta_index])
+
+        self.assertEqual([s_prime for (s_prime, _) in succ], list(expected.keys()))
+        self.assertEqual(succ, [(s_prime, sorted(eta_prime)) for (s_prime, eta_prime) in expected.items()])
+
+    def test_pair_successors1(self):
+        """
+        test_pair_successors1
+        Description:
+            Tests that the successors and the outputs of a (state, parameter) pair follow the transitions and the
+            outputs of that parameter.
+        :return:
+        """
+        # Constants
+        sys = get_two_mode_system()
+        sys.add_transition("s1", "a1", "theta1", "s3")
+        sys.add_output("s5", "theta1", "o2")
+
+        # Algorithm
+        self.assertEqual(list(pair_successors(sys, 0, 0)), [1, 2])
+        self.assertEqual(list(pair_successors(sys, 0, 1)), [2])
+        self.assertEqual(list(pair_successors(sys, 2, 0)), [])
+        self.assertEqual(list(pair_outputs(sys, 4, 1)), [2])
+        self.assertEqual(list(pair_outputs(sys, 4, 0)), [1])
+        self.assertEqual(list(pair_outputs(sys, 2, 0)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+test_policy_tables.py
+Description:
+    Tests the policy tables and their executor in kltl/systems/pts/policy_tables.py.
+"""
+
+import unittest
+
+import numpy as np
+
+from kltl.systems.pts.policies import ControlPolicies, compile_control_policy
+from kltl.systems.pts.policy_tables import PolicyTable, PolicyExecutor, run_policy_batch
+from kltl.systems.pts.sadra import get_sadra_system
+
+
+class TestPolicyTables(unittest.TestCase):
+    def test_compile_control_policy1(self):
+        """
+        test_compile_control_policy1
+        Description:
+            Verifies that the compiled control_policy_1 chooses the same actions as the hand-written one along
+            executions of the table, and that both stop at the same time.
+        """
+        sadra = get_sadra_system()
+        policies = ControlPolicies(1, system=sadra)
+        table = compile_control_policy(policies, policies.control_policy_1)
+
+        self.assertEqual(table.n_memory, 4)
+
+        for seed in range(3):
+            executor = PolicyExecutor(table, sadra, "0", rng=seed)
+            trajectory = [sadra.Y[executor.output], sadra.Y[executor.output]]
+            for _ in range(60):
+                decision = policies.control_policy_1(trajectory)
+                step = executor.step()
+                if step is None:
+                    self.assertIsNone(decision)
+                    break
+
+                a, _, y = step
+                self.assertEqual(sadra.Act[a], decision[0])
+                trajectory += [sadra.Act[a], sadra.Y[y], sadra.Y[y]]
+
+    def test_compile_control_policy2(self):
+        """
+        test_compile_control_policy2
+        Description:
+            Verifies that the memory of the compiled control_policy_2 records the goals that were visited and that the
+            policy stops once both goals were visited.
+        """
+        sadra = get_sadra_system()
+        policies = ControlPolicies(1, system=sadra)
+        table = compile_control_policy(policies, policies.control_policy_2)
+        goal1, goal2 = sadra.Y[sadra.labels[0, 0]], sadra.Y[sadra.labels[1, 0]]
+
+        executor = PolicyExecutor(table, sadra, "0", rng=0, s0=goal1)
+        self.assertEqual(executor.memory, 1)
+        self.assertFalse(executor.done)
+
+        executor.reset(s0=goal2)
+        self.assertEqual(executor.memory, 2)
+
+        trajectory = executor.run(5)
+        self.assertEqual(len(trajectory.actions), 5)
+        self.assertEqual(len(trajectory.states), 6)
+
+        executor.memory = int(table.memory_update[executor.memory, sadra.Y.index(goal1)])
+        self.assertEqual(executor.memory, 3)
+        self.assertTrue(executor.done)
+        self.assertIsNone(executor.step())
+
+    def test_policy_table1(self):
+        """
+        test_policy_table1
+        Description:
+            Verifies that actions are sampled from the rows of the table and that rows of zeros stop the policy.
+        """
+        action_probabilities = np.zeros((1, 2, 3))
+        action_probabilities[0, 0] = [0.0, 0.25, 0.75]
+        table = PolicyTable(action_probabilities, np.zeros((1, 2), dtype=int), ["y0", "y1"], ["a", "b", "c"])
+
+        rng = np.random.default_rng(0)
+        actions = table.sample_actions(np.zeros((4000,), dtype=int), np.zeros((4000,), dtype=int), rng)
+
+        self.assertTrue(np.all(actions > 0))
+        self.assertAlmostEqual(np.mean(actions == 2), 0.75, delta=0.03)
+        self.assertTrue(np.array_equal(table.stops(np.array([0, 0]), np.array([0, 1])), [False, True]))
+
+    def get_move_right_policy(self, sadra, stop_column: int) -> PolicyTable:
+        """
+        table = self.get_move_right_policy(sadra, stop_column)
+        Description:
+            A memoryless policy that moves right until it observes a state in column stop_column or beyond.
+        """
+        action_probabilities = np.zeros((1, len(sadra.Y), len(sadra.Act)))
+        for (y_index, y) in enumerate(sadra.Y):
+            if int(y[y.index("(") + 1:y.index(",")]) < stop_column:
+                action_probabilities[0, y_index, sadra.Act.index("right")] = 1.0
+        return PolicyTable(action_probabilities, np.zeros((1, len(sadra.Y)), dtype=int), sadra.Y, sadra.Act)
+
+    def test_run_policy_batch1(self):
+        """
+        test_run_policy_batch1
+        Description:
+            Verifies that executions are retired when their policy stops and that the other ones run until max_len.
+        """
+        sadra = get_sadra_system()
+        table = self.get_move_right_policy(sadra, 12)
+
+        rollouts = run_policy_batch(
+            table, sadra, ["0"] * 3, 5, initial_states=["s_(10,0)", "s_(0,0)", "s_(12,0)"], rng=0,
+        )
+
+        self.assertTrue(np.array_equal(rollouts.lengths, [2, 5, 0]))
+        self.assertTrue(np.array_equal(rollouts.stopped, [True, False, True]))
+        self.assertTrue(np.all(rollouts.actions[0, 2:] == -1))
+        self.assertTrue(np.all(rollouts.states[2, 1:] == -1))
+        self.assertEqual(
+            [rollouts.trajectory(0).s(k) for k in range(3)],
+            ["s_(10,0)", "s_(11,0)", "s_(12,0)"],
+        )
+
+    def test_run_policy_batch2(self):
+        """
+        test_run_policy_batch2
+        Description:
+            Verifies that every step of a batch follows the policy and the transitions of the system.
+        """
+        sadra = get_sadra_system()
+        table = self.get_move_right_policy(sadra, 14)
+        transitions = set(map(tuple, sadra.transitions.tolist()))
+
+        rollouts = run_policy_batch(table, sadra, sadra.Theta * 20, 30, rng=1)
+
+        self.assertEqual(len(rollouts), 100)
+        for b in range(len(rollouts)):
+            theta = rollouts.parameters[b]
+            for k in range(rollouts.lengths[b]):
+                s, a, s_next = rollouts.states[b, k], rollouts.actions[b, k], rollouts.states[b, k + 1]
+                self.assertGreater(table.action_probabilities[0, rollouts.outputs[b, k], a], 0.0)
+                self.assertIn((s, a, theta, s_next), transitions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+test_rollouts.py
+Description:
+    Tests the parallel rollout runner.
+"""
+import unittest
+
+import numpy as np
+
+from kltl.grammar.kltl_semantics import Eventually, Knows
+from kltl.systems.pts.sadra import get_sadra_system
+from kltl.systems.pts.rollouts import run_rollouts, TraceFormulaEvaluator, share_system, attach_system
+
+
+class TestRollouts(unittest.TestCase):
+    def test_run_rollouts1(self):
+        """
+        test_run_rollouts1
+        Description:
+            Tests that the results of the rollouts do not depend on the number of workers.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        evaluator = TraceFormulaEvaluator(Eventually("Crashed!"))
+
+        # Algorithm
+        results1 = run_rollouts(sadra, 300, 15, evaluator, n_workers=1, shard_size=100, seed=3, keep_trajectories=True)
+        results2 = run_rollouts(sadra, 300, 15, evaluator, n_workers=2, shard_size=100, seed=3, keep_trajectories=True)
+
+        self.assertEqual(len(results1), 300)
+        self.assertTrue(np.array_equal(results1.values, results2.values))
+        self.assertTrue(np.array_equal(results1.batch.states, results2.batch.states))
+
+        # The evaluation should agree with a direct check of the labels
+        crashed = np.isin(results1.batch.states, sadra.labels[sadra.labels[:, 1] == sadra.AP.index("Crashed!"), 0])
+        self.assertTrue(np.array_equal(results1.values, np.any(crashed, axis=1)))
+
+    def test_run_rollouts2(self):
+        """
+        test_run_rollouts2
+        Description:
+            Tests that formulae with K are evaluated on the outputs of each trajectory. The outputs of the sadra system
+            are its states, so knowing that the system crashed is the same as crashing.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+
+        # Algorithm
+        results1 = run_rollouts(sadra, 100, 10, TraceFormulaEvaluator(Eventually("Crashed!")), n_workers=1, seed=5)
+        results2 = run_rollouts(sadra, 100, 10, TraceFormulaEvaluator(Eventually(Knows("Crashed!"))), n_workers=1, seed=5)
+
+        self.assertTrue(np.array_equal(results1.values, results2.values))
+
+    def test_share_system1(self):
+        """
+        test_share_system1
+        Description:
+            Tests that a shared system can be attached and that its arrays match the original.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+
+        # Algorithm
+        handle, blocks = share_system(sadra)
+        try:
+            attached, attached_blocks = attach_system(handle)
+            self.assertTrue(np.array_equal(attached.transitions, sadra.transitions))
+            self.assertEqual(attached.post("s_(3,3)", "up", "1"), sadra.post("s_(3,3)", "up", "1"))
+            del attached
+            for block in attached_blocks:
+                block.close()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()
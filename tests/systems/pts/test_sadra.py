@@ -4,6 +4,7 @@ Description:
     Tests some of the features of the sadradinni system.
 """
 import os
+import tempfile
 import unittest
 
 from kltl.systems.pts.sadra import get_sadra_system
@@ -41,8 +42,10 @@ class TestSadra(unittest.TestCase):
         fig, ax = plt.subplots(1, 1)
         sadra.plot(f"s_(0,0)", ax=ax)
 
-        os.makedirs("figures", exist_ok=True)
-        fig.savefig("figures/sadra_plot1.png")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fig.savefig(os.path.join(temp_dir, "sadra_plot1.png"))
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, "sadra_plot1.png")))
+        plt.close(fig)
 
     def test_plot_trajectory1(self):
         # Constants
@@ -54,22 +57,24 @@ class TestSadra(unittest.TestCase):
         fig, ax = plt.subplots(1, 1)
         sadra.plot_trajectory(traj0, ax=ax)
 
-        os.makedirs("figures", exist_ok=True)
-        fig.savefig("figures/sadra_plot_trajectory1.png")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fig.savefig(os.path.join(temp_dir, "sadra_plot_trajectory1.png"))
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, "sadra_plot_trajectory1.png")))
+        plt.close(fig)
 
     def test_save_animated_trajectory1(self):
         # Constants
         sadra = get_sadra_system()
-        filename = "figures/sadra_animated_trajectory1.gif"
-
-        # Create
-        os.makedirs("figures", exist_ok=True)
 
         # Sample Trajectory
         traj0 = create_random_trajectory_with_N_actions(sadra, 10)
 
         fig, ax = plt.subplots(1, 1)
-        sadra.save_animated_trajectory(traj0, filename, ax=ax)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "sadra_animated_trajectory1.gif")
+            sadra.save_animated_trajectory(traj0, filename, ax=ax)
+            self.assertTrue(os.path.exists(filename))
+        plt.close(fig)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,65 @@
+"""
+test_sampling.py
+Description:
+    Tests the batched trajectory sampler for parametric transition systems.
+"""
+import unittest
+
+import numpy as np
+
+from kltl.systems.pts.sadra import get_sadra_system
+from kltl.systems.pts.sampling import sample_trajectories
+
+
+class TestSampling(unittest.TestCase):
+    def test_sample_trajectories1(self):
+        """
+        test_sample_trajectories1
+        Description:
+            Tests that every sampled step is a transition of the system and that the outputs are consistent.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+
+        # Algorithm
+        batch = sample_trajectories(sadra, 50, 20, rng=0)
+
+        self.assertEqual(batch.states.shape, (50, 21))
+        self.assertEqual(batch.actions.shape, (50, 20))
+        self.assertEqual(batch.outputs.shape, (50, 21))
+
+        transitions = set(map(tuple, sadra.transitions))
+        for b in range(len(batch)):
+            for k in range(batch.actions.shape[1]):
+                self.assertIn(
+                    (batch.states[b, k], batch.actions[b, k], batch.parameters[b], batch.states[b, k + 1]),
+                    transitions,
+                )
+            self.assertTrue(np.all(batch.states[b] == batch.outputs[b]))  # Outputs of the Sadra system are the states
+
+    def test_sample_trajectories2(self):
+        """
+        test_sample_trajectories2
+        Description:
+            Tests that seeded sampling is reproducible and that the batch converts to a FiniteTrajectory.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+
+        # Algorithm
+        batch1 = sample_trajectories(sadra, 10, 5, rng=np.random.default_rng(7))
+        batch2 = sample_trajectories(sadra, 10, 5, rng=np.random.default_rng(7))
+
+        self.assertTrue(np.array_equal(batch1.states, batch2.states))
+        self.assertTrue(np.array_equal(batch1.actions, batch2.actions))
+
+        traj = batch1.trajectory(3)
+        self.assertEqual(len(traj), 6)
+        self.assertEqual(traj.s(0), sadra.S[batch1.states[3, 0]])
+        self.assertEqual(traj.a(4), sadra.Act[batch1.actions[3, 4]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,10 +5,14 @@ Description:
 """
 import unittest
 
+import numpy as np
+
 from kltl.systems.pts import (
     ParametricTransitionSystem,
-    FiniteTrajectory, InfiniteTrajectory,
+    FiniteTrajectory, InfiniteTrajectory, CompactFiniteTrajectory,
 )
+from kltl.systems.pts.sadra import get_sadra_system
+from kltl.systems.pts.trajectory import compact_trajectory_from_string, create_random_trajectory_with_N_actions
 
 class TestTrajectory(unittest.TestCase):
     def test_InfiniteTrajectory_s1(self):
@@ -20,5 +24,50 @@ class TestTrajectory(unittest.TestCase):
         """
         pass
 
+    def test_CompactFiniteTrajectory1(self):
+        """
+        test_CompactFiniteTrajectory1
+        Description:
+            Tests that a compact trajectory returns the same states, actions, outputs and trace as the original one.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        traj = create_random_trajectory_with_N_actions(sadra, 10)
+
+        # Algorithm
+        compact_traj = traj.compact()
+
+        self.assertIsInstance(compact_traj, CompactFiniteTrajectory)
+        self.assertEqual(compact_traj.states.dtype, np.int32)
+        self.assertEqual(len(compact_traj), len(traj))
+        for k in range(len(traj)):
+            self.assertEqual(compact_traj.s(k), traj.s(k))
+            self.assertEqual(compact_traj.y(k), traj.y(k))
+        for k in range(len(traj) - 1):
+            self.assertEqual(compact_traj.a(k), traj.a(k))
+        self.assertEqual(compact_traj.theta(), traj.param)
+        self.assertEqual(compact_traj.trace().trace_list, traj.trace().trace_list)
+        self.assertEqual(str(compact_traj), str(traj))
+
+        self.assertFalse(hasattr(compact_traj, "__dict__"))
+
+    def test_compact_trajectory_from_string1(self):
+        """
+        test_compact_trajectory_from_string1
+        Description:
+            Tests that names that are not in the system are rejected.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+
+        # Algorithm
+        compact_traj = compact_trajectory_from_string(["s_(0,0)", "s_(0,0)", "up", "s_(0,1)", "s_(0,1)"], "1", sadra)
+        self.assertEqual(compact_traj.s(1), "s_(0,1)")
+
+        with self.assertRaises(AssertionError):
+            compact_trajectory_from_string(["s_(0,0)", "s_(0,0)", "jump", "s_(0,1)", "s_(0,1)"], "1", sadra)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,151 @@
+"""
+test_frozen.py
+Description:
+    Tests the read-only snapshots of kltl/systems/frozen.py.
+"""
+
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from kltl.artifact_cache import fingerprint
+from kltl.systems.ats.pts_to_ats import pts2ats
+from kltl.systems.frozen import FrozenSystemError
+from kltl.systems.graph_utils import names_to_indices
+from kltl.systems.pts.sadra import SadraSystem
+from kltl.systems.pts.sampling import sampling_tables
+from kltl.synthesis.games import game_arena
+from kltl.systems.ts import get_beverage_vending_machine
+
+
+class TestFrozenSystems(unittest.TestCase):
+    def test_freeze1(self):
+        """
+        test_freeze1
+        Description:
+            Verifies that a snapshot has tuple name tables (S and Y stay the same object), read-only arrays and
+            precomputed indexes, and that it does not change when the builder does.
+        """
+        builder = SadraSystem(n_cols=6, n_rows=5)
+        snapshot = builder.freeze()
+
+        self.assertIsInstance(snapshot.S, tuple)
+        self.assertIs(snapshot.S, snapshot.Y)
+        self.assertFalse(snapshot.transitions.flags.writeable)
+        self.assertTrue(builder.transitions.flags.writeable)
+        self.assertTrue(
+            {"index_map_S", "index_map_Act", "label_matrix", "successor_csr", "output_codes"} <=
+            set(snapshot.__dict__["_index_cache"].keys())
+        )
+
+        with self.assertRaises(FrozenSystemError):
+            snapshot.add_label("s_(1,1)", "Surveil1")
+
+        builder.add_label("s_(1,1)", "Surveil1")
+        self.assertEqual(len(snapshot.labels), len(builder.labels) - 1)
+
+        thawed = snapshot.thaw()
+        self.assertIsInstance(thawed.S, list)
+        thawed.add_label("s_(1,1)", "Surveil1")
+        self.assertTrue(np.array_equal(thawed.labels, builder.labels))
+
+    def test_freeze2(self):
+        """
+        test_freeze2
+        Description:
+            Verifies that snapshots are compared and hashed by content, and that they have the same fingerprint as the
+            system that they were made from.
+        """
+        builder = get_beverage_vending_machine()
+        snapshot1, snapshot2 = builder.freeze(), get_beverage_vending_machine().freeze()
+
+        self.assertEqual(snapshot1, snapshot2)
+        self.assertEqual(hash(snapshot1), hash(snapshot2))
+        self.assertEqual(len({snapshot1, snapshot2}), 1)
+        self.assertEqual(fingerprint(builder), fingerprint(snapshot1))
+        self.assertNotEqual(builder, snapshot1)
+
+        builder.add_transition("start", "select", "end")
+        self.assertNotEqual(builder.freeze(), snapshot1)
+
+        ats_snapshot = pts2ats(SadraSystem(n_cols=5, n_rows=4)).freeze()
+        self.assertIn("reachable_skeleton", ats_snapshot.__dict__["_index_cache"])
+        self.assertEqual(hash(ats_snapshot), hash(pickle.loads(pickle.dumps(ats_snapshot))))
+
+    def test_freeze3(self):
+        """
+        test_freeze3
+        Description:
+            Verifies that a snapshot is pickled without its indexes, and that the unpickled copy is frozen, read-only and
+            has its indexes again.
+        """
+        snapshot = SadraSystem(n_cols=6, n_rows=5).freeze()
+        copy = pickle.loads(pickle.dumps(snapshot))
+
+        self.assertNotIn(b"_index_cache", pickle.dumps(snapshot))
+        self.assertTrue(copy.frozen)
+        self.assertFalse(copy.output_map.flags.writeable)
+        self.assertIs(copy.S, copy.Y)
+        self.assertEqual(copy, snapshot)
+        self.assertEqual(
+            set(copy.__dict__["_index_cache"].keys()) - {"content_fingerprint"},
+            set(snapshot.__dict__["_index_cache"].keys()) - {"content_fingerprint"},
+        )
+
+    def test_freeze4(self):
+        """
+        test_freeze4
+        Description:
+            Verifies that many threads can read a snapshot at once (without changing its indexes).
+        """
+        snapshot = SadraSystem(n_cols=6, n_rows=5).freeze()
+        cached_indexes = dict(snapshot.__dict__["_index_cache"])
+
+        def read(k: int):
+            s = snapshot.S[k % len(snapshot.S)]
+            return (
+                sorted(snapshot.post(s, "up", "0")),
+                int(names_to_indices(snapshot, "S", [s])[0]),
+                snapshot.successor_csr()[0][-1],
+            )
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(read, range(200)))
+
+        self.assertEqual(results, [read(k) for k in range(200)])
+        for (name, entry) in cached_indexes.items():
+            self.assertIs(snapshot.__dict__["_index_cache"][name], entry)
+
+
+    def test_freeze5(self):
+        """
+        test_freeze5
+        Description:
+            Verifies that indexes which were not precomputed (sampling tables and game arenas) do not change the index
+            cache of a snapshot: each thread computes them once and keeps them in a cache of its own.
+        """
+        snapshot = SadraSystem(n_cols=6, n_rows=5).freeze()
+        ats_snapshot = pts2ats(SadraSystem(n_cols=5, n_rows=4)).freeze()
+        cached_indexes = [dict(snapshot.__dict__["_index_cache"]), dict(ats_snapshot.__dict__["_index_cache"])]
+
+        self.assertIn("content_fingerprint", cached_indexes[0])
+        with self.assertRaises(TypeError):
+            snapshot.__dict__["_index_cache"]["sampling_tables"] = None
+
+        def read(_: int):
+            tables, arena = sampling_tables(snapshot), game_arena(ats_snapshot)
+            self.assertIs(sampling_tables(snapshot), tables)
+            self.assertIs(game_arena(ats_snapshot), arena)
+            return tables[0][-1], len(arena.pairs)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(read, range(16)))
+
+        self.assertEqual(results, [read(k) for k in range(16)])
+        self.assertEqual(dict(snapshot.__dict__["_index_cache"]), cached_indexes[0])
+        self.assertEqual(dict(ats_snapshot.__dict__["_index_cache"]), cached_indexes[1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+test_products.py
+Description:
+    Tests the computation of product transitions in kltl/systems/products.py.
+"""
+
+import unittest
+from itertools import chain, combinations
+
+import numpy as np
+
+from kltl.automata import DeterministicRabinAutomaton
+from kltl.systems.ats.pts_to_ats import pts2ats
+from kltl.systems.graph_utils import label_letters
+from kltl.systems.products import automaton_tables, product_components, product_transitions
+from kltl.systems.pts.sadra import SadraSystem
+
+
+class TestProducts(unittest.TestCase):
+    def random_automaton(self, AP, n_Q: int, n_successors: int, seed: int) -> DeterministicRabinAutomaton:
+        Sigma = [set(elt) for elt in chain.from_iterable(combinations(AP, r) for r in range(len(AP) + 1))]
+        automaton = DeterministicRabinAutomaton([f"q{k}" for k in range(n_Q)], Sigma, ["q0"])
+        rng = np.random.default_rng(seed)
+        for q in automaton.Q:
+            for sigma in automaton.Sigma:
+                for p_index in rng.choice(n_Q, size=rng.integers(n_successors + 1), replace=False):
+                    automaton.add_transition(q, sigma, automaton.Q[p_index])
+        return automaton
+
+    def test_product_transitions1(self):
+        """
+        test_product_transitions1
+        Description:
+            Verifies that the join on the letter transition table gives the same product transitions as gathering the
+            automaton's transitions letter by letter, and that automata that are not deterministic (which have no
+            letter transition table) are handled by the gather.
+        """
+        # Constants
+        ats = pts2ats(SadraSystem(n_cols=6, n_rows=5))
+        letters, letter_index = label_letters(ats)
+
+        for (n_successors, seed) in [(1, 0), (1, 1), (2, 2)]:
+            automaton = self.random_automaton(ats.AP, 4, n_successors, seed)
+            tables = automaton_tables(automaton, letters)
+            self.assertEqual(tables[4] is None, n_successors > 1)
+
+            # Algorithm
+            transitions_prime = product_transitions(ats.transitions, letter_index, tables)
+            gathered = product_transitions(ats.transitions, letter_index, tables[:4] + (None,))
+
+            expected = set()
+            for (s, a, t) in ats.transitions:
+                for (q, sigma, p) in automaton.transitions:
+                    if frozenset(automaton.Sigma[sigma]) == letters[letter_index[t]]:
+                        expected.add((s * 4 + q, a, t * 4 + p))
+
+            self.assertEqual(len(transitions_prime), len(gathered))
+            self.assertEqual(set(map(tuple, transitions_prime)), expected)
+            self.assertEqual(set(map(tuple, gathered)), expected)
+
+
+    def test_product_components1(self):
+        """
+        test_product_components1
+        Description:
+            Verifies that the sequential and the sharded products remove the same repeated transitions. The automaton
+            is not deterministic (so its transitions are gathered by letter) and lists each of its transitions twice
+            (under two copies of the same letter), so every product transition is produced twice before the
+            deduplication.
+        """
+        # Constants
+        ats = pts2ats(SadraSystem(n_cols=6, n_rows=5))
+        automaton = self.random_automaton(ats.AP, 3, 2, 3)
+        n_Sigma = len(automaton.Sigma)
+        automaton.Sigma = automaton.Sigma + automaton.Sigma
+        automaton.transitions = np.vstack((automaton.transitions, automaton.transitions + [0, n_Sigma, 0]))
+
+        # Algorithm
+        _, _, sequential, _ = product_components(ats, automaton, n_workers=1)
+        _, _, sharded, _ = product_components(ats, automaton, n_workers=2, shard_size=64)
+
+        self.assertEqual(len(set(map(tuple, sequential))), len(sequential))
+        np.testing.assert_array_equal(sequential, sharded)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+test_shared.py
+Description:
+    Tests the process-wide cache of frozen systems in kltl/systems/shared.py.
+"""
+
+import unittest
+
+import numpy as np
+
+from kltl.systems.frozen import FrozenSystemError
+from kltl.systems.pts.policies import ControlPolicies
+from kltl.systems.pts.sadra import SadraSystem, get_sadra_system, shared_sadra_system
+from kltl.systems.pts.sadra_noise import add_perturbed_transitions_for_mode, get_noisy_sadra_system, shared_noisy_sadra_system
+from kltl.systems.shared import clear_shared_systems, shared_system
+from kltl.systems.ts import get_beverage_vending_machine, shared_beverage_vending_machine
+
+
+class TestSharedSystems(unittest.TestCase):
+    def test_shared_system1(self):
+        """
+        test_shared_system1
+        Description:
+            Verifies that the shared_* accessors return one instance per set of arguments (with the defaults filled in)
+            and that different arguments give different systems.
+        """
+        self.assertIs(shared_sadra_system(), shared_sadra_system())
+        self.assertIs(shared_sadra_system(), shared_sadra_system(n_cols=15, windy_region_y_ub=6))
+        self.assertIs(shared_sadra_system(), shared_system(SadraSystem))
+        self.assertIs(shared_beverage_vending_machine(), shared_beverage_vending_machine())
+        self.assertIs(shared_noisy_sadra_system(), ControlPolicies(1).system)
+
+        small = shared_sadra_system(n_cols=6, n_rows=5)
+        self.assertIsNot(small, shared_sadra_system())
+        self.assertEqual(len(small.S), 30)
+
+        self.assertIsNot(shared_sadra_system(), shared_noisy_sadra_system())
+
+    def test_shared_system2(self):
+        """
+        test_shared_system2
+        Description:
+            Verifies that the shared systems are frozen: their arrays can not be written and the add_* methods fail,
+            while a newly built system can still be modified.
+        """
+        ts = shared_beverage_vending_machine()
+        self.assertTrue(ts.frozen)
+        self.assertFalse(ts.transitions.flags.writeable)
+
+        with self.assertRaises(ValueError):
+            ts.transitions[0, 0] = 1
+        with self.assertRaises(FrozenSystemError):
+            ts.add_transition("start", "coin", "dispense")
+
+        builder = get_beverage_vending_machine()
+        self.assertFalse(builder.frozen)
+        builder.add_transition("start", "coin", "dispense")
+        self.assertEqual(len(builder.transitions), len(ts.transitions) + 1)
+
+        snapshot = builder.freeze()
+        self.assertIs(snapshot.freeze(), snapshot)
+        builder.add_transition("start", "select", "dispense")
+        self.assertEqual(len(snapshot.transitions), len(builder.transitions) - 1)
+
+    def test_shared_system3(self):
+        """
+        test_shared_system3
+        Description:
+            Verifies that the windy region of the sadra system follows its arguments and that clearing the cache
+            builds a new instance.
+        """
+        sadra = shared_sadra_system(n_cols=8, n_rows=6, windy_region_y_lb=1, windy_region_y_ub=2)
+        self.assertEqual((sadra.windy_region_y_lb, sadra.windy_region_y_ub), (1, 2))
+
+        # In the windy rows, the parameter shifts the robot sideways
+        s, right, theta = [
+            sadra.S.index("s_(4,1)"), sadra.Act.index("right"), sadra.Theta.index("1"),
+        ]
+        rows = sadra.transitions[(sadra.transitions[:, 0] == s) & (sadra.transitions[:, 1] == right)]
+        self.assertEqual(sadra.S[rows[rows[:, 2] == theta][0, 3]], "s_(6,1)")
+
+        clear_shared_systems()
+        rebuilt = shared_sadra_system(n_cols=8, n_rows=6, windy_region_y_lb=1, windy_region_y_ub=2)
+        self.assertIsNot(rebuilt, sadra)
+        self.assertTrue(np.array_equal(rebuilt.transitions, sadra.transitions))
+
+    def test_get_system1(self):
+        """
+        test_get_system1
+        Description:
+            Verifies that the get_* functions still return new systems that can be modified (e.g., by
+            add_perturbed_transitions_for_mode), and that thaw() gives a modifiable copy of a shared system.
+        """
+        # Constants
+        n_cols, n_rows = 6, 6
+
+        # Algorithm
+        noisy = get_noisy_sadra_system(n_cols=n_cols, n_rows=n_rows)
+        self.assertFalse(noisy.frozen)
+        self.assertIsNot(noisy, get_noisy_sadra_system(n_cols=n_cols, n_rows=n_rows))
+        self.assertFalse(get_sadra_system().frozen)
+        self.assertFalse(get_beverage_vending_machine().frozen)
+
+        shared = shared_noisy_sadra_system(n_cols=n_cols, n_rows=n_rows)
+        with self.assertRaises(FrozenSystemError):
+            add_perturbed_transitions_for_mode(shared, "0", (2, 2), n_rows=n_rows, n_cols=n_cols)
+
+        for system in [noisy, shared.thaw()]:
+            n_transitions = len(system.transitions)
+            add_perturbed_transitions_for_mode(system, "0", (2, 2), n_rows=n_rows, n_cols=n_cols)
+            self.assertGreater(len(system.transitions), n_transitions)
+        self.assertEqual(len(shared.transitions), n_transitions)
+
+
+if __name__ == "__main__":
+    unittest.main()
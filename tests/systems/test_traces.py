@@ -9,7 +9,11 @@ import unittest
 from kltl.systems.ts import (
     get_beverage_vending_machine
 )
-from kltl.systems.ts import FiniteTrajectory, create_random_trajectory_with_N_actions
+from kltl.systems.ts import FiniteTrajectory, CompactFiniteTrajectory, create_random_trajectory_with_N_actions
+from kltl.systems.ts import LazyFiniteTrace, LazyInfiniteTrace
+from kltl.systems.ts.trajectory import compact_trajectory_from_string
+from kltl.systems.graph_utils import label_matrix
+from kltl.grammar.ltl_semantics import LTLFormula, Eventually
 
 class TestTraces(unittest.TestCase):
     def test_trajectory1(self):
@@ -41,6 +45,71 @@ class TestTraces(unittest.TestCase):
 
         # Check that the trajectory is of length 1
         self.assertEqual(len(traj), 2)
+    def test_compact_trajectory1(self):
+        """
+        Tests that a compact trajectory matches the trajectory it was created from.
+        :return:
+        """
+        # constants
+        ts1 = get_beverage_vending_machine()
+        trajectory_as_list = ["start", "coin", "pay", "select", "select"]
+
+        # Create both trajectories
+        traj = FiniteTrajectory(trajectory_as_list, ts1)
+        compact_traj = compact_trajectory_from_string(trajectory_as_list, ts1)
+
+        self.assertIsInstance(compact_traj, CompactFiniteTrajectory)
+        self.assertEqual(list(compact_traj.states), [0, 1, 2])
+        self.assertEqual(compact_traj.a(1), traj.a(1))
+        self.assertEqual(compact_traj.expand().states, traj.states)
+        self.assertEqual(traj.compact().trace().trace_list, traj.trace().trace_list)
+
+    def test_lazy_trace1(self):
+        """
+        test_lazy_trace1
+        Description:
+            Tests that the lazy trace of a trajectory contains the labels of each state.
+        :return:
+        """
+        # constants
+        ts1 = get_beverage_vending_machine()
+        traj = FiniteTrajectory(["start", "coin", "pay", "select", "select", "dispense", "dispense"], ts1)
+
+        # Algorithm
+        trace = traj.trace()
+
+        self.assertIsInstance(trace, LazyFiniteTrace)
+        self.assertEqual(len(trace), 4)
+        self.assertEqual(trace[2], ["selected"])
+        self.assertEqual(trace.trace_list, [ts1.L(s) for s in traj.states])
+        self.assertEqual(list(trace.holds("dispensed")), [False, False, False, True])
+        self.assertFalse(trace.satisfies(LTLFormula("paid", [])))
+        self.assertTrue(trace.satisfies(Eventually("dispensed")))
+
+    def test_lazy_infinite_trace1(self):
+        """
+        test_lazy_infinite_trace1
+        Description:
+            Tests that indexing a lazy infinite trace wraps around the repeating suffix.
+        :return:
+        """
+        # constants
+        ts1 = get_beverage_vending_machine()
+        L_matrix = label_matrix(ts1)
+        S_index = {s: k for (k, s) in enumerate(ts1.S)}
+
+        # Algorithm
+        trace = LazyInfiniteTrace(
+            L_matrix[[S_index["start"]]],
+            L_matrix[[S_index["pay"], S_index["dispense"]]],
+            ts1,
+        )
+
+        self.assertEqual(trace[0], [])
+        self.assertEqual(trace[1], ["paid"])
+        self.assertEqual(trace[4], ["dispensed"])
+        self.assertEqual(trace.prefix, [[]])
+        self.assertEqual(trace.repeating_suffix, [["paid"], ["dispensed"]])
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
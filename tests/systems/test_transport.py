@@ -0,0 +1,104 @@
+"""
+test_transport.py
+Description:
+    Tests the shared memory transport of systems in kltl/systems/transport.py.
+"""
+
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from kltl.systems.ats.pts_to_ats import pts2ats
+from kltl.systems.pts.sadra import SadraSystem, shared_sadra_system
+from kltl.systems.pts.sampling import sampling_tables
+from kltl.systems.transport import attach_system, share_system
+
+
+def count_successors_in_worker(handle) -> int:
+    system, blocks = attach_system(handle)
+    n_successors = int(len(system.successor_csr()[1]))
+    del system
+    for block in blocks:
+        block.close()
+    return n_successors
+
+
+class TestTransport(unittest.TestCase):
+    def test_share_system1(self):
+        """
+        test_share_system1
+        Description:
+            Verifies that an attached system is a frozen copy of the shared one whose arrays and shared indexes are
+            read-only views of the block (with shared arrays appearing once), and that the handle is small.
+        """
+        # Constants
+        sadra = shared_sadra_system()
+        tables = sampling_tables(sadra)
+
+        # Algorithm
+        handle, blocks = share_system(sadra)
+        try:
+            attached, attached_blocks = attach_system(handle)
+
+            self.assertTrue(attached.frozen)
+            self.assertEqual(attached, sadra)
+            self.assertIs(attached.S, attached.Y)
+            for name in ["transitions", "labels", "output_map"]:
+                self.assertTrue(np.array_equal(getattr(attached, name), getattr(sadra, name)))
+                self.assertFalse(getattr(attached, name).flags.writeable)
+                self.assertTrue(np.shares_memory(getattr(attached, name), np.asarray(attached_blocks[0].buf)))
+
+            attached_tables = sampling_tables(attached)
+            self.assertIs(attached_tables[1], attached.successor_csr()[1])
+            for (table, attached_table) in zip(tables, attached_tables):
+                self.assertTrue(np.array_equal(table, attached_table))
+
+            self.assertLess(len(pickle.dumps(handle)), sadra.transitions.nbytes)
+
+            del attached, attached_tables
+            for block in attached_blocks:
+                block.close()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def test_share_system2(self):
+        """
+        test_share_system2
+        Description:
+            Verifies that a (mutable) adaptive transition system can be shared and used by worker processes.
+        """
+        # Constants
+        ats = pts2ats(SadraSystem(n_cols=5, n_rows=4))
+        pts = SadraSystem(n_cols=6, n_rows=5)
+
+        # Algorithm
+        handle, blocks = share_system(ats)
+        try:
+            attached, attached_blocks = attach_system(handle)
+            self.assertEqual(attached.S, tuple(ats.S))
+            self.assertTrue(np.array_equal(attached.reachable_skeleton(), ats.reachable_skeleton()))
+            del attached
+            for block in attached_blocks:
+                block.close()
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        handle, blocks = share_system(pts)
+        try:
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                counts = list(executor.map(count_successors_in_worker, [handle] * 4))
+            self.assertEqual(counts, [len(pts.transitions)] * 4)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
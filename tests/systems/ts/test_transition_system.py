@@ -4,10 +4,13 @@ Description:
     Testing that the transition system works.
 """
 import unittest
+from itertools import chain, combinations
 
+from kltl.automata import DeterministicRabinAutomaton
 from kltl.systems import (
     TransitionSystem,
 )
+from kltl.systems.ts import get_beverage_vending_machine
 
 
 class TestTransitionSystem(unittest.TestCase):
@@ -165,5 +168,37 @@ class TestTransitionSystem(unittest.TestCase):
         a = ts1.find_action_sequence_that_explains_state_sequence(["s1", "s2", "s3", "s3", "s2"])
         self.assertEqual([ts1.Act[int(i)] for i in a], ["a1", "a1", "a1", "a2"])
 
+    def test_product1(self):
+        """
+        test_product1
+        Description:
+            Tests that the product of the beverage vending machine with an automaton that counts dispensed drinks
+            (modulo 2) contains exactly the transitions ((s, q), a, (t, p)) where the automaton reads the labels of t, each
+            of them once (the vending machine lists some of its transitions twice).
+        """
+        # Constants
+        ts1 = get_beverage_vending_machine()
+        Sigma = [set(elt) for elt in chain.from_iterable(combinations(ts1.AP, r) for r in range(len(ts1.AP) + 1))]
+        aut1 = DeterministicRabinAutomaton(["even", "odd"], Sigma, ["even"])
+        for sigma in Sigma:
+            aut1.add_transition("even", sigma, "odd" if "dispensed" in sigma else "even")
+            aut1.add_transition("odd", sigma, "even" if "dispensed" in sigma else "odd")
+
+        # Algorithm
+        product_ts = ts1.product(aut1)
+
+        expected_transitions = set()
+        for (s, a, t) in ts1.transitions:
+            for (q, sigma, p) in aut1.transitions:
+                if aut1.Sigma[sigma] == set(ts1.L(ts1.S[t])):
+                    expected_transitions.add((s * len(aut1.Q) + q, a, t * len(aut1.Q) + p))
+
+        self.assertIsInstance(product_ts, TransitionSystem)
+        self.assertEqual(set(map(tuple, product_ts.transitions)), expected_transitions)
+        self.assertEqual(len(product_ts.transitions), len(expected_transitions))
+        self.assertEqual(product_ts.I, [("start", "even")])
+        self.assertEqual(product_ts.L(("dispense", "odd")), ["odd"])
+        self.assertEqual(set(product_ts.post(("select", "odd"), "dispense")), {("dispense", "even")})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
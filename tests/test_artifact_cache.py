@@ -0,0 +1,197 @@
+"""
+test_artifact_cache.py
+Description:
+    Tests the fingerprints and the on-disk cache of results.
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from kltl.artifact_cache import ArtifactCache, code_dependencies, fingerprint
+from kltl.systems import TransitionSystem
+from kltl.systems.ts import get_beverage_vending_machine, shared_beverage_vending_machine
+
+
+def count_transitions(system: TransitionSystem) -> int:
+    count_transitions.n_calls += 1
+    return len(system.transitions)
+
+count_transitions.n_calls = 0
+
+
+def copy_system(system: TransitionSystem) -> TransitionSystem:
+    return TransitionSystem(system.S, system.Act, system.AP, I=system.I, transitions=system.transitions.copy(), labels=system.labels)
+
+
+class TestArtifactCache(unittest.TestCase):
+    def test_fingerprint1(self):
+        """
+        test_fingerprint1
+        Description:
+            Tests that equal systems have the same fingerprint and that adding a transition changes it.
+        :return:
+        """
+        # Constants
+        ts1, ts2 = shared_beverage_vending_machine(), get_beverage_vending_machine()
+
+        self.assertEqual(fingerprint(ts1), fingerprint(ts2))
+        self.assertEqual(fingerprint({"a", "b", "c"}), fingerprint({"c", "b", "a"}))
+        self.assertNotEqual(fingerprint([1, 2]), fingerprint((1, 2)))
+        self.assertNotEqual(fingerprint(np.arange(3, dtype=np.int32)), fingerprint(np.arange(3, dtype=np.int64)))
+
+        ts2.add_transition("start", "coin", "dispense")
+        self.assertNotEqual(fingerprint(ts1), fingerprint(ts2))
+
+    def test_call1(self):
+        """
+        test_call1
+        Description:
+            Tests that a result is only computed once for the same input, and recomputed when the input changes.
+        :return:
+        """
+        # Constants
+        ts1 = get_beverage_vending_machine()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ArtifactCache(tmpdir)
+            count_transitions.n_calls = 0
+
+            # Algorithm
+            self.assertEqual(cache.call(count_transitions, ts1), len(ts1.transitions))
+            self.assertEqual(cache.call(count_transitions, shared_beverage_vending_machine()), len(ts1.transitions))
+            self.assertEqual(count_transitions.n_calls, 1)
+
+            ts1.add_transition("start", "coin", "dispense")
+            self.assertEqual(cache.call(count_transitions, ts1), len(ts1.transitions))
+            self.assertEqual(count_transitions.n_calls, 2)
+
+            cache.call(count_transitions, ts1, force=True)
+            self.assertEqual(count_transitions.n_calls, 3)
+
+            # Systems are stored in the binary format
+            ts_loaded = cache.call(copy_system, ts1)
+            ts_loaded = cache.call(copy_system, ts1)
+            self.assertIsInstance(ts_loaded, TransitionSystem)
+            self.assertTrue(np.array_equal(ts_loaded.transitions, ts1.transitions))
+            self.assertTrue(any(path.endswith(".kltl") for path in cache.entries()))
+
+    def test_evict1(self):
+        """
+        test_evict1
+        Description:
+            Tests that the least recently used result is removed when the cache is full.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ArtifactCache(tmpdir, max_bytes=2500)
+
+            # Algorithm
+            for name in ["a", "b"]:
+                cache.put(name, np.zeros((100,)))
+            os.utime(cache.path("a"), ns=(1, 1))
+            os.utime(cache.path("b"), ns=(2, 2))
+            cache.get("a")  # a is now the most recently used result
+
+            cache.put("c", np.zeros((100,)))
+
+            self.assertTrue(cache.contains("a"))
+            self.assertFalse(cache.contains("b"))
+            self.assertTrue(cache.contains("c"))
+            self.assertLessEqual(cache.size(), 2500)
+
+    def test_put1(self):
+        """
+        test_put1
+        Description:
+            Tests that put writes through a temporary file of its own, which is removed even when the result can not be
+            stored.
+        :return:
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ArtifactCache(tmpdir)
+
+            # Algorithm
+            cache.put("a", [1, 2, 3])
+            cache.put("b", get_beverage_vending_machine())
+            with self.assertRaises(Exception):
+                cache.put("c", lambda x: x)
+
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["a.pkl", "b.kltl"])
+            self.assertEqual(cache.get("a"), [1, 2, 3])
+
+    def test_key1(self):
+        """
+        test_key1
+        Description:
+            Tests that the key of a function changes when a global that it calls is renamed (the bytecode is the same)
+            and when a helper function in another module that it calls is changed, but not when a function of that
+            module which it does not reach is changed.
+        :return:
+        """
+        # Constants
+        namespace1, namespace2 = {"__name__": __name__}, {"__name__": __name__}
+        exec("def measure(x):\n    return len(x)", namespace1)
+        exec("def measure(x):\n    return sum(x)", namespace2)
+        self.assertEqual(namespace1["measure"].__code__.co_code, namespace2["measure"].__code__.co_code)
+
+        helpers_source = "def helper(x):\n    return x + {0}\n\ndef unrelated(x):\n    return x - {1}\n"
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ArtifactCache(os.path.join(tmpdir, "cache"))
+            self.assertNotEqual(cache.key(namespace1["measure"], [1, 2]), cache.key(namespace2["measure"], [1, 2]))
+
+            # Algorithm
+            with open(os.path.join(tmpdir, "cached_helpers.py"), "w") as f:
+                f.write(helpers_source.format(1, 1))
+            with open(os.path.join(tmpdir, "cached_caller.py"), "w") as f:
+                f.write("import cached_helpers\n\ndef compute(x):\n    return cached_helpers.helper(x)\n")
+
+            sys.path.insert(0, tmpdir)
+            sys.dont_write_bytecode, dont_write_bytecode = True, sys.dont_write_bytecode
+            try:
+                cached_caller = importlib.import_module("cached_caller")
+                names = [name for (name, _) in code_dependencies(cached_caller.compute)]
+                self.assertIn("cached_helpers.helper", names)
+                self.assertNotIn("cached_helpers.unrelated", names)
+                key1 = cache.key(cached_caller.compute, 1)
+                self.assertEqual(cache.key(cached_caller.compute, 1), key1)
+
+                for (helper_change, unrelated_change, changes_key) in [(1, 2, False), (2, 2, True)]:
+                    with open(os.path.join(tmpdir, "cached_helpers.py"), "w") as f:
+                        f.write(helpers_source.format(helper_change, unrelated_change))
+                    importlib.reload(sys.modules["cached_helpers"])
+
+                    self.assertEqual(cache.key(cached_caller.compute, 1) != key1, changes_key)
+            finally:
+                sys.path.remove(tmpdir)
+                sys.dont_write_bytecode = dont_write_bytecode
+                sys.modules.pop("cached_caller", None)
+                sys.modules.pop("cached_helpers", None)
+
+    def test_code_dependencies1(self):
+        """
+        test_code_dependencies1
+        Description:
+            Tests that the dependencies of a function of this package are followed transitively (through the methods of
+            the classes that it uses), that installed packages are described by their version and that modules which
+            the function does not reach are not part of them.
+        :return:
+        """
+        # Constants
+        dependencies = dict(code_dependencies(copy_system))
+
+        self.assertIn(f"{__name__}.copy_system", dependencies)
+        self.assertIn("kltl.systems.ts.transition_system.TransitionSystem.__init__", dependencies)
+        self.assertFalse(any(name.startswith("kltl.systems.pts") for name in dependencies))
+        self.assertFalse(any(name.startswith("kltl.grammar") for name in dependencies))
+
+        self.assertEqual(dict(code_dependencies(fingerprint))["numpy"], f"numpy {np.__version__}")
+
+
+if __name__ == "__main__":
+    unittest.main()
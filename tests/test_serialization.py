@@ -0,0 +1,107 @@
+"""
+test_serialization.py
+Description:
+    Tests the binary save and load functions of the systems and automata.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from kltl.automata import DeterministicRabinAutomaton
+from kltl.serialization import load_object, read_metadata
+from kltl.systems import AdaptiveTransitionSystem, TransitionSystem
+from kltl.systems.ats.pts_to_ats import pts2ats
+from kltl.systems.pts import ParametricTransitionSystem
+from kltl.systems.pts.sadra import get_sadra_system
+from kltl.systems.ts import get_beverage_vending_machine
+
+
+class TestSerialization(unittest.TestCase):
+    def assertSameSystem(self, system1, system2):
+        self.assertEqual(type(system1), type(system2))
+        self.assertEqual(set(system1.__dict__.keys()) - {"_index_cache", "_frozen"}, set(system2.__dict__.keys()))
+        for (name, value) in system2.__dict__.items():
+            if isinstance(value, np.ndarray):
+                self.assertTrue(np.array_equal(getattr(system1, name), value))
+            else:
+                self.assertEqual(getattr(system1, name), value)
+
+    def test_save_load_ts1(self):
+        """
+        test_save_load_ts1
+        Description:
+            Tests that a transition system (and its metadata) can be saved and loaded, with and without memory mapping.
+        :return:
+        """
+        # Constants
+        ts1 = get_beverage_vending_machine()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "beverage.kltl")
+
+            # Algorithm
+            ts1.save(path, metadata={"conversion_time": 1.5})
+
+            self.assertSameSystem(ts1, TransitionSystem.load(path))
+            self.assertSameSystem(ts1, TransitionSystem.load(path, mmap=False))
+            self.assertEqual(read_metadata(path), {"conversion_time": 1.5})
+
+            # Loaded systems can still be modified
+            ts2 = TransitionSystem.load(path)
+            ts2.add_transition("start", "coin", "dispense")
+            self.assertEqual(len(ts2.transitions), len(ts1.transitions) + 1)
+            self.assertEqual(ts2.post("start", "coin"), ["pay", "dispense"])
+
+    def test_save_load_ats1(self):
+        """
+        test_save_load_ats1
+        Description:
+            Tests that the (tuple-valued) states of an ATS and the parametric system it came from survive a round
+            trip, with compression.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        sadra_ats = pts2ats(sadra)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Algorithm
+            sadra.save(os.path.join(tmpdir, "sadra.kltl"))
+            sadra_ats.save(os.path.join(tmpdir, "sadra_ats.kltl"), compress=True)
+
+            self.assertSameSystem(sadra, ParametricTransitionSystem.load(os.path.join(tmpdir, "sadra.kltl")))
+            loaded_ats = load_object(os.path.join(tmpdir, "sadra_ats.kltl"))
+            self.assertSameSystem(sadra_ats, loaded_ats)
+            self.assertIsInstance(loaded_ats.S[0], tuple)
+
+            with self.assertRaises(AssertionError):
+                TransitionSystem.load(os.path.join(tmpdir, "sadra_ats.kltl"))
+
+    def test_save_load_dra1(self):
+        """
+        test_save_load_dra1
+        Description:
+            Tests that the sets in the alphabet and accepting pairs of an automaton are restored as sets.
+        :return:
+        """
+        # Constants
+        dra = DeterministicRabinAutomaton(
+            Q=["q0", "q1"], Sigma=[set(), {"a"}, {"a", "b"}], Q0=["q0"],
+        )
+        dra.add_transition("q0", {"a"}, "q1")
+        dra.add_accepting_pair(F_i={"q0"}, I_i={"q1"})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Algorithm
+            dra.save(os.path.join(tmpdir, "dra.kltl"))
+            loaded_dra = DeterministicRabinAutomaton.load(os.path.join(tmpdir, "dra.kltl"))
+
+            self.assertSameSystem(dra, loaded_dra)
+            self.assertEqual(loaded_dra.post("q0", {"a"}), ["q1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+test_statistical_model_checking.py
+Description:
+    Tests the statistical model checking functions.
+"""
+import unittest
+from unittest import mock
+
+from kltl.grammar.kltl_semantics import Always, Eventually, Not, Or
+from kltl.systems.pts.sadra import get_sadra_system
+from kltl.systems.pts.rollouts import RolloutRunner, run_rollouts, TraceFormulaEvaluator
+from kltl.verification import estimate_probability, sequential_probability_ratio_test
+from kltl.verification.statistical_model_checking import okamoto_bound
+
+
+class TestStatisticalModelChecking(unittest.TestCase):
+    def test_estimate_probability1(self):
+        """
+        test_estimate_probability1
+        Description:
+            Tests that the estimate is close to the fraction found with a large number of rollouts.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        phi = Always(Not("Crashed!"))
+        reference = run_rollouts(sadra, 20000, 15, TraceFormulaEvaluator(phi), n_workers=1, seed=1).values.mean()
+
+        # Algorithm
+        result = estimate_probability(sadra, phi, 15, epsilon=0.05, delta=0.05, seed=2)
+
+        self.assertLessEqual(result.n_samples, okamoto_bound(0.05, 0.025))
+        self.assertLess(abs(result.estimate - reference), 0.05)
+        self.assertGreater(result.wall_time, 0.0)
+
+    def test_estimate_probability2(self):
+        """
+        test_estimate_probability2
+        Description:
+            Tests that the sampling stops early for a formula that always holds.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        phi = Or("Crashed!", Not("Crashed!"))
+
+        # Algorithm
+        result = estimate_probability(sadra, phi, 5, epsilon=0.01, delta=0.05, batch_size=500, seed=0)
+
+        self.assertEqual(result.estimate, 1.0)
+        self.assertLess(result.n_samples, okamoto_bound(0.01, 0.025) / 5)
+
+    def test_sequential_probability_ratio_test1(self):
+        """
+        test_sequential_probability_ratio_test1
+        Description:
+            Tests that the SPRT accepts/rejects thresholds that are far from the true probability.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        phi = Eventually("Crashed!")
+        p = run_rollouts(sadra, 20000, 15, TraceFormulaEvaluator(phi), n_workers=1, seed=1).values.mean()
+
+        # Algorithm
+        result_low = sequential_probability_ratio_test(sadra, phi, 15, theta=p - 0.15, batch_size=200, seed=3)
+        result_high = sequential_probability_ratio_test(sadra, phi, 15, theta=p + 0.15, batch_size=200, seed=4)
+
+        self.assertTrue(result_low.decision)
+        self.assertFalse(result_high.decision)
+        self.assertLess(result_low.n_samples, 1000)
+
+    def test_parallel_batches1(self):
+        """
+        test_parallel_batches1
+        Description:
+            Tests that each batch is split into one shard per worker, so that all of the workers sample at once.
+        :return:
+        """
+        # Constants
+        sadra = get_sadra_system()
+        phi = Eventually("Crashed!")
+        run = RolloutRunner.run
+
+        # Algorithm
+        with mock.patch.object(RolloutRunner, "run", autospec=True, side_effect=run) as patched_run:
+            estimate = estimate_probability(sadra, phi, 10, epsilon=0.1, batch_size=300, n_workers=2, seed=0)
+            test = sequential_probability_ratio_test(sadra, phi, 10, theta=0.5, batch_size=101, n_workers=2, seed=0)
+
+        self.assertGreater(estimate.n_samples, 0)
+        self.assertIsNotNone(test.decision)
+        shard_sizes = [call.kwargs["shard_size"] for call in patched_run.call_args_list]
+        batch_sizes = [call.args[1] for call in patched_run.call_args_list]
+        self.assertEqual(shard_sizes, [(B + 1) // 2 for B in batch_sizes])
+
+
+if __name__ == '__main__':
+    unittest.main()